@@ -0,0 +1,140 @@
+"""Bounded-cost voice feature extraction for the multi-modal check-in.
+
+Clips are downmixed and resampled to a fixed low rate and capped at a maximum
+duration, then RMS and YIN pitch are computed block by block, skipping pitch
+tracking for silent blocks. CPU per clip therefore depends only on the capped
+duration, never on the browser's native sample rate or clip length.
+
+WAV/FLAC/OGG are read by libsndfile. Anything else, notably the webm/opus that
+Chrome's MediaRecorder produces, is decoded by piping it through ffmpeg
+(AURA_FFMPEG), which must be installed for those clips.
+"""
+import io
+import os
+import subprocess
+
+import numpy as np
+
+AUDIO_SAMPLE_RATE = int(os.getenv("AURA_AUDIO_SAMPLE_RATE", 16000))
+AUDIO_MAX_SECONDS = float(os.getenv("AURA_AUDIO_MAX_SECONDS", 10))
+FFMPEG = os.getenv("AURA_FFMPEG", "ffmpeg")
+FFMPEG_TIMEOUT = 10
+
+FRAME_LENGTH = 1024  # 64 ms at 16 kHz, long enough for YIN down to PITCH_FMIN
+HOP_LENGTH = 256
+BLOCK_SECONDS = 1.0
+# Adult speech sits well inside this band; the old C2-C7 range mostly tracked noise
+PITCH_FMIN = 65.0
+PITCH_FMAX = 400.0
+SILENCE_RMS = 0.01
+MIN_PAUSE_SECONDS = 0.25
+MIN_BURST_FRAMES = 3
+
+
+def load_clip(audio_bytes, sr=AUDIO_SAMPLE_RATE, max_seconds=AUDIO_MAX_SECONDS):
+    """Decode at most max_seconds of mono audio, resampled to sr."""
+    import librosa
+    import soundfile as sf
+    try:
+        with sf.SoundFile(io.BytesIO(audio_bytes)) as f:
+            native_sr = f.samplerate
+            remaining = min(f.frames, int(max_seconds * native_sr)) if f.frames > 0 else int(max_seconds * native_sr)
+            blocks = []
+            for block in f.blocks(blocksize=native_sr, dtype="float32", always_2d=True):
+                block = block[:remaining].mean(axis=1)
+                blocks.append(block)
+                remaining -= len(block)
+                if remaining <= 0:
+                    break
+        y = np.concatenate(blocks) if blocks else np.zeros(0, np.float32)
+        if native_sr != sr:
+            y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+        return y
+    except RuntimeError:  # soundfile.LibsndfileError
+        # Containers libsndfile can't read (e.g. browser webm/opus); librosa.load would hand a
+        # file-like straight back to soundfile, so decode through ffmpeg instead
+        return _ffmpeg_decode(audio_bytes, sr, max_seconds)
+
+
+def _ffmpeg_decode(audio_bytes, sr, max_seconds):
+    """Mono float32 at sr from ffmpeg, which downmixes, resamples and stops after max_seconds itself."""
+    command = [FFMPEG, "-v", "error", "-i", "pipe:0", "-t", str(max_seconds), "-ac", "1", "-ar", str(sr), "-f", "f32le", "pipe:1"]
+    try:
+        proc = subprocess.run(command, input=audio_bytes, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except FileNotFoundError:
+        raise RuntimeError(f"this audio format needs ffmpeg, and {FFMPEG!r} was not found") from None
+    y = np.frombuffer(proc.stdout, dtype="<f4")
+    # A live clip ends mid-cluster, so ffmpeg may complain about the tail after decoding the rest
+    if proc.returncode != 0 and not len(y):
+        raise RuntimeError(f"ffmpeg could not decode the clip: {proc.stderr.decode(errors='replace').strip()[-200:]}")
+    return y
+
+
+def _runs(mask):
+    """Lengths of consecutive True runs in a boolean frame mask."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[1::2] - edges[::2]
+
+
+def extract_features(y, sr=AUDIO_SAMPLE_RATE):
+    import librosa
+    duration = len(y) / sr if sr else 0.0
+    if len(y) < FRAME_LENGTH:
+        return {"duration": round(duration, 3), "energy": 0.0, "pitch_mean": 0.0, "pitch_std": 0.0,
+                "speaking_rate": 0.0, "pause_count": 0, "pause_seconds": round(duration, 3), "voiced_ratio": 0.0}
+
+    block = int(BLOCK_SECONDS * sr) // HOP_LENGTH * HOP_LENGTH
+    rms_parts, pitch_parts = [], []
+    for start in range(0, len(y) - FRAME_LENGTH + 1, block):
+        # Extend each block by one window so frames tile the clip exactly across seams
+        chunk = y[start:start + block + FRAME_LENGTH - HOP_LENGTH]
+        if len(chunk) < FRAME_LENGTH:
+            break
+        rms = librosa.feature.rms(y=chunk, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH, center=False)[0]
+        rms_parts.append(rms)
+        voiced = rms > SILENCE_RMS
+        if voiced.any():
+            f0 = librosa.yin(chunk, fmin=PITCH_FMIN, fmax=PITCH_FMAX, sr=sr,
+                             frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH, center=False)
+            pitch_parts.append(f0[:len(voiced)][voiced[:len(f0)]])
+
+    rms = np.concatenate(rms_parts)
+    voiced = rms > SILENCE_RMS
+    pitch = np.concatenate(pitch_parts) if pitch_parts else np.zeros(0)
+    frame_seconds = HOP_LENGTH / sr
+
+    bursts = _runs(voiced)
+    pauses = _runs(~voiced) * frame_seconds
+    pauses = pauses[pauses >= MIN_PAUSE_SECONDS]
+
+    return {
+        "duration": round(duration, 3),
+        "energy": round(float(rms.mean()), 5),
+        "pitch_mean": round(float(pitch.mean()), 2) if len(pitch) else 0.0,
+        "pitch_std": round(float(pitch.std()), 2) if len(pitch) else 0.0,
+        # Voiced bursts per second is a cheap syllable-rate proxy
+        "speaking_rate": round(int((bursts >= MIN_BURST_FRAMES).sum()) / duration, 3) if duration else 0.0,
+        "pause_count": int(len(pauses)),
+        "pause_seconds": round(float(pauses.sum()), 3),
+        "voiced_ratio": round(float(voiced.mean()), 3),
+    }
+
+
+def warm_up():
+    """One second of noise through the feature path; librosa JIT-compiles YIN on first use."""
+    extract_features(np.random.default_rng(0).uniform(-0.1, 0.1, AUDIO_SAMPLE_RATE).astype(np.float32))
+
+
+def analyze_clip(audio_bytes):
+    """Encoded clip -> feature dict. Meant to run inside an inference worker process."""
+    return extract_features(load_clip(audio_bytes))
+
+
+def audio_mood(features, visual_mood):
+    mean_rms = features["energy"]
+    if mean_rms > 0.05: # High energy
+        return "excited" if visual_mood == "happy" else "stressed"
+    elif mean_rms < 0.01: # Low energy
+        return "calm" if visual_mood != "sad" else "melancholy"
+    return "neutral"
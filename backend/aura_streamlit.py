@@ -169,10 +169,10 @@ elif st.session_state.stage == 'app':
             
             if img_file:
                 bytes_data = img_file.getvalue()
-                base64_image = base64.b64encode(bytes_data).decode('utf-8')
                 
                 try:
-                    res = requests.post(f"{API_BASE}/analyze-visual", json={"image": f"data:image/jpeg;base64,{base64_image}"})
+                    # Send the JPEG bytes as-is; no base64/JSON wrapping needed
+                    res = requests.post(f"{API_BASE}/analyze-visual/upload", data=bytes_data, headers={"Content-Type": "image/jpeg"})
                     if res.status_code == 200:
                         visual_data = res.json()
                         st.session_state.current_mood = visual_data['mood']
@@ -206,9 +206,24 @@ elif st.session_state.stage == 'app':
                     
                     with st.spinner("Aura is listening..."):
                         try:
-                            res = requests.post(f"{API_BASE}/journal/entries", json=payload)
+                            # Show each counselling field as soon as the backend streams it
+                            res = requests.post(f"{API_BASE}/journal/entries/stream", json=payload, stream=True)
                             if res.status_code == 200:
-                                bot_res = res.json()
+                                preview = st.empty()
+                                partial, bot_res, event = {}, None, None
+                                for line in res.iter_lines(decode_unicode=True):
+                                    if line.startswith("event: "):
+                                        event = line[7:]
+                                    elif line.startswith("data: "):
+                                        data = json.loads(line[6:])
+                                        if event == "field":
+                                            partial[data["field"]] = data["value"]
+                                            if data["field"] == "suggestion":
+                                                preview.write(data["value"])
+                                        elif event == "shield":
+                                            st.error("Aura Shield: please reach out to someone now - " + ", ".join(f"{c['name']} ({c['phone']})" for c in data["emergency_contacts"]))
+                                        elif event == "done":
+                                            bot_res = data
                                 st.session_state.bot_message = bot_res
                                 st.session_state.persistent_resources = {
                                     "breathing": bot_res['breathing_exercise'],
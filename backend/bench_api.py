@@ -0,0 +1,341 @@
+"""Load test for the Aura API against local fakes.
+
+fake_gemini.py and the API run as subprocesses, with the emotion model
+swapped for the fixed-latency stub (AURA_EMOTION_BACKEND=fake) unless
+--emotion-backend deepface is given. For every scale a scratch aura.db is
+seeded with synthetic entries through dataio.py, then each endpoint is driven
+at a fixed concurrency and its throughput and p50/p95/p99 latency reported.
+Results are written as JSON; --compare flags regressions against an
+earlier run:
+
+    python bench_api.py --scales 1000,100000 --concurrency 32
+    python bench_api.py --out after.json --compare before.json
+"""
+import argparse
+import asyncio
+import base64
+import datetime
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MOODS = ["Happy", "Calm", "Focused", "Sad", "Anxious", "Stressed"]
+EMOTIONS = ["happy", "calm", "focus", "sad", "anxiety", "stress"]
+# Clear-cut texts the local tier answers, and vaguer ones that go to Gemini
+LOCAL_TEXTS = [
+    ("I feel really happy and grateful today, great walk with friends", "Happy"),
+    ("So anxious and worried about tomorrow, I feel nervous and scared", "Anxious"),
+    ("Calm and peaceful evening, relaxed after a quiet dinner", "Calm"),
+]
+GEMINI_TEXTS = [
+    ("Long day of meetings, moved some things around", "Calm"),
+    ("Talked to my sister about the trip plans", "Happy"),
+    ("Not sure what to make of the week so far", "Sad"),
+]
+ENTRY_FIELDS = "id,created_at,overall_mood,emotion,sentiment_score"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def seed_rows(count, rng, days=90):
+    now = datetime.datetime.utcnow()
+    for i in range(count):
+        created = now - datetime.timedelta(seconds=rng.uniform(0, days * 86400))
+        mood = rng.randrange(len(MOODS))
+        yield {
+            "content": f"synthetic entry {i} " + " ".join(rng.choice(("exam", "walk", "friends", "sleep", "work", "family")) for _ in range(20)),
+            "reflection_date": created.strftime("%m-%d-%Y"), "overall_mood": MOODS[mood], "specific_emotions": "Peaceful",
+            "strategies": "breathing", "intensity": rng.randint(1, 10), "lessons_learned": "pace myself",
+            "template_name": "General", "user_phone": f"+1555{i % 500:07d}", "created_at": created.isoformat(),
+            "sentiment_score": round(rng.uniform(-1, 1), 3), "emotion": EMOTIONS[mood], "suggestion": "s" * 400,
+            "breathing_exercise": "Box breathing", "focus_music": "Lo-fi", "counselor_info": "Talk to someone",
+            "quote": "q", "counselor_tips": "[]", "enrichment_status": "complete", "analysis_tier": "gemini",
+        }
+
+
+def synthetic_image(path=None):
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    import cv2
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    cv2.ellipse(frame, (320, 240), (110, 150), 0, 0, 360, (180, 190, 220), -1)
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+
+def synthetic_wav(seconds=3.0, rate=16000):
+    t = np.arange(int(seconds * rate)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((signal * 32767).astype(np.int16).tobytes())
+    return buf.getvalue()
+
+
+def scenarios(image, audio):
+    image_url = "data:image/jpeg;base64," + base64.b64encode(image).decode()
+    audio_b64 = base64.b64encode(audio).decode() # the API takes audio as bare base64, not a data URL
+    counter = iter(range(10 ** 9))
+
+    def new_entry():
+        # A fresh number per request keeps the response cache out of the measurement
+        text, mood = random.choice(LOCAL_TEXTS + GEMINI_TEXTS)
+        return {
+            "reflection_date": datetime.date.today().strftime("%m-%d-%Y"), "overall_mood": mood,
+            "specific_emotions": ["Peaceful"], "triggers": f"{text} (#{next(counter)})", "strategies": "went for a walk",
+            "intensity": 5, "lessons": "one thing at a time", "user_phone": "+15550000001",
+        }
+
+    return {
+        "create_entry": lambda: ("POST", "/journal/entries", {"json": new_entry()}),
+        "create_entry_background": lambda: ("POST", "/journal/entries?background=true", {"json": new_entry()}),
+        "list_entries": lambda: ("GET", "/journal/entries", {"params": {"limit": 100}}),
+        "list_entries_fields": lambda: ("GET", "/journal/entries", {"params": {"limit": 100, "fields": ENTRY_FIELDS}}),
+        "mood_stats_week": lambda: ("GET", "/mood/stats", {"params": {"range": "week"}}),
+        "mood_stats_month": lambda: ("GET", "/mood/stats", {"params": {"range": "month"}}),
+        "analyze_visual": lambda: ("POST", "/analyze-visual", {"json": {"image": image_url}}),
+        "analyze_multi_modal": lambda: ("POST", "/analyze-multi-modal", {"json": {"image": image_url, "audio": audio_b64}}),
+    }
+
+
+async def drive(base_url, make_request, total, concurrency, warmup):
+    latencies, statuses, tiers = [], {}, {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)) as client:
+        for _ in range(warmup):
+            method, path, kwargs = make_request()
+            await client.request(method, path, **kwargs)
+
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                method, path, kwargs = make_request()
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status, response = type(e).__name__, None
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+                if response is not None and status == 200 and method == "POST" and path.startswith("/journal/entries"):
+                    tier = response.json().get("analysis_tier") or "pending"
+                    tiers[tier] = tiers.get(tier, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": sum(n for status, n in statuses.items() if status != 200),
+        "statuses": {str(status): n for status, n in statuses.items()},
+    }
+    if tiers:
+        result["tiers"] = tiers
+    return result
+
+
+def wait_ready(url, proc, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def stop(proc):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def server_env(args, workdir):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")])),
+        "AURA_DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'aura.db')}",
+        "AURA_CACHE_PATH": os.path.join(workdir, "aura_cache.db"),
+        "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{args.gemini_port}",
+        "GEMINI_API_KEY": env.get("GEMINI_API_KEY", "bench"),
+        "AURA_EMOTION_BACKEND": args.emotion_backend,
+        "AURA_FAKE_EMOTION_BATCH_MS": str(args.emotion_batch_ms),
+        "AURA_FAKE_EMOTION_FRAME_MS": str(args.emotion_frame_ms),
+    })
+    if args.image is None:
+        env["AURA_FACE_DETECTOR"] = "center" # the synthetic frame has no real face for the cascade
+    return env
+
+
+def scratch_dir(prefix):
+    """A temp root with backend/ (the server's working directory) and the frontend/dist it serves."""
+    root = tempfile.mkdtemp(prefix=prefix)
+    # main.py serves ../frontend/dist relative to its working directory
+    workdir = os.path.join(root, "backend")
+    os.makedirs(os.path.join(root, "frontend", "dist", "assets"))
+    with open(os.path.join(root, "frontend", "dist", "index.html"), "w") as f:
+        f.write("<html></html>")
+    os.makedirs(workdir)
+    return root, workdir
+
+
+def run_scale(args, scale, selected):
+    root, workdir = scratch_dir("aura-bench-api-")
+    env = server_env(args, workdir)
+
+    try:
+        if scale:
+            seed_path = os.path.join(root, "seed.ndjson")
+            rng = random.Random(scale)
+            with open(seed_path, "w") as f:
+                for row in seed_rows(scale, rng):
+                    f.write(json.dumps(row) + "\n")
+            started = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "dataio.py"), "import", seed_path],
+                           cwd=workdir, env=env, check=True, stderr=subprocess.DEVNULL)
+            print(f"seeded {scale} entries in {time.perf_counter() - started:.1f}s", flush=True)
+
+        log = open(os.path.join(root, "server.log"), "w")
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+                                   "--log-level", "warning"], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            base_url = f"http://127.0.0.1:{args.port}"
+            wait_ready(base_url + "/readyz", server) # models warm before the first measured request
+            results = []
+            for name, make_request in selected.items():
+                result = asyncio.run(drive(base_url, make_request, args.requests, args.concurrency, args.warmup))
+                result.update({"scale": scale, "endpoint": name})
+                print_row(result)
+                results.append(result)
+            return results
+        finally:
+            stop(server)
+            log.close()
+    finally:
+        if args.keep:
+            print(f"kept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+COLUMNS = ["scale", "endpoint", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"]
+
+
+def print_row(result):
+    print("  ".join(f"{result[c]:>24}" if c == "endpoint" else f"{result[c]:>10}" for c in COLUMNS), flush=True)
+
+
+def compare(results, baseline_path, tolerance):
+    """Print per-endpoint deltas against an earlier results file; True when nothing regressed."""
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["endpoint"]): r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\ncompared with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        before = baseline.get((result["scale"], result["endpoint"]))
+        if before is None:
+            continue
+        rps = (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] if before["throughput_rps"] else 0.0
+        p95 = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        regressed = rps < -tolerance or p95 > tolerance
+        ok = ok and not regressed
+        print(f"{result['scale']:>10}  {result['endpoint']:>24}  throughput {rps:+7.1%}  p95 {p95:+7.1%}{'  REGRESSED' if regressed else ''}")
+    return ok
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,100000", help="comma-separated entry counts to seed")
+    parser.add_argument("--endpoints", help="comma-separated subset of: " + ", ".join(scenarios(b"", b"")))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=100)
+    parser.add_argument("--emotion-backend", choices=["fake", "deepface"], default="fake")
+    parser.add_argument("--emotion-batch-ms", type=float, default=20, help="fake model time per forward pass")
+    parser.add_argument("--emotion-frame-ms", type=float, default=2, help="fake model time per frame in a pass")
+    parser.add_argument("--image", help="JPEG to send to the visual endpoints instead of a synthetic frame")
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--gemini-port", type=int, default=8021)
+    parser.add_argument("--out", help="results file (default bench_results/api-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop / p95 growth before flagging")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directories and server logs")
+    args = parser.parse_args()
+
+    available = scenarios(synthetic_image(args.image), synthetic_wav())
+    names = args.endpoints.split(",") if args.endpoints else list(available)
+    unknown = set(names) - set(available)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    selected = {name: available[name] for name in names}
+    scales = [int(s) for s in args.scales.split(",")]
+
+    gemini = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "fake_gemini.py"), "--port", str(args.gemini_port),
+                               "--latency-ms", str(args.gemini_latency_ms), "--jitter-ms", str(args.gemini_jitter_ms)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_ready(f"http://127.0.0.1:{args.gemini_port}/stats", gemini)
+        print("  ".join(f"{c:>24}" if c == "endpoint" else f"{c:>10}" for c in COLUMNS))
+        for scale in scales:
+            results.extend(run_scale(args, scale, selected))
+    finally:
+        stop(gemini)
+
+    out = args.out or os.path.join("bench_results", f"api-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"created": datetime.datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+                   "config": vars(args), "results": results}, f, indent=2)
+    print(f"\nwrote {out}")
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Precision/recall and speed of the keyword engine against the old substring scans.
+
+keyword_eval.jsonl holds labelled journal snippets; each line lists the
+categories that should fire. Both matchers are scored on it, then timed on
+the same texts. --extra-terms pads both matchers with synthetic terms to show
+how each scales with lexicon size:
+
+    python bench_keywords.py --iterations 2000 --extra-terms 500
+"""
+import argparse
+import json
+import os
+import time
+
+from keywords import lexicon, CompiledLexicon
+
+EVAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keyword_eval.jsonl")
+
+# The per-category `any(k in text ...)` loops default_analysis used before keywords.py
+LEGACY_TERMS = {
+    "crisis": ["suicide", "death", "kill myself", "end my life", "harm myself", "want to die", "commit suicide", "hanging", "overdose"],
+    "academic": ["exam", "test", "study", "project", "assignment"],
+    "social": ["alone", "lonely", "argument", "fight"],
+}
+
+
+def legacy_categories(text):
+    text = text.lower()
+    return {name for name, terms in LEGACY_TERMS.items() if any(k in text for k in terms)}
+
+
+def engine_categories(text):
+    return set(lexicon.categories(text))
+
+
+def score(matcher, samples):
+    counts = {name: {"tp": 0, "fp": 0, "fn": 0} for name in LEGACY_TERMS}
+    mistakes = []
+    for sample in samples:
+        expected, found = set(sample["categories"]), matcher(sample["text"])
+        for name in counts:
+            if name in found and name in expected:
+                counts[name]["tp"] += 1
+            elif name in found:
+                counts[name]["fp"] += 1
+            elif name in expected:
+                counts[name]["fn"] += 1
+        if expected != found:
+            mistakes.append((sample["text"], sorted(expected), sorted(found)))
+    report = {}
+    for name, c in counts.items():
+        report[name] = {
+            "precision": round(c["tp"] / (c["tp"] + c["fp"]), 3) if c["tp"] + c["fp"] else 1.0,
+            "recall": round(c["tp"] / (c["tp"] + c["fn"]), 3) if c["tp"] + c["fn"] else 1.0,
+        }
+    return report, mistakes
+
+
+def timing(matcher, texts, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            matcher(text)
+    return (time.perf_counter() - started) / (iterations * len(texts)) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--eval", default=EVAL_PATH)
+    parser.add_argument("--extra-terms", type=int, default=0)
+    parser.add_argument("--show-mistakes", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.eval) as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    texts = [s["text"] for s in samples]
+    # A full entry is triggers + strategies + lessons; time that length too
+    long_texts = [" ".join(texts[i:i + 3]) * 4 for i in range(0, len(texts), 3)]
+
+    if args.extra_terms:
+        with open(lexicon.path) as f:
+            data = json.load(f)
+        padding = [f"synthetic term {i}" for i in range(args.extra_terms)]
+        for name in LEGACY_TERMS:
+            LEGACY_TERMS[name] = LEGACY_TERMS[name] + padding
+            data["categories"][name]["terms"] += padding
+        padded = CompiledLexicon(data)
+        engine_categories = lambda text: {hit.category for hit in padded.scan(text) if not hit.negated}
+
+    print(f"lexicon version {lexicon.version}, {len(samples)} labelled samples, {args.extra_terms} extra terms per category")
+    for label, matcher in (("substring", legacy_categories), ("keywords", engine_categories)):
+        report, mistakes = score(matcher, samples)
+        quality = "  ".join(f"{name} P={r['precision']:.2f} R={r['recall']:.2f}" for name, r in report.items())
+        short = timing(matcher, texts, args.iterations)
+        long = timing(matcher, long_texts, max(1, args.iterations // 4))
+        print(f"{label:>10}: {quality}  |  {short:.1f} us/snippet, {long:.1f} us/entry")
+        if args.show_mistakes:
+            for text, expected, found in mistakes:
+                print(f"{'':>12}{text!r}: expected {expected}, got {found}")
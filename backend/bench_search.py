@@ -0,0 +1,192 @@
+"""Full-text search benchmark: /journal/search queries against a large journal.
+
+Fills a fresh database with --rows synthetic entries (Zipf-distributed words
+plus a few planted terms of known frequency) through the FTS sync triggers.
+It then times search.search() for rare, common, multi-word, prefix, OR and
+per-user queries: first pages, and a later page reached through the keyset
+cursor. For comparison it also times the LIKE scan that filtering every row
+amounts to.
+
+    python bench_search.py --rows 1000000 --users 2000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import database
+import search
+from bench_storage import percentile
+from database import Base, STORAGE_PRAGMAS
+
+# Planted terms and the share of entries whose triggers mention them
+PLANTED = {"exam": 0.2, "argument": 0.02, "roommate": 0.01, "procrastinating": 0.005, "zebra": 0.0001}
+
+QUERIES = [
+    ("rare", "zebra", "all", False),
+    ("medium", "argument", "all", False),
+    ("common", "exam", "all", False),
+    ("two_words", "exam argument", "all", False),
+    ("any_word", "roommate argument", "any", False),
+    ("prefix", "procrast*", "all", False),
+    ("common_one_user", "exam", "all", True),
+]
+
+INSERT = ("INSERT INTO journal_entries (content, reflection_date, overall_mood, specific_emotions, strategies, intensity, "
+          "lessons_learned, template_name, user_age, user_gender, user_phone, created_at, sentiment_score, emotion, "
+          "suggestion, enrichment_status) VALUES (?, '01-01-2026', 'Stressed', 'Tense', ?, 5, ?, 'General', 19, 'Female', ?, "
+          "?, 0.0, 'stress', ?, 'complete')")
+
+
+def vocabulary(size, seed):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size * 2)})[:size]
+    rng.shuffle(words)
+    cum, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        cum.append(total)
+    return words, cum
+
+
+def rows(count, users, seed):
+    rng = random.Random(seed)
+    words, cum = vocabulary(5000, seed)
+    for i in range(count):
+        sample = rng.choices(words, cum_weights=cum, k=66)
+        triggers = sample[:12] + [term for term, share in PLANTED.items() if rng.random() < share]
+        rng.shuffle(triggers)
+        yield (" ".join(triggers), " ".join(sample[12:18]), " ".join(sample[18:26]), f"555{rng.randrange(users):07d}",
+               f"2026-01-01 00:00:{i % 60:02d}.{i:06d}", " ".join(sample[26:]))
+
+
+def fill(engine, count, users, chunk_size, seed):
+    conn = engine.raw_connection()
+    try:
+        batch, started = [], time.perf_counter()
+        for row in rows(count, users, seed):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                conn.executemany(INSERT, batch)
+                conn.commit()
+                batch = []
+        if batch:
+            conn.executemany(INSERT, batch)
+            conn.commit()
+        return time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def make_db(path, with_search):
+    engine = database.make_engine(f"sqlite:///{path}", STORAGE_PRAGMAS)
+    Base.metadata.create_all(bind=engine)
+    if with_search:
+        with engine.begin() as conn:
+            database.install_search(conn)
+    return engine
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return times, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    parser.add_argument("--page", type=int, default=5, help="which page to time through the cursor")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--baseline-rows", type=int, default=100_000, help="rows inserted without the index, for the write cost")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aura-bench-search-")
+    try:
+        plain = make_db(os.path.join(workdir, "plain.db"), with_search=False)
+        plain_seconds = fill(plain, args.baseline_rows, args.users, args.chunk_size, args.seed)
+        plain.dispose()
+
+        path = os.path.join(workdir, "aura.db")
+        engine = make_db(path, with_search=True)
+        fill_seconds = fill(engine, args.rows, args.users, args.chunk_size, args.seed)
+        Session = sessionmaker(autoflush=False, bind=engine)
+        db = Session()
+        started = time.perf_counter()
+        search.rebuild(db) # what `python search.py --rebuild` costs on an existing database
+        db.commit()
+        rebuild_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        search.optimize(db)
+        db.commit()
+        optimize_seconds = time.perf_counter() - started
+        size_mb = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir) if f.startswith("aura.db")) / 2**20
+
+        summary = {
+            "rows": args.rows,
+            "insert_rows_per_second": round(args.rows / fill_seconds),
+            "insert_rows_per_second_without_index": round(args.baseline_rows / plain_seconds),
+            "optimize_seconds": round(optimize_seconds, 2),
+            "rebuild_seconds": round(rebuild_seconds, 2),
+            "database_mb": round(size_mb, 1),
+        }
+        print(json.dumps(summary, indent=2))
+
+        one_user = db.execute(text("SELECT user_phone FROM journal_entries LIMIT 1")).scalar()
+        results = []
+        columns = ["query", "matches", "p50_ms", "p95_ms", f"page{args.page}_p50_ms"]
+        print("  ".join(f"{c:>16}" for c in columns))
+        for label, q, match, per_user in QUERIES:
+            query = search.fts_query(q, match)
+            phone = one_user if per_user else None
+            if per_user:
+                matches = db.execute(text("SELECT COUNT(*) FROM journal_fts JOIN journal_entries e ON e.id = journal_fts.rowid "
+                                          "WHERE journal_fts MATCH :q AND e.user_phone = :phone"),
+                                     {"q": search.for_user(query, phone), "phone": phone}).scalar()
+            else:
+                matches = db.execute(text("SELECT COUNT(*) FROM journal_fts WHERE journal_fts MATCH :q"), {"q": query}).scalar()
+            first, (_, after) = timed(lambda: search.search(db, query, args.limit, None, phone), args.repeats)
+            for _ in range(args.page - 2):
+                if after is None:
+                    break
+                _, after = search.search(db, query, args.limit, after, phone)
+            later = timed(lambda: search.search(db, query, args.limit, after, phone), args.repeats)[0] if after else []
+            result = {
+                "query": label, "matches": matches,
+                "p50_ms": round(percentile(first, 50) * 1000, 2), "p95_ms": round(percentile(first, 95) * 1000, 2),
+                f"page{args.page}_p50_ms": round(percentile(later, 50) * 1000, 2) if later else None,
+            }
+            results.append(result)
+            print("  ".join(f"{str(result[c]):>16}" for c in columns), flush=True)
+
+        like, _ = timed(lambda: db.execute(text(
+            "SELECT COUNT(*) FROM journal_entries WHERE content LIKE :p OR strategies LIKE :p OR lessons_learned LIKE :p OR suggestion LIKE :p"
+        ), {"p": "%argument%"}).scalar(), 3)
+        summary["like_scan_ms"] = round(percentile(like, 50) * 1000, 1)
+        print(f"LIKE '%argument%' over every row: {summary['like_scan_ms']} ms")
+        db.close()
+        engine.dispose()
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"summary": summary, "queries": results, "config": vars(args)}, f, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Concurrent write/read benchmark for the SQLite storage profile.
+
+Writer threads insert journal entries (each with its rollup upserts, like
+POST /journal/entries) while reader threads page through the newest entries
+and read the mood series, like the dashboard. The same workload runs against
+a fresh database with the stock SQLite settings and with STORAGE_PRAGMAS:
+
+    python bench_storage.py --writers 4 --readers 8 --entries 500
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+import database
+import rollups
+from database import Base, JournalEntry, STORAGE_PRAGMAS
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def make_entry(i):
+    return JournalEntry(
+        content=f"benchmark entry {i} " * 20, reflection_date="01-01-2026", overall_mood="calm",
+        specific_emotions="Peaceful", strategies="breathing", intensity=i % 10, lessons_learned="pace",
+        template_name="General", sentiment_score=(i % 21 - 10) / 10, emotion=("calm", "stress", "joy")[i % 3],
+        suggestion="s" * 400, breathing_exercise="b", focus_music="m", counselor_info="c", quote="q", counselor_tips="[]",
+    )
+
+
+def run(profile, pragmas, writers, readers, entries):
+    path = os.path.join(tempfile.mkdtemp(prefix="aura-bench-"), "aura.db")
+    engine = database.make_engine(f"sqlite:///{path}", pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autoflush=False, bind=engine)
+
+    write_times, read_times, errors = [], [], []
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def writer(offset):
+        for i in range(offset, offset + entries):
+            db = Session()
+            started = time.perf_counter()
+            try:
+                db_entry = make_entry(i)
+                db.add(db_entry)
+                db.flush()
+                rollups.record(db, db_entry)
+                db.commit()
+                with lock:
+                    write_times.append(time.perf_counter() - started)
+            except Exception as e:
+                db.rollback()
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+            finally:
+                db.close()
+
+    def reader():
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+        while writing.is_set():
+            db = Session()
+            started = time.perf_counter()
+            try:
+                db.query(JournalEntry.id, JournalEntry.created_at, JournalEntry.emotion, JournalEntry.sentiment_score) \
+                    .order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc()).limit(100).all()
+                rollups.series(db, "hour", since)
+                with lock:
+                    read_times.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+            finally:
+                db.close()
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(n * entries,)) for n in range(writers)]
+    started = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writing.clear()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "profile": profile,
+        "seconds": round(elapsed, 3),
+        "writes_per_second": round(len(write_times) / elapsed, 1),
+        "reads_per_second": round(len(read_times) / elapsed, 1),
+        "write_p50_ms": round(percentile(write_times, 50) * 1000, 2),
+        "write_p95_ms": round(percentile(write_times, 95) * 1000, 2),
+        "read_p50_ms": round(percentile(read_times, 50) * 1000, 2),
+        "read_p95_ms": round(percentile(read_times, 95) * 1000, 2),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--entries", type=int, default=500, help="entries per writer")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        run("stock", {}, args.writers, args.readers, args.entries),
+        run("tuned", STORAGE_PRAGMAS, args.writers, args.readers, args.entries),
+    ]
+    columns = ["profile", "seconds", "writes_per_second", "reads_per_second", "write_p50_ms", "write_p95_ms", "read_p50_ms", "read_p95_ms", "errors"]
+    print("  ".join(f"{c:>18}" for c in columns))
+    for result in results:
+        print("  ".join(f"{result[c]:>18}" for c in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
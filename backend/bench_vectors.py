@@ -0,0 +1,115 @@
+"""Similar-entries index benchmark: appends and per-user top-k at millions of rows.
+
+Fills a throwaway VectorIndex with --rows random unit vectors spread over
+--users users (bulk appends, as `vectors.py --rebuild` does), then times
+single appends as the API makes them, per-user searches, and for comparison
+a brute-force search over the whole matrix. Also reports what embedding one
+entry costs.
+
+    python bench_vectors.py --rows 2000000 --users 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import vectors
+from bench_storage import percentile
+
+SAMPLE_TEXT = ("Had a big argument with my roommate about the noise again, then couldn't focus on the physics "
+               "problem set that's due tomorrow. Lesson: talk before I'm angry, not after.")
+
+
+def ms(times, pct):
+    return round(percentile(times, pct) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=vectors.VECTOR_DIM)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    phones = [f"555{u:07d}" for u in range(args.users)]
+    workdir = tempfile.mkdtemp(prefix="aura-bench-vectors-")
+    try:
+        index = vectors.VectorIndex(os.path.join(workdir, "aura.vectors"), args.dim)
+        started = time.perf_counter()
+        for start in range(0, args.rows, args.chunk_size):
+            n = min(args.chunk_size, args.rows - start)
+            block = rng.standard_normal((n, args.dim), dtype=np.float32)
+            block /= np.linalg.norm(block, axis=1, keepdims=True)
+            users = rng.integers(0, args.users, n)
+            index.add_many(list(range(start + 1, start + n + 1)), [phones[u] for u in users], block)
+        build_seconds = time.perf_counter() - started
+
+        embed_times = []
+        for _ in range(200):
+            started = time.perf_counter()
+            vectors.embed(SAMPLE_TEXT, args.dim)
+            embed_times.append(time.perf_counter() - started)
+
+        add_times = []
+        for i in range(200):
+            started = time.perf_counter()
+            index.add(args.rows + i + 1, phones[i % args.users], SAMPLE_TEXT)
+            add_times.append(time.perf_counter() - started)
+
+        # A fresh process view: load time is what a worker pays on its first search
+        started = time.perf_counter()
+        reader = vectors.VectorIndex(index.path, args.dim)
+        reader.stats()
+        load_seconds = time.perf_counter() - started
+
+        search_times = []
+        for _ in range(args.queries):
+            query = vectors.embed(SAMPLE_TEXT, args.dim)
+            phone = phones[rng.integers(args.users)]
+            started = time.perf_counter()
+            reader.similar(phone, query, args.k)
+            search_times.append(time.perf_counter() - started)
+
+        full_times = []
+        for _ in range(5):
+            started = time.perf_counter()
+            scores = reader.matrix[:reader.count] @ query
+            np.argpartition(-scores, args.k)[:args.k]
+            full_times.append(time.perf_counter() - started)
+
+        result = {
+            "rows": reader.count,
+            "users": args.users,
+            "dim": args.dim,
+            "rows_per_user": round(reader.count / args.users, 1),
+            "bulk_append_rows_per_second": round(args.rows / build_seconds),
+            "embed_p50_ms": ms(embed_times, 50),
+            "append_p50_ms": ms(add_times, 50),
+            "append_p95_ms": ms(add_times, 95),
+            "index_load_seconds": round(load_seconds, 2),
+            "user_search_p50_ms": ms(search_times, 50),
+            "user_search_p95_ms": ms(search_times, 95),
+            "user_search_p99_ms": ms(search_times, 99),
+            "all_rows_scan_p50_ms": ms(full_times, 50),
+            "file_mb": round(os.path.getsize(index.path + ".f32") / 2**20, 1),
+        }
+        print(json.dumps(result, indent=2))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"result": result, "config": vars(args)}, f, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Throughput and memory per worker count for serve.py.
+
+For each worker count, serve.py is started with the models preloaded in the
+master (the default) and, for comparison, with --no-preload so every worker
+loads its own. The visual endpoint is driven at a fixed concurrency, then each
+process's memory is read from /proc/<pid>/smaps_rollup (Linux):
+
+  rss  resident pages, shared ones counted in full by every process
+  uss  pages only that process has (what adding one more worker costs)
+  pss  shared pages split between the processes sharing them; summed over the
+       master and all workers it is the real footprint of the whole server
+
+The emotion model is the stub from inference.py with a dense layer of
+--weights-mb, so sharing and CPU scaling show up without TensorFlow; pass
+--emotion-backend deepface to measure the real model.
+
+    python bench_workers.py --workers 1,2,4 --weights-mb 256 --concurrency 32
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench_api import BACKEND_DIR, drive, scenarios, scratch_dir, server_env, stop, synthetic_image, synthetic_wav, wait_ready
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid):
+    """rss, pss and uss of one process in MiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def wait_all_ready(base_url, server, workers, timeout=180):
+    # Connections land on whichever worker accepts first, so keep asking until enough
+    # answers in a row say ready for every worker to have been hit
+    wait_ready(base_url + "/readyz", server, timeout)
+    deadline, streak = time.monotonic() + timeout, 0
+    while streak < workers * 4:
+        if time.monotonic() > deadline:
+            raise RuntimeError("workers did not all become ready")
+        streak = streak + 1 if httpx.get(base_url + "/readyz", timeout=5).status_code == 200 else 0
+
+
+def run(args, workers, preload, make_request):
+    root, workdir = scratch_dir("aura-bench-workers-")
+    env = server_env(args, workdir)
+    env["AURA_FAKE_EMOTION_WEIGHTS_MB"] = str(args.weights_mb)
+    command = [sys.executable, os.path.join(BACKEND_DIR, "serve.py"), "--workers", str(workers), "--host", "127.0.0.1",
+               "--port", str(args.port), "--log-level", "warning"]
+    if args.threads:
+        command += ["--threads", str(args.threads)]
+    if not preload:
+        command.append("--no-preload")
+    log = open(os.path.join(root, "server.log"), "w")
+    server = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        wait_all_ready(base_url, server, workers)
+        result = asyncio.run(drive(base_url, make_request, args.requests, args.concurrency, args.warmup))
+        pids = children(server.pid)
+        worker_memory = [memory_mb(pid) for pid in pids]
+        master_memory = memory_mb(server.pid)
+    finally:
+        stop(server)
+        log.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+    def mean(key):
+        return round(sum(m[key] for m in worker_memory) / len(worker_memory), 1) if worker_memory else 0.0
+
+    result.update({
+        "mode": "preload" if preload else "no-preload",
+        "workers": workers,
+        "rss_per_worker_mb": mean("rss"),
+        "uss_per_worker_mb": mean("uss"),
+        "pss_per_worker_mb": mean("pss"),
+        "total_pss_mb": round(master_memory["pss"] + sum(m["pss"] for m in worker_memory), 1),
+    })
+    return result
+
+
+COLUMNS = ["mode", "workers", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors",
+           "rss_per_worker_mb", "uss_per_worker_mb", "pss_per_worker_mb", "total_pss_mb"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--modes", default="preload,no-preload")
+    parser.add_argument("--endpoint", default="analyze_visual", help="bench_api.py scenario to drive")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--threads", type=int, help="compute threads per worker (serve.py default: cores / workers)")
+    parser.add_argument("--weights-mb", type=float, default=256, help="size of the stub model's weights")
+    parser.add_argument("--emotion-backend", choices=["fake", "deepface"], default="fake")
+    parser.add_argument("--emotion-batch-ms", type=float, default=0, help="extra sleep per stub forward pass")
+    parser.add_argument("--emotion-frame-ms", type=float, default=0)
+    parser.add_argument("--image", help="JPEG to send instead of a synthetic frame")
+    parser.add_argument("--port", type=int, default=8040)
+    parser.add_argument("--gemini-port", type=int, default=8041)
+    parser.add_argument("--out", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    make_request = scenarios(synthetic_image(args.image), synthetic_wav())[args.endpoint]
+    modes = args.modes.split(",")
+    print(f"{os.cpu_count()} cores, {args.endpoint}, {args.concurrency} concurrent, {args.weights_mb:g} MB stub weights")
+    print("  ".join(f"{c:>17}" for c in COLUMNS), flush=True)
+    gemini = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, "fake_gemini.py"), "--port", str(args.gemini_port)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = []
+    try:
+        wait_ready(f"http://127.0.0.1:{args.gemini_port}/stats", gemini)
+        for workers in (int(w) for w in args.workers.split(",")):
+            for mode in modes:
+                result = run(args, workers, mode == "preload", make_request)
+                print("  ".join(f"{result[c]:>17}" for c in COLUMNS), flush=True)
+                results.append(result)
+    finally:
+        stop(gemini)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"created": datetime.datetime.now().isoformat(timespec="seconds"), "cores": os.cpu_count(),
+                       "config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Two-level cache for Gemini counselling responses.
+
+An in-memory LRU sits in front of a small SQLite file so hits survive
+restarts and are shared between workers. Entries expire after a TTL and the
+disk table is trimmed to a maximum row count (least recently hit first).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_ENABLED = os.getenv("AURA_CACHE_ENABLED", "1") == "1"
+CACHE_PATH = os.getenv("AURA_CACHE_PATH", "./aura_cache.db")
+CACHE_TTL = float(os.getenv("AURA_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MEMORY_ITEMS = int(os.getenv("AURA_CACHE_MEMORY_ITEMS", 1024))
+CACHE_MAX_ROWS = int(os.getenv("AURA_CACHE_MAX_ROWS", 50000))
+PRUNE_EVERY = 200  # disk writes between TTL/size sweeps
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", (text or "").lower())).strip()
+
+
+def intensity_bucket(intensity):
+    if intensity <= 3:
+        return "low"
+    if intensity <= 6:
+        return "medium"
+    return "high"
+
+
+def age_bucket(age):
+    for limit, label in ((17, "under-18"), (24, "18-24"), (34, "25-34"), (54, "35-54")):
+        if age <= limit:
+            return label
+    return "55+"
+
+
+def cache_key(entry):
+    """Stable key over the prompt inputs that actually change Gemini's answer."""
+    parts = {
+        "template": entry.template_name,
+        "mood": entry.overall_mood.lower(),
+        "emotions": sorted(e.lower() for e in entry.specific_emotions),
+        "intensity": intensity_bucket(entry.intensity),
+        "text": [normalize_text(entry.triggers), normalize_text(entry.strategies), normalize_text(entry.lessons)],
+        "age": age_bucket(entry.user_age),
+        "gender": entry.user_gender.lower(),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, memory_items=CACHE_MEMORY_ITEMS, max_rows=CACHE_MAX_ROWS):
+        self.path = path
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self.max_rows = max_rows
+        self.memory = OrderedDict()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_hit REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_last_hit ON response_cache (last_hit)")
+        return self._conn
+
+    def _remember(self, key, expires_at, value):
+        self.memory[key] = (expires_at, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self.memory.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self.memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return item[1]
+                del self.memory[key]
+
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value = json.loads(row[0])
+            self.conn.execute("UPDATE response_cache SET last_hit = ? WHERE key = ?", (now, key))
+            self._remember(key, row[1], value)
+            self.hits_disk += 1
+            return value
+
+    def put(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_hit) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now))
+            self.writes += 1
+            if self.writes % PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now):
+        self.conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        self.conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY last_hit DESC LIMIT -1 OFFSET ?)", (self.max_rows,))
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self.conn.execute("DELETE FROM response_cache")
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        with self._lock:
+            rows = self.conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        return {
+            "enabled": CACHE_ENABLED,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self.memory),
+            "disk_rows": rows,
+            "ttl_seconds": self.ttl,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Throwaway database and cache files; set before any test imports main (and with it database)
+_workdir = tempfile.mkdtemp(prefix="aura-test-")
+os.environ["AURA_DATABASE_URL"] = f"sqlite:///{_workdir}/aura.db"
+os.environ["AURA_CACHE_PATH"] = os.path.join(_workdir, "aura_cache.db")
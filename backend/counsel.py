@@ -0,0 +1,188 @@
+"""Prompt construction and deterministic counselling defaults for journal entries.
+
+The defaults (mood templates, Aura Shield crisis override and keyword-based
+contextual overrides) are what a user gets whenever Gemini is unavailable,
+so every enrichment path starts from default_analysis().
+"""
+import metrics
+from keywords import lexicon
+
+TEMPLATE_STYLES = {
+    "The Daily Pulse": "Focus on clarity and quick, actionable insights. Be concise, energetic, and help the user organize their scattered thoughts.",
+    "Anxiety Anchor": "Use extremely calming, grounding language. Focus on physical sensations (feet on floor, breath) and immediate relief. Be slow, gentle, and reassuring.",
+    "Gratitude Horizon": "Focus on appreciation and shifting perspective to abundance. Be warm, celebrating, and confirm the positive impact of their gratitude.",
+    "The Academic Edge": "Focus on productivity, focus, and overcoming procrastination or burnout. Be structured, motivating, and coach-like. Use terms like 'sprint', 'focus', 'goal'.",
+    "Nightfall Peace": "Focus on winding down, letting go of the day, and relaxation. Be whisper-quiet, soothing, and use sleep-inducing language.",
+    "Inner Compass": "Focus on values, long-term vision, and self-alignment. Be philosophical, deep, and reflective. Ask profound questions.",
+    "Morning Spark": "Focus on setting intentions, energy, and optimism. Be bright, awakening, and action-oriented for the day ahead.",
+    "The Social Web": "Focus on boundaries, communication, and empathy. Be relational and understanding. Help them navigate complex human dynanmics.",
+    "The Clearing": "Focus on unconditional acceptance and listening. Be open, spacious, and non-judgmental. Allow them to vent without immediately fixing it."
+}
+
+DEFAULT_STYLE = "Provide empathetic, adaptive counseling based on the user's emotional state."
+
+EMERGENCY_CONTACTS = [
+    {"name": "National Crisis Hotline", "phone": "988", "desc": "24/7 confidential support for people in distress."},
+    {"name": "Emergency Services", "phone": "100", "desc": "Immediate police or ambulance intervention."},
+    {"name": "Vandrevala Foundation", "phone": "9999666555", "desc": "Mental health support and crisis counseling."},
+    {"name": "AASRA", "phone": "9820466726", "desc": "24/7 Suicide Prevention Helpline."}
+]
+
+
+def build_prompt(entry, history=""):
+    """`history` is the user's rolling summary from summaries.context(), already cut to its token budget."""
+    combined_text = f"Template: {entry.template_name}. Triggers: {entry.triggers}. Strategies: {entry.strategies}. Lessons: {entry.lessons}"
+    prompt = f"""
+    You are Aura, an elite empathetic AI counselor. The user is {entry.user_age} years old and identifies as {entry.user_gender}.
+    
+    Current Template Context: "{entry.template_name}"
+    Specific Counseling Style for this Template:
+    {TEMPLATE_STYLES.get(entry.template_name, DEFAULT_STYLE)}
+    
+    CRITICAL INSTRUCTION: Analyze the user's input sentence-by-sentence. Address specific triggers, emotions, and thoughts mentioned. 
+    AVOID repetitive or generic comfort. Every response MUST be uniquely tailored to the specific details provided.
+    
+    Emotional Reasoning Phase:
+    1. Identify the core subtext of EACH sentence in: "{combined_text}"
+    2. Consider how a {entry.user_age}-year-old {entry.user_gender} feels about these specific triggers.
+    3. Determine the most helpful emotional shift for this specific context ({entry.template_name}).
+    
+    User State:
+    - Primary Mood: {entry.overall_mood}
+    - Specific Emotions: {", ".join(entry.specific_emotions)}
+    - Intensity: {entry.intensity}/10
+    {history_section(history)}
+    Return ONLY a JSON object:
+    {{
+        "sentiment": float (-1 to 1),
+        "emotion": "stress" | "anxiety" | "sad" | "happy" | "calm" | "focus",
+        "suggestion": "2-3 detailed, empathetic paragraphs. Use newlines (\\n) between paragraphs. Reference at least 2 specific details from the user's input to show you listened.",
+        "breathing_exercise": "A unique step-by-step technique tailored to their specific intensity.",
+        "focus_music": "Specifically justified music choice (e.g., 'Binaural beats at 40Hz to help with the exam focus you mentioned').",
+        "counselor_info": "Warm, specific guidance on next steps.",
+        "quote": "A powerful, non-cliché quote matching their specific struggle.",
+        "counselor_tips": ["Unique actionable tip 1", "Unique actionable tip 2", "Unique actionable tip 3"]
+    }}
+    """
+    return prompt
+
+
+def history_section(history):
+    if not history:
+        return ""
+    indented = "\n    ".join(history.splitlines())
+    return f"""
+    What you know from their earlier entries (use it for continuity; don't recite it back):
+    {indented}
+    """
+
+
+def default_analysis(entry):
+    # --- Aura Shield: Critical Safety Check ---
+    # One pass over the text finds crisis, academic and social terms (see lexicon.json)
+    combined_text = f"{entry.triggers} {entry.strategies} {entry.lessons}"
+    with metrics.span("keyword_scan"):
+        matches = lexicon.categories(combined_text)
+
+    is_critical = "crisis" in matches
+    
+    # Deeply Differentiated Mood Defaults
+    mood_key = entry.overall_mood.lower()
+    
+    if mood_key == "happy":
+        analysis = {
+            "sentiment": 0.8, "emotion": "happy",
+            "suggestion": "Your positivity is radiant! These moments of joy are essential for resilience. Let's amplify this feeling and perhaps set an intention to carry this light into the rest of your week.",
+            "breathing_exercise": "The Joyful Expansion: Take 3 quick, deep 'sip' inhales through your nose, then one long, audible 'Ahhh' exhale through your mouth.",
+            "focus_music": "Sunny Acoustic Vibes or Tropical Upbeat Instrumentals.",
+            "counselor_info": "Savoring joy is a vital mental health skill. You're doing great!",
+            "quote": "Joy is the simplest form of gratitude.",
+            "counselor_tips": ["Write down the exact trigger of this joy", "Share a compliment with someone", "Take a celebratory 5-minute dance break"]
+        }
+    elif mood_key == "sad":
+        analysis = {
+            "sentiment": -0.5, "emotion": "sad",
+            "suggestion": "I'm so sorry you're feeling this weight. It's completely valid to have low energy and feel blue. Be gentle with yourself tonight; you don't have to 'fix' this immediately.",
+            "breathing_exercise": "Heart-Centered Sighing: Place a hand on your heart. Inhale deeply, and let out a long, heavy sigh. Repeat until your shoulders drop.",
+            "focus_music": "Compassionate Cello or Soft Piano Melodies for processing.",
+            "counselor_info": "Gentleness is your strength right now. You are allowed to take up space with your sadness.",
+            "quote": "The soul would have no rainbow had the eyes no tears.",
+            "counselor_tips": ["Wrap yourself in a warm blanket", "Drink a glass of water slowly", "Listen to one song that validates your feelings"]
+        }
+    elif mood_key == "anxious":
+        analysis = {
+            "sentiment": -0.4, "emotion": "anxiety",
+            "suggestion": "When the mind races, we must anchor the body. You are safe in this moment. The future hasn't happened yet, and you have survived 100% of your hardest days.",
+            "breathing_exercise": "4-7-8 Internal Anchor: Inhale for 4s, Hold for 7s (the reset), Exhale slowly for 8s through pursed lips.",
+            "focus_music": "Weightless Ambient (Marconi Union style) or 528Hz Solfeggio frequencies.",
+            "counselor_info": "Anxiety is often just a smoke detector that's a bit too sensitive. You are safe.",
+            "quote": "No amount of anxiety makes any difference to anything that is going to happen.",
+            "counselor_tips": ["5-4-3-2-1 Sensory Grounding", "Splash cold water on your face", "Limit caffeine for the next few hours"]
+        }
+    elif mood_key == "stressed":
+        analysis = {
+            "sentiment": -0.3, "emotion": "stress",
+            "suggestion": "The load feels heavy because you're doing important work. Let's move from 'overwhelmed' to 'one small step'. What is the absolute simplest thing you can do next?",
+            "breathing_exercise": "Tactical Box Breathing: Inhale 4, Hold 4, Exhale 4, Hold 4. This is used by professionals to regain clarity under pressure.",
+            "focus_music": "Lo-fi Study Beats (60 BPM) or Alpha Wave Binaural Beats.",
+            "counselor_info": "Stress is energy. Let's redirect it into manageable micro-tasks.",
+            "quote": "It's not the load that breaks you, it's the way you carry it.",
+            "counselor_tips": ["Clear your immediate workspace", "Write a 3-item To-Do list", "Take 2 minutes to stretch your neck and back"]
+        }
+    elif mood_key == "focus":
+        analysis = {
+            "sentiment": 0.4, "emotion": "focus",
+            "suggestion": "You're in the zone! This state of flow is where your best version emerges. Let's protect this clarity and ensure you have everything you need to keep going.",
+            "breathing_exercise": "Cognitive Clarity Breath: Quick, sharp inhales through the nose followed by powerful, focused exhales to oxygenate your brain.",
+            "focus_music": "40Hz Gamma Binaural Beats or Deep Focus Techno (Minimal).",
+            "counselor_info": "Flow is a peak human experience. Guard your focus from distractions.",
+            "quote": "Focus is a matter of deciding what things you're not going to do.",
+            "counselor_tips": ["Put your phone in another room", "Set a 25-minute Pomodoro timer", "Clear any open tabs you don't need"]
+        }
+    elif mood_key == "calm":
+        analysis = {
+            "sentiment": 0.5, "emotion": "calm",
+            "suggestion": "This serenity is your natural state. Carry this peace with you; it is a reservoir you can return to whenever the world feels chaotic.",
+            "breathing_exercise": "Ocean Breath (Ujjayi): Constrict the back of your throat slightly, making a soft 'ocean' sound as you breathe in and out slowly.",
+            "focus_music": "Zen Garden Ambience or Nature Sounds (Birds and Streams).",
+            "counselor_info": "Peace is not the absence of trouble, but the presence of stillness.",
+            "quote": "Within you, there is a stillness and a sanctuary.",
+            "counselor_tips": ["Observe your breath for 10 cycles", "Note one thing that brought you peace", "Walk slowly and feel your feet on the ground"]
+        }
+    else:
+        # Generic fallback if mood is unknown
+        analysis = {
+            "sentiment": 0.0, "emotion": "neutral",
+            "suggestion": f"I'm listening closely to your reflection on feeling {entry.overall_mood}. Let's explore these feelings together and find a path forward.",
+            "breathing_exercise": "Simple Mindful Breathing: Just notice the inhale and notice the exhale.",
+            "focus_music": "Neutral lo-fi piano.",
+            "counselor_info": "Your reflections are the first step to understanding.",
+            "quote": "To know thyself is the beginning of wisdom.",
+            "counselor_tips": ["Close your eyes for 30s", "Lower your gaze", "Take a slow sip of tea"]
+        }
+
+    # Apply Aura Shield Override if Critical
+    if is_critical:
+        analysis["sentiment"] = -1.0
+        analysis["is_critical"] = True
+        analysis["emergency_contacts"] = EMERGENCY_CONTACTS
+        analysis["suggestion"] = "I hear how much pain you are in, and I want you to know that you are not alone. Your life has immense value, and there is support available right now to help you through this peak moment of darkness. Please reach out to one of the professionals below immediately—they are trained to listen and help you find a way forward safely."
+        analysis["breathing_exercise"] = "The Anchor Breath (Immediate Grounding): Feel your feet flat on the floor. Inhale for 5 seconds, hold for 2, and exhale for 7. Focus purely on the sensation of your feet on the ground. Repeat and reach for help."
+        analysis["quote"] = "Your story isn't over yet; the world still needs the light that only you can bring."
+        analysis["counselor_tips"] = ["Call an emergency contact immediately", "Distance yourself from any harmful objects", "Stay on the phone with a trusted person until help arrives"]
+
+    # Keyword-based Contextual Overrides
+    # Only override with academic stress if the user isn't already happy
+    if mood_key not in ["happy", "calm", "focus"]:
+        if "academic" in matches:
+            analysis["suggestion"] = f"Academic pressure can definitely weigh on you. Remember that your worth is not defined by grades or {matches['academic'][0]}. You have the tools to handle this."
+            analysis["emotion"] = "stress"
+            analysis["breathing_exercise"] = "Tactical Focus: Inhale 4s, Hold 2s, Exhale 6s."
+    
+    if "social" in matches:
+        if mood_key != "happy":
+            analysis["suggestion"] = "Social interactions and feelings of isolation can be deeply challenging. Your need for connection is valid, and it's okay to feel this way."
+            analysis["emotion"] = "sad"
+            analysis["breathing_exercise"] = "Heart-Centered Sigh: Inhale joy, exhale the weight."
+
+    return analysis
@@ -1,16 +1,66 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Index, PrimaryKeyConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import datetime
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./aura.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("AURA_DATABASE_URL", "sqlite:///./aura.db")
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+DB_POOL_SIZE = int(os.getenv("AURA_DB_POOL_SIZE", 8))
+DB_MAX_OVERFLOW = int(os.getenv("AURA_DB_MAX_OVERFLOW", 8))
+DB_POOL_TIMEOUT = float(os.getenv("AURA_DB_POOL_TIMEOUT", 10))
+
+# Applied to every new SQLite connection. WAL lets dashboard reads run while an entry is being written;
+# synchronous=NORMAL is durable across application crashes (a power cut can lose the last commits).
+STORAGE_PRAGMAS = {
+    "journal_mode": os.getenv("AURA_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("AURA_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("AURA_SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "cache_size": -1024 * int(os.getenv("AURA_SQLITE_CACHE_MB", 64)), # negative = KiB rather than pages
+    "mmap_size": 1024 * 1024 * int(os.getenv("AURA_SQLITE_MMAP_MB", 256)),
+    "temp_store": "MEMORY",
+}
+
+def apply_pragmas(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def make_engine(url=SQLALCHEMY_DATABASE_URL, pragmas=STORAGE_PRAGMAS):
+    engine = create_engine(
+        url, connect_args={"check_same_thread": False},
+        pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT
+    )
+    apply_pragmas(engine, pragmas)
+    return engine
+
+def make_async_engine(url=ASYNC_DATABASE_URL, pragmas=STORAGE_PRAGMAS):
+    engine = create_async_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# For async endpoints: queries run on aiosqlite's thread instead of blocking the event loop
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def _reset_pools_after_fork():
+    # A worker forked by serve.py must open its own connections, never reuse the master's;
+    # close=False leaves the master's connections alone
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
 Base = declarative_base()
 
 class JournalEntry(Base):
@@ -37,6 +87,11 @@ class JournalEntry(Base):
     counselor_info = Column(Text)
     quote = Column(Text)
     counselor_tips = Column(Text) # Stored as JSON string or text
+    enrichment_status = Column(String, default="complete") # pending -> complete | failed when enriched in the background
+    analysis_tier = Column(String) # which tier produced the analysis: local, cache, gemini or default
+
+    # Newest-first listing and its (created_at, id) cursor are served straight from this index
+    __table_args__ = (Index("ix_journal_entries_created_at_id", "created_at", "id"),)
 
 class User(Base):
     __tablename__ = "users"
@@ -46,4 +101,82 @@ class User(Base):
     phone_number = Column(String)
     is_anonymous = Column(Integer, default=0) # 1 for anonymous users
 
+class EnrichmentJob(Base):
+    __tablename__ = "enrichment_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, index=True)
+    payload = Column(Text) # EntryCreate as JSON
+    status = Column(String, default="queued", index=True) # queued, running, done, failed
+    attempts = Column(Integer, default=0)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class MoodRollup(Base):
+    __tablename__ = "mood_rollups"
+    bucket = Column(String) # hour or day
+    bucket_start = Column(String) # "YYYY-MM-DD HH:00" or "YYYY-MM-DD", UTC
+    count = Column(Integer)
+    sentiment_sum = Column(Float)
+    sentiment_min = Column(Float)
+    sentiment_max = Column(Float)
+    emotions = Column(Text) # JSON object: emotion -> count
+
+    __table_args__ = (PrimaryKeyConstraint("bucket", "bucket_start"),)
+
+class UserSummary(Base):
+    __tablename__ = "user_summaries"
+    user_phone = Column(String, primary_key=True)
+    entry_count = Column(Integer, default=0)
+    state = Column(Text) # JSON: mood trajectory, recurring triggers, strategies that helped (see summaries.py)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Columns added after the first release; create_all() won't add them to an existing aura.db
+ADDED_COLUMNS = {
+    "journal_entries": [("enrichment_status", "VARCHAR DEFAULT 'complete'"), ("analysis_tier", "VARCHAR")],
+}
+
+# Full-text index over the entry text (see search.py). External content: the text is stored once, in
+# journal_entries, and the triggers keep the index in step with every insert, update and delete.
+SEARCH_COLUMNS = ("content", "strategies", "lessons_learned", "suggestion")
+# user_phone is indexed too, so a per-user search intersects two doclists instead of ranking every user's matches
+_cols = ", ".join(SEARCH_COLUMNS + ("user_phone",))
+_new = ", ".join(f"new.{c}" for c in _cols.split(", "))
+_old = ", ".join(f"old.{c}" for c in _cols.split(", "))
+SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts USING fts5({_cols}, content='journal_entries', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS journal_fts_ai AFTER INSERT ON journal_entries BEGIN "
+    f"INSERT INTO journal_fts(rowid, {_cols}) VALUES (new.id, {_new}); END",
+    f"CREATE TRIGGER IF NOT EXISTS journal_fts_ad AFTER DELETE ON journal_entries BEGIN "
+    f"INSERT INTO journal_fts(journal_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old}); END",
+    # Only edits to the indexed text touch the index; re-scoring sentiment doesn't
+    f"CREATE TRIGGER IF NOT EXISTS journal_fts_au AFTER UPDATE OF {_cols} ON journal_entries BEGIN "
+    f"INSERT INTO journal_fts(journal_fts, rowid, {_cols}) VALUES ('delete', old.id, {_old}); "
+    f"INSERT INTO journal_fts(rowid, {_cols}) VALUES (new.id, {_new}); END",
+]
+
+def install_search(conn):
+    """Create the FTS index and its triggers if missing; a new index is filled from the existing entries."""
+    exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'journal_fts'").first()
+    for ddl in SEARCH_DDL:
+        conn.exec_driver_sql(ddl)
+    if not exists:
+        conn.exec_driver_sql("INSERT INTO journal_fts(journal_fts) VALUES ('rebuild')")
+
+def migrate():
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+        # Likewise for indexes declared on tables that already existed
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        install_search(conn)
+
 Base.metadata.create_all(bind=engine)
+migrate()
@@ -0,0 +1,230 @@
+"""Bulk export and import of journal entries in constant memory.
+
+Rows are read by id in fixed-size chunks and written out one chunk at a time
+as NDJSON, Parquet or Arrow IPC (the columnar formats need pyarrow). Imports
+go the other way in executemany batches. The API streams NDJSON and Arrow
+from GET /journal/export and accepts NDJSON at POST /journal/import; the CLI
+covers all three formats:
+
+    python dataio.py export entries.parquet
+    python dataio.py export - --format ndjson > entries.ndjson
+    python dataio.py import entries.ndjson
+    python dataio.py import seed.parquet --keep-ids
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from sqlalchemy import DateTime, Float, Integer
+
+import rollups
+import summaries
+from database import JournalEntry, SessionLocal, engine
+
+COLUMNS = [column.name for column in JournalEntry.__table__.columns]
+CHUNK_SIZE = 5000
+FORMATS = ("ndjson", "parquet", "arrow")
+
+
+def dumps(row):
+    if orjson is not None:
+        return orjson.dumps(row)
+    return json.dumps(row).encode()
+
+
+def loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def iter_chunks(chunk_size=CHUNK_SIZE, after_id=0):
+    """Lists of row dicts in id order; created_at stays the string SQLite stores."""
+    select = f"SELECT {', '.join(COLUMNS)} FROM journal_entries WHERE id > ? ORDER BY id LIMIT ?"
+    while True:
+        # A connection per chunk, so a long export never pins one read snapshot (and the WAL) open
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(select, (after_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        after_id = rows[-1][0]
+        yield [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def ndjson_chunks(chunk_size=CHUNK_SIZE):
+    for chunk in iter_chunks(chunk_size):
+        yield b"".join(dumps(row) + b"\n" for row in chunk)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet/Arrow export needs pyarrow (pip install pyarrow)")
+
+
+def arrow_schema():
+    _require_pyarrow()
+    types = ((Integer, pa.int64()), (Float, pa.float64()), (DateTime, pa.timestamp("us")))
+    return pa.schema([
+        (column.name, next((t for base, t in types if isinstance(column.type, base)), pa.string()))
+        for column in JournalEntry.__table__.columns
+    ])
+
+
+def to_batch(chunk, schema):
+    columns = {name: [row[name] for row in chunk] for name in COLUMNS}
+    columns["created_at"] = [datetime.datetime.fromisoformat(v) if isinstance(v, str) else v for v in columns["created_at"]]
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def arrow_chunks(chunk_size=CHUNK_SIZE):
+    """Arrow IPC stream bytes, flushed after every record batch."""
+    schema = arrow_schema()
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+    for chunk in iter_chunks(chunk_size):
+        writer.write_batch(to_batch(chunk, schema))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+def export(path, fmt, chunk_size=CHUNK_SIZE):
+    count = 0
+    if fmt == "ndjson":
+        out = sys.stdout.buffer if path == "-" else open(path, "wb")
+        try:
+            for chunk in iter_chunks(chunk_size):
+                out.write(b"".join(dumps(row) + b"\n" for row in chunk))
+                count += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        return count
+
+    schema = arrow_schema()
+    writer = pq.ParquetWriter(path, schema) if fmt == "parquet" else pa.ipc.new_file(path, schema)
+    try:
+        for chunk in iter_chunks(chunk_size):
+            writer.write_batch(to_batch(chunk, schema))
+            count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+def read_ndjson(lines, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(loads(line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_columnar(path, fmt, chunk_size=CHUNK_SIZE):
+    _require_pyarrow()
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        yield batch.to_pylist()
+
+
+def insert_chunk(conn, chunk, keep_ids=False):
+    """executemany over the columns the rows carry; ids are reassigned unless keep_ids.
+
+    executemany bypasses the ORM's Python-side defaults, so created_at (now) and enrichment_status
+    ("complete") are filled in here for rows that leave them out: the listing cursor, the rollups
+    and the summaries all rely on them.
+    """
+    present = set().union(*chunk) | {"created_at", "enrichment_status"}
+    columns = [c for c in COLUMNS if c in present and (keep_ids or c != "id")]
+    created_at, status = columns.index("created_at"), columns.index("enrichment_status")
+    now = datetime.datetime.utcnow()
+    rows = []
+    for row in chunk:
+        values = [row.get(c) for c in columns]
+        if values[status] is None:
+            values[status] = "complete"
+        stamp = values[created_at] or now
+        if isinstance(stamp, str):
+            stamp = datetime.datetime.fromisoformat(stamp)
+        # Same text format SQLAlchemy writes, so range queries and rollups keep working
+        values[created_at] = stamp.strftime("%Y-%m-%d %H:%M:%S.%f")
+        rows.append(tuple(values))
+    conn.exec_driver_sql(
+        f"INSERT INTO journal_entries ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", rows)
+    return len(rows)
+
+
+def import_chunks(chunks, keep_ids=False):
+    count = 0
+    for chunk in chunks:
+        with engine.begin() as conn: # one transaction per chunk
+            count += insert_chunk(conn, chunk, keep_ids)
+    return count
+
+
+def rebuild_aggregates():
+    """Mood rollups and user summaries, after entries were added outside the API's write path."""
+    db = SessionLocal()
+    try:
+        rollups.rebuild(db) # both commit as they go
+        summaries.rebuild(db)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="write every entry to a file ('-' for stdout, NDJSON only)")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--format", choices=FORMATS)
+    import_cmd = sub.add_parser("import", help="append entries from an NDJSON, Parquet or Arrow file")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--format", choices=FORMATS)
+    import_cmd.add_argument("--keep-ids", action="store_true", help="insert the file's ids instead of new ones")
+    import_cmd.add_argument("--skip-rollups", action="store_true", help="don't rebuild mood rollups and user summaries")
+    for cmd in (export_cmd, import_cmd):
+        cmd.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(os.path.splitext(args.path)[1], "ndjson")
+    started = time.perf_counter()
+    if args.command == "export":
+        count = export(args.path, fmt, args.chunk_size)
+    else:
+        if fmt == "ndjson":
+            with open(args.path, "rb") as f:
+                count = import_chunks(read_ndjson(f, args.chunk_size), args.keep_ids)
+        else:
+            count = import_chunks(read_columnar(args.path, fmt, args.chunk_size), args.keep_ids)
+        if not args.skip_rollups:
+            rebuild_aggregates()
+    elapsed = time.perf_counter() - started
+    print(f"{args.command}ed {count} entries ({fmt}) in {elapsed:.1f}s, {count / elapsed if elapsed else 0:,.0f} rows/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
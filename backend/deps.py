@@ -0,0 +1,48 @@
+"""Lazily imported heavy dependencies.
+
+OpenCV, DeepFace (and TensorFlow behind it), librosa, soundfile and the
+Gemini SDK take seconds to import between them, and the journal and stats
+endpoints need none of them. Code asks this registry for a module right
+before using it: the first load() pays the import (timed, and exported as
+aura_import_seconds{module=...}); later calls are a dict lookup. available()
+answers from the import system's metadata without importing anything.
+"""
+import importlib
+import importlib.util
+import threading
+import time
+
+import metrics
+
+_modules = {}  # module name -> module, or None if it is not installed
+_import_seconds = {}
+_lock = threading.Lock()
+
+
+def available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load(name):
+    """The imported module, or None when it is not installed."""
+    if name in _modules:
+        return _modules[name]
+    with _lock:
+        if name not in _modules:
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(name)
+            except ImportError:
+                module = None
+            seconds = time.perf_counter() - started
+            _import_seconds[name] = round(seconds, 3)
+            metrics.gauge("aura_import_seconds", "Seconds spent importing each lazily loaded dependency", module=name).set(seconds)
+            _modules[name] = module
+    return _modules[name]
+
+
+def import_times():
+    return dict(_import_seconds)
@@ -0,0 +1,83 @@
+"""Local stand-in for the Gemini REST API, for testing and load runs.
+
+Run it next to the real backend and point Aura at it:
+
+    python fake_gemini.py --port 8001 --latency-ms 800 --failure-rate 0.2
+    GEMINI_API_ENDPOINT=http://localhost:8001 python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Gemini")
+app.state.latency_ms = 0
+app.state.jitter_ms = 0
+app.state.failure_rate = 0.0
+app.state.failure_status = 429
+app.state.calls = 0
+
+CANNED_ANALYSIS = {
+    "sentiment": -0.2,
+    "emotion": "stress",
+    "suggestion": "It sounds like a lot has landed on you at once, and that you are still finding ways to keep going.\n\nPick the single smallest next step and let the rest wait until it is done.",
+    "breathing_exercise": "Box breathing: inhale 4, hold 4, exhale 4, hold 4. Repeat four times.",
+    "focus_music": "Lo-fi beats at 60 BPM to keep the pace steady without pulling your attention.",
+    "counselor_info": "Break the load into three concrete items and schedule only the first.",
+    "quote": "Slow is smooth, and smooth is fast.",
+    "counselor_tips": ["Write the next step on a sticky note", "Silence notifications for 25 minutes", "Stand up and stretch between tasks"]
+}
+
+
+def _candidate(text, finished=True):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+async def _simulate_upstream():
+    app.state.calls += 1
+    delay = app.state.latency_ms + random.uniform(0, app.state.jitter_ms)
+    await asyncio.sleep(delay / 1000.0)
+    if random.random() < app.state.failure_rate:
+        status = app.state.failure_status
+        return JSONResponse(status_code=status, content={"error": {"code": status, "message": f"{status} simulated upstream failure", "status": "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"}})
+    return None
+
+
+@app.post("/v1beta/models/{model_action:path}")
+async def generate(model_action: str):
+    failure = await _simulate_upstream()
+    if failure is not None:
+        return failure
+    text = "```json\n" + json.dumps(CANNED_ANALYSIS) + "\n```"
+    if model_action.endswith(":streamGenerateContent"):
+        # REST streaming returns a JSON array of partial responses
+        pieces = [text[i:i + 80] for i in range(0, len(text), 80)]
+        return JSONResponse([_candidate(p, finished=(i == len(pieces) - 1)) for i, p in enumerate(pieces)])
+    return _candidate(text)
+
+
+@app.get("/stats")
+def stats():
+    return {"calls": app.state.calls}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=429)
+    args = parser.parse_args()
+    app.state.latency_ms = args.latency_ms
+    app.state.jitter_ms = args.jitter_ms
+    app.state.failure_rate = args.failure_rate
+    app.state.failure_status = args.failure_status
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
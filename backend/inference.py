@@ -0,0 +1,218 @@
+"""Warm process pool for facial emotion inference.
+
+DeepFace (and TensorFlow behind it) is loaded once per worker at startup, so
+the request handlers only ship preprocessed 48x48 face crops across (see
+preprocess.py) and await the result instead of running the model on the
+event loop. Crops that arrive close together are micro-batched into a single
+forward pass of the emotion model.
+
+With AURA_INFERENCE_MODE=inline the model runs on threads of the API process
+itself instead. serve.py uses that mode: it builds the model once in its
+master process and forks the API workers, which share the weights
+copy-on-write.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+
+# Defaults scale with the machine; override per deployment in .env
+POOL_SIZE = int(os.getenv("AURA_INFERENCE_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+QUEUE_DEPTH = int(os.getenv("AURA_INFERENCE_QUEUE_DEPTH", 32))
+BATCH_MAX_SIZE = int(os.getenv("AURA_BATCH_MAX_SIZE", 16))
+BATCH_MAX_WAIT_MS = float(os.getenv("AURA_BATCH_MAX_WAIT_MS", 15))
+# "fake" swaps DeepFace for a stub with fixed latency, for load tests on machines without TensorFlow
+EMOTION_BACKEND = os.getenv("AURA_EMOTION_BACKEND", "deepface")
+FAKE_EMOTION_BATCH_MS = float(os.getenv("AURA_FAKE_EMOTION_BATCH_MS", 20))
+FAKE_EMOTION_FRAME_MS = float(os.getenv("AURA_FAKE_EMOTION_FRAME_MS", 2))
+# Size of the stub's dense layer, so weight sharing and CPU scaling can be measured without TensorFlow
+FAKE_EMOTION_WEIGHTS_MB = float(os.getenv("AURA_FAKE_EMOTION_WEIGHTS_MB", 0))
+# "pool": spawned worker processes; "inline": threads in this process
+INFERENCE_MODE = os.getenv("AURA_INFERENCE_MODE", "pool")
+
+# Output order of DeepFace's facial-expression model
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+EMOTION_INPUT_SIZE = 48
+
+BATCH_SIZE = metrics.histogram(
+    "aura_inference_batch_size", "Frames per emotion-model forward pass",
+    [1, 2, 4, 8, 16, 32, 64])
+BATCH_SECONDS = metrics.histogram(
+    "aura_inference_batch_seconds", "Wall time of one batched pool call",
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5])
+FRAME_SECONDS = metrics.histogram(
+    "aura_inference_frame_seconds", "Per-frame latency including time spent waiting for a batch",
+    [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5])
+
+_emotion_model = None
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when more frames are waiting than the configured queue depth allows."""
+
+
+class FakeEmotionModel:
+    """Stands in for the Keras emotion model: sleeps like a forward pass, answers from pixel means."""
+
+    def __init__(self, batch_ms=FAKE_EMOTION_BATCH_MS, frame_ms=FAKE_EMOTION_FRAME_MS, weights_mb=FAKE_EMOTION_WEIGHTS_MB):
+        self.batch_ms = batch_ms
+        self.frame_ms = frame_ms
+        columns = int(weights_mb * 2 ** 20 / 4 / EMOTION_INPUT_SIZE ** 2)
+        self.weights = np.random.default_rng(0).standard_normal((EMOTION_INPUT_SIZE ** 2, columns), dtype=np.float32) if columns else None
+
+    def predict(self, batch, verbose=0):
+        time.sleep((self.batch_ms + self.frame_ms * len(batch)) / 1000.0)
+        probs = np.zeros((len(batch), len(EMOTION_LABELS)), np.float32)
+        flat = batch.reshape(len(batch), -1)
+        if self.weights is not None:
+            labels = np.abs(flat @ self.weights).argmax(axis=1) % len(EMOTION_LABELS)
+        else:
+            labels = (flat.mean(axis=1) * 1000).astype(np.int64) % len(EMOTION_LABELS)
+        probs[np.arange(len(batch)), labels] = 1.0
+        return probs
+
+
+def load_model():
+    """Build the emotion model in this process if it isn't already (no forward pass)."""
+    global _emotion_model
+    if _emotion_model is not None:
+        return _emotion_model
+    if EMOTION_BACKEND == "fake":
+        _emotion_model = FakeEmotionModel()
+    else:
+        from deepface import DeepFace
+        try:
+            client = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+        except TypeError:  # deepface < 0.0.86 has no task argument
+            client = DeepFace.build_model("Emotion")
+        # Newer deepface wraps the Keras model in a client object
+        _emotion_model = getattr(client, "model", client)
+    return _emotion_model
+
+
+def _init_worker():
+    load_model()
+    # One dummy pass compiles the graph in this process up front
+    _emotion_model.predict(np.zeros((1, EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE, 1), np.float32), verbose=0)
+    # Audio features run in the same workers
+    try:
+        import audio
+        audio.warm_up()
+    except ImportError:
+        pass
+
+
+def _ping():
+    return os.getpid()
+
+
+def _dominant_emotions(faces):
+    batch = np.stack(faces)[..., np.newaxis]
+    probs = _emotion_model.predict(batch, verbose=0)
+    return [EMOTION_LABELS[i] for i in np.argmax(probs, axis=1)]
+
+
+class InferencePool:
+    def __init__(self, size=POOL_SIZE, queue_depth=QUEUE_DEPTH):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self._executor = None
+
+    @property
+    def running(self):
+        return self._executor is not None
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        try:
+            if INFERENCE_MODE == "inline":
+                # TensorFlow releases the GIL inside predict(), so threads run frames in parallel
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="inference")
+                await asyncio.wrap_future(self._executor.submit(_init_worker))
+                return
+            # spawn, not fork: the parent may already have TensorFlow threads running
+            ctx = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.size, mp_context=ctx, initializer=_init_worker)
+            # Submitting one ping per slot spins every worker up (and warms it) before traffic arrives
+            await asyncio.gather(*(asyncio.wrap_future(self._executor.submit(_ping)) for _ in range(self.size)))
+        except BaseException:
+            # Don't leave a half-started pool behind: `running` would be True and requests would reach it
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            raise RuntimeError("Inference pool is not running")
+        return await asyncio.wrap_future(self._executor.submit(fn, *args))
+
+
+class FrameBatcher:
+    """Collects frames for up to max_wait_ms (or max_size frames) and runs them as one pool call."""
+
+    def __init__(self, pool, max_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.pool = pool
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._waiting = []
+        self._timer = None
+
+    async def dominant_emotion(self, face):
+        if self.pool.pending >= self.pool.queue_depth:
+            raise PoolSaturated(f"{self.pool.pending} frames already queued")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiting.append((face, fut))
+        self.pool.pending += 1
+        if len(self._waiting) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        start = time.perf_counter()
+        try:
+            return await fut
+        finally:
+            self.pool.pending -= 1
+            FRAME_SECONDS.observe(time.perf_counter() - start)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._waiting = self._waiting[:self.max_size], self._waiting[self.max_size:]
+        if self._waiting:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        BATCH_SIZE.observe(len(batch))
+        start = time.perf_counter()
+        try:
+            results = await self.pool.run(_dominant_emotions, [face for face, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            BATCH_SECONDS.observe(time.perf_counter() - start)
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+pool = InferencePool()
+batcher = FrameBatcher(pool)
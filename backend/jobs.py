@@ -0,0 +1,142 @@
+"""Durable background queue for Gemini enrichment of journal entries.
+
+Jobs live in the enrichment_jobs table of aura.db, so anything queued
+survives a restart: jobs left 'running' by a crashed process are put back on
+the queue at startup. Workers are asyncio tasks in the API process; the
+database work runs in threads and the Gemini call is awaited, so a slow
+upstream never blocks request handling.
+"""
+import asyncio
+import datetime
+import os
+import random
+
+from database import SessionLocal, EnrichmentJob, JournalEntry
+
+ENRICH_WORKERS = int(os.getenv("AURA_ENRICH_WORKERS", 2))
+ENRICH_MAX_ATTEMPTS = int(os.getenv("AURA_ENRICH_MAX_ATTEMPTS", 5))
+ENRICH_POLL_SECONDS = float(os.getenv("AURA_ENRICH_POLL_SECONDS", 5))
+ENRICH_RETRY_BASE = float(os.getenv("AURA_ENRICH_RETRY_BASE", 10))
+
+
+class RetryLater(Exception):
+    """Raised by the enrich function when the job should be retried with backoff."""
+
+
+def enqueue(db, entry_id, payload):
+    """Add a job in the caller's transaction, so the entry and its job commit together."""
+    now = datetime.datetime.utcnow()
+    db.add(EnrichmentJob(entry_id=entry_id, payload=payload, status="queued", available_at=now, created_at=now, updated_at=now))
+
+
+class EnrichmentWorkers:
+    def __init__(self, enrich, workers=ENRICH_WORKERS, max_attempts=ENRICH_MAX_ATTEMPTS):
+        # enrich(job) -> awaitable returning the event dict to broadcast; may raise RetryLater
+        self.enrich = enrich
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.subscribers = set()
+        self._tasks = []
+        self._wakeup = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._recover)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=100)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event):
+        for queue in list(self.subscribers):
+            if queue.full():
+                continue # a slow SSE client misses events rather than stalling the workers
+            queue.put_nowait(event)
+
+    def _recover(self):
+        db = SessionLocal()
+        try:
+            db.query(EnrichmentJob).filter(EnrichmentJob.status == "running").update({"status": "queued"})
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim(self):
+        db = SessionLocal()
+        try:
+            now = datetime.datetime.utcnow()
+            job = db.query(EnrichmentJob).filter(
+                EnrichmentJob.status == "queued", EnrichmentJob.available_at <= now
+            ).order_by(EnrichmentJob.id).first()
+            if job is None:
+                return None
+            # Conditional update so two workers can never claim the same job
+            claimed = db.query(EnrichmentJob).filter(
+                EnrichmentJob.id == job.id, EnrichmentJob.status == "queued"
+            ).update({"status": "running", "attempts": EnrichmentJob.attempts + 1, "updated_at": now})
+            db.commit()
+            if not claimed:
+                return None
+            db.refresh(job)
+            db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    def _finish(self, job, status, error=None, retry_in=None):
+        db = SessionLocal()
+        try:
+            now = datetime.datetime.utcnow()
+            values = {"status": status, "last_error": error, "updated_at": now}
+            if retry_in is not None:
+                values["available_at"] = now + datetime.timedelta(seconds=retry_in)
+            db.query(EnrichmentJob).filter(EnrichmentJob.id == job.id).update(values)
+            if status == "failed":
+                # The entry keeps its mood defaults; clients stop waiting for an upgrade
+                db.query(JournalEntry).filter(JournalEntry.id == job.entry_id).update({"enrichment_status": "failed"})
+            db.commit()
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            # Clear before claiming so a notify() that races with an empty claim isn't lost
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), ENRICH_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                event = await self.enrich(job)
+            except asyncio.CancelledError:
+                await asyncio.to_thread(self._finish, job, "queued")
+                raise
+            except Exception as e:
+                final = not isinstance(e, RetryLater) or job.attempts >= self.max_attempts
+                if final:
+                    await asyncio.to_thread(self._finish, job, "failed", str(e))
+                    self.publish({"entry_id": job.entry_id, "enrichment_status": "failed"})
+                else:
+                    delay = random.uniform(0, ENRICH_RETRY_BASE * (2 ** (job.attempts - 1)))
+                    await asyncio.to_thread(self._finish, job, "queued", str(e), delay)
+                continue
+            await asyncio.to_thread(self._finish, job, "done")
+            self.publish(event)
@@ -0,0 +1,158 @@
+"""Single-pass keyword matcher for Aura Shield and the contextual overrides.
+
+The text is tokenized once by a compiled regex and every token is looked up
+in a word-level trie built from the lexicon (terms, negations and clause
+breaks together), so a scan is one linear pass that reports every category
+that matched, however many terms the lexicon holds. Terms only match whole
+words. A match in a negatable category is
+dropped when a negation word appears within `negation_window` words before it
+in the same clause ("not worried about exams"); crisis terms are never
+negated. Phrases listed under "ignore" (e.g. "hanging out") are consumed so
+the shorter term inside them does not fire. A category can also list
+"stems": word prefixes that match any inflection ("overdos" catches
+overdosed, overdoses, overdosing). Crisis uses them so a tense or plural the
+term list misses never drops an entry out of Aura Shield.
+
+The lexicon lives in lexicon.json (AURA_LEXICON_PATH) and is reloaded when
+the file changes, without a restart.
+"""
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+LEXICON_PATH = os.getenv("AURA_LEXICON_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.json"))
+LEXICON_CHECK_SECONDS = float(os.getenv("AURA_LEXICON_CHECK_SECONDS", 2))
+
+Hit = namedtuple("Hit", "category term position negated") # position is a token index
+
+_TOKEN = re.compile(r"\w+(?:'\w+)?|[.;:!?]")
+
+
+def tokenize(text):
+    """Lowercased words (keeping apostrophes, with curly ones straightened) and sentence punctuation."""
+    return _TOKEN.findall(text.lower().replace("’", "'"))
+
+
+def _normalize(phrase):
+    return " ".join(phrase.lower().split())
+
+
+class CompiledLexicon:
+    def __init__(self, data):
+        self.version = data.get("version")
+        self.negation_window = data.get("negation_window", 3)
+        self.negatable = {name: spec.get("negatable", True) for name, spec in data["categories"].items()}
+        self.term_categories = {}
+        for name, spec in data["categories"].items():
+            for term in spec["terms"]:
+                self.term_categories.setdefault(_normalize(term), []).append(name)
+        for phrase in data.get("ignore", []):
+            self.term_categories.setdefault(_normalize(phrase), [])
+
+        # Word-level trie: first word -> candidate phrases as word tuples, longest first, so
+        # "commit suicide" wins over "suicide" and "hanging out" over "hanging"
+        self.phrases = {}
+        for term in sorted(self.term_categories, key=lambda t: len(t.split()), reverse=True):
+            words = tuple(term.split())
+            self.phrases.setdefault(words[0], []).append((words, term))
+        self.stems = {}
+        for name, spec in data["categories"].items():
+            for stem in spec.get("stems", []):
+                self.stems.setdefault(_normalize(stem), []).append(name)
+        self.stem_prefixes = tuple(self.stems) # str.startswith takes a tuple: one C-level check per word
+        self.negations = frozenset(_normalize(n) for n in data.get("negations", []))
+        self.breaks = frozenset(_normalize(b) for b in data.get("clause_breaks", [])) | frozenset(".;:!?")
+
+    def scan(self, text):
+        # The regex tokenizer does the character work in C; the loop below is one dict probe per word
+        tokens = tokenize(text)
+        hits = []
+        negation_at = None # token index of the most recent negation in this clause
+        i, n = 0, len(tokens)
+        while i < n:
+            token = tokens[i]
+            candidates = self.phrases.get(token)
+            if candidates is not None:
+                for words, term in candidates:
+                    if tuple(tokens[i:i + len(words)]) == words:
+                        negated = negation_at is not None and i - negation_at <= self.negation_window
+                        for category in self.term_categories[term]:
+                            hits.append(Hit(category, term, i, negated and self.negatable[category]))
+                        i += len(words)
+                        break
+                else:
+                    i += 1
+                continue
+            if self.stem_prefixes and token.startswith(self.stem_prefixes):
+                negated = negation_at is not None and i - negation_at <= self.negation_window
+                for stem, categories in self.stems.items():
+                    if token.startswith(stem):
+                        for category in categories:
+                            hits.append(Hit(category, token, i, negated and self.negatable[category]))
+                        break
+                i += 1
+                continue
+            if token in self.negations:
+                negation_at = i
+            elif token in self.breaks:
+                negation_at = None
+            i += 1
+        return hits
+
+
+class Lexicon:
+    """Thread-safe handle on the current CompiledLexicon, reloaded when the JSON file's mtime changes."""
+
+    def __init__(self, path=LEXICON_PATH, check_every=LEXICON_CHECK_SECONDS):
+        self.path = path
+        self.check_every = check_every
+        self.compiled = None
+        self.mtime = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _compile(self):
+        with open(self.path) as f:
+            return CompiledLexicon(json.load(f))
+
+    def current(self):
+        now = time.monotonic()
+        if self.compiled is not None and now - self.checked_at < self.check_every:
+            return self.compiled
+        with self._lock:
+            self.checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self.mtime:
+                    self.mtime = mtime # a broken edit is reported once, not on every check
+                    self.compiled = self._compile()
+            except (OSError, ValueError, KeyError, re.error) as e:
+                if self.compiled is None:
+                    self.mtime = None
+                    raise
+                # Keep serving the last good lexicon; a half-written edit shouldn't take Aura Shield down
+                with open("ai_error.log", "a") as f:
+                    f.write(f"[{datetime.datetime.now()}] Lexicon reload failed: {str(e)}\n")
+        return self.compiled
+
+    @property
+    def version(self):
+        return self.current().version
+
+    def scan(self, text):
+        return self.current().scan(text)
+
+    def categories(self, text):
+        """Category -> matched terms in text order, negated matches excluded."""
+        found = {}
+        for hit in self.scan(text):
+            if not hit.negated:
+                found.setdefault(hit.category, []).append(hit.term)
+        return found
+
+
+lexicon = Lexicon()
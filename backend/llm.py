@@ -0,0 +1,290 @@
+"""Non-blocking Gemini client with timeouts, retries, a concurrency cap and a circuit breaker.
+
+The google-generativeai SDK is synchronous over REST, so each call runs in a
+worker thread; the event loop only awaits it. A global semaphore bounds how
+many calls (and therefore threads) are in flight, and the breaker stops
+calling Gemini at all for a cool-down period once it keeps failing, so
+callers fall straight back to the deterministic counselling defaults.
+
+Set GEMINI_API_ENDPOINT (e.g. http://localhost:8001, see fake_gemini.py) to
+talk to a local fake server instead of Google.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+import deps
+import metrics
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+GEMINI_TIMEOUT = float(os.getenv("AURA_GEMINI_TIMEOUT", 20))
+GEMINI_MAX_RETRIES = int(os.getenv("AURA_GEMINI_MAX_RETRIES", 2))
+GEMINI_BACKOFF_BASE = float(os.getenv("AURA_GEMINI_BACKOFF_BASE", 0.5))
+GEMINI_BACKOFF_MAX = float(os.getenv("AURA_GEMINI_BACKOFF_MAX", 8))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("AURA_GEMINI_MAX_CONCURRENCY", 8))
+BREAKER_FAILURES = int(os.getenv("AURA_GEMINI_BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("AURA_GEMINI_BREAKER_RESET", 30))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+GEMINI_ATTEMPTS = metrics.counter("aura_gemini_attempts_total", "Gemini API calls made, retries included")
+GEMINI_RETRIES = metrics.counter("aura_gemini_retries_total", "Gemini calls retried after a 429/5xx or timeout")
+GEMINI_FAILURES = metrics.counter("aura_gemini_failures_total", "Gemini requests that failed for good (retries exhausted or not retryable)")
+GEMINI_REJECTED = metrics.counter("aura_gemini_breaker_rejections_total", "Gemini requests refused while the circuit breaker was open")
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling Gemini while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failed calls; lets one probe through after `reset_after` seconds."""
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.probing or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def abandon(self):
+        """A call ended with neither outcome (cancelled, or its stream closed early); let the next one probe."""
+        self.probing = False
+
+
+def _status_code(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    # google.api_core exceptions expose the HTTP status as .code; fall back to the message
+    for status in RETRYABLE_STATUS:
+        if str(status) in str(error):
+            return status
+    return None
+
+
+def _is_retryable(error):
+    return isinstance(error, asyncio.TimeoutError) or _status_code(error) in RETRYABLE_STATUS
+
+
+def parse_json_response(text):
+    text = text.replace("```json", "").replace("```", "").strip()
+    return json.loads(text)
+
+
+class JsonFieldStream:
+    """Incrementally parses a streamed JSON object, yielding each top-level field once it is complete.
+
+    Anything before the opening brace (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.field_start = None
+
+    def feed(self, text):
+        self.buffer += text
+        fields = []
+        while self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.field_start = self.pos + 1
+            elif ch in "}]":
+                if self.depth == 1:
+                    fields.extend(self._complete_field())
+                self.depth -= 1
+            elif ch == "," and self.depth == 1:
+                fields.extend(self._complete_field())
+                self.field_start = self.pos + 1
+            self.pos += 1
+        return fields
+
+    def _complete_field(self):
+        if self.field_start is None:
+            return []
+        text = self.buffer[self.field_start:self.pos].strip()
+        if not text:
+            return []
+        try:
+            return list(json.loads("{" + text + "}").items())
+        except ValueError:
+            return []
+
+
+class GeminiClient:
+    def __init__(self, model_name=GEMINI_MODEL, timeout=GEMINI_TIMEOUT, max_retries=GEMINI_MAX_RETRIES,
+                 backoff_base=GEMINI_BACKOFF_BASE, backoff_max=GEMINI_BACKOFF_MAX,
+                 max_concurrency=GEMINI_MAX_CONCURRENCY, breaker=None):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self._model = None
+        self._semaphore = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            # The SDK (and the protobuf/gRPC stack behind it) is imported on the first call, not at startup
+            genai = deps.load("google.generativeai")
+            if genai is None:
+                raise RuntimeError("google-generativeai is not installed")
+            options = {"api_key": os.getenv("GEMINI_API_KEY")}
+            if GEMINI_API_ENDPOINT:
+                options.update(transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+            genai.configure(**options)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    @property
+    def semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _call(self, prompt):
+        async with self.semaphore:
+            self.in_flight += 1
+            GEMINI_ATTEMPTS.inc()
+            try:
+                # SDK-level retries are off (retry=None) so backoff and the breaker see every failure;
+                # the request timeout also ends the worker thread, wait_for bounds the await itself
+                call = asyncio.to_thread(self.model.generate_content, prompt, request_options={"timeout": self.timeout, "retry": None})
+                response = await asyncio.wait_for(call, self.timeout + 1)
+                return response.text
+            finally:
+                self.in_flight -= 1
+
+    async def generate_text(self, prompt):
+        if not self.breaker.allow():
+            GEMINI_REJECTED.inc()
+            raise CircuitOpen(f"Gemini circuit open after {self.breaker.consecutive_failures} failures")
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    text = await self._call(prompt)
+                except Exception as e:
+                    if _is_retryable(e) and attempt < self.max_retries:
+                        GEMINI_RETRIES.inc()
+                        await asyncio.sleep(self.backoff(attempt))
+                        continue
+                    GEMINI_FAILURES.inc()
+                    settled = True
+                    self.breaker.record_failure()
+                    raise
+                settled = True
+                self.breaker.record_success()
+                return text
+        finally:
+            if not settled:
+                self.breaker.abandon()
+
+    async def generate_json(self, prompt):
+        return parse_json_response(await self.generate_text(prompt))
+
+    async def stream_text(self, prompt):
+        """Yield text chunks as Gemini streams them. No retries once a stream has started."""
+        if not self.breaker.allow():
+            GEMINI_REJECTED.inc()
+            raise CircuitOpen(f"Gemini circuit open after {self.breaker.consecutive_failures} failures")
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+
+        def pump():
+            # The SDK's stream is a blocking iterator; hand each chunk back to the event loop
+            try:
+                response = self.model.generate_content(prompt, stream=True, request_options={"timeout": self.timeout, "retry": None})
+                for chunk in response:
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(chunks.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        settled = False
+        try:
+            async with self.semaphore:
+                self.in_flight += 1
+                GEMINI_ATTEMPTS.inc()
+                try:
+                    pump_task = asyncio.ensure_future(asyncio.to_thread(pump))
+                    while True:
+                        item = await asyncio.wait_for(chunks.get(), self.timeout)
+                        if item is done:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                    await pump_task
+                except Exception:
+                    GEMINI_FAILURES.inc()
+                    settled = True
+                    self.breaker.record_failure()
+                    raise
+                finally:
+                    self.in_flight -= 1
+            settled = True
+            self.breaker.record_success()
+        finally:
+            # Cancelled, or closed by the consumer (aclose/GeneratorExit) before the stream finished
+            if not settled:
+                self.breaker.abandon()
+
+
+gemini = GeminiClient()
@@ -0,0 +1,98 @@
+"""CPU-only sentiment/emotion classifier: the fast tier in front of Gemini.
+
+A weighted word lexicon (sentiment_lexicon.json) maps words to a valence and
+one of the emotions Gemini is asked for. Negations flip valence and drop the
+word's emotion vote, intensifiers scale the next word, and the mood the user
+picked adds a prior vote. Confidence is the winning emotion's share of the
+votes, discounted when there is little evidence, so short or mixed entries
+still go to Gemini.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from keywords import tokenize
+
+SENTIMENT_LEXICON_PATH = os.getenv("AURA_SENTIMENT_LEXICON_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_lexicon.json"))
+LOCAL_TIER_THRESHOLD = float(os.getenv("AURA_LOCAL_TIER_THRESHOLD", 0.8)) # above 1 disables the local tier
+FULL_EVIDENCE = 3.0 # votes needed before confidence is not discounted
+
+Prediction = namedtuple("Prediction", "sentiment emotion confidence")
+
+
+class LocalModel:
+    def __init__(self, data):
+        self.version = data.get("version")
+        self.emotions = data["emotions"]
+        self.vocab = {word: i for i, word in enumerate(data["words"])}
+        self.valence = np.array([v for v, _ in data["words"].values()], dtype=np.float32)
+        self.emotion_of = np.array([self.emotions.index(e) for _, e in data["words"].values()], dtype=np.int64)
+        self.intensifiers = data.get("intensifiers", {})
+        self.negations = frozenset(data.get("negations", []))
+        self.negation_window = data.get("negation_window", 3)
+        self.mood_prior = data.get("mood_prior", 1.0)
+        self.moods = {mood: self.emotions.index(e) for mood, e in data.get("moods", {}).items()}
+
+    @classmethod
+    def load(cls, path=SENTIMENT_LEXICON_PATH):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def predict(self, text, mood=None):
+        index, weight, negated = [], [], []
+        scale, negation_at = 1.0, None
+        for i, token in enumerate(tokenize(text)):
+            if token in self.negations:
+                negation_at = i
+            elif token in self.intensifiers:
+                scale = self.intensifiers[token]
+                continue
+            elif token in ".;:!?":
+                negation_at = None
+            else:
+                j = self.vocab.get(token)
+                if j is not None:
+                    index.append(j)
+                    weight.append(scale)
+                    negated.append(negation_at is not None and i - negation_at <= self.negation_window)
+            scale = 1.0
+
+        votes = np.zeros(len(self.emotions), dtype=np.float32)
+        if mood in self.moods:
+            votes[self.moods[mood]] += self.mood_prior
+        if not index:
+            return Prediction(0.0, self.emotions[int(votes.argmax())], 0.0)
+
+        index, weight, negated = np.array(index), np.array(weight, dtype=np.float32), np.array(negated)
+        signed = np.where(negated, -weight, weight)
+        sentiment = float(np.tanh(np.dot(signed, self.valence[index]) / np.sqrt(len(index))))
+        # "not happy" says little about which emotion it is, so negated words only move the valence
+        votes += np.bincount(self.emotion_of[index], weights=np.where(negated, 0.0, weight), minlength=len(self.emotions)).astype(np.float32)
+        total = float(votes.sum())
+        if total == 0:
+            return Prediction(round(sentiment, 3), self.emotions[0], 0.0)
+        top = int(votes.argmax())
+        confidence = float(votes[top] / total) * min(1.0, total / FULL_EVIDENCE)
+        return Prediction(round(sentiment, 3), self.emotions[top], round(confidence, 3))
+
+
+_model = None
+
+
+def model():
+    global _model
+    if _model is None:
+        _model = LocalModel.load()
+    return _model
+
+
+def classify(entry):
+    """Prediction for a journal entry, over the same combined text the keyword overrides use."""
+    text = f"{entry.triggers} {entry.strategies} {entry.lessons}"
+    return model().predict(text, entry.overall_mood.lower())
+
+
+def warm_up():
+    model().predict("feeling calm and focused after a long walk", "calm")
@@ -1,41 +1,97 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+import warmup # first, so the import time it reports covers everything below
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, StreamingResponse, Response, JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import tuple_
 from typing import List, Optional
 import os
-import google.generativeai as genai
 from dotenv import load_dotenv
-from database import SessionLocal, JournalEntry, User
+from database import SessionLocal, AsyncSessionLocal, JournalEntry, EnrichmentJob, MoodRollup, UserSummary
+import jobs
+import rollups
+import summaries
+import search
+import vectors
+import dataio
+from inference import pool as inference_pool, batcher as inference_batcher, PoolSaturated, EMOTION_BACKEND
+import metrics
+import deps
+import keywords
+import spa
+import preprocess
+import audio
 import pydantic
+import asyncio
 import datetime
 import base64
-import numpy as np
-import io
+import json
 import random
+import time
 try:
-    import cv2
-    from deepface import DeepFace
-    import librosa
-    import soundfile as sf
+    import orjson
 except ImportError:
-    cv2 = None
-    DeepFace = None
-    librosa = None
-    sf = None
+    orjson = None
 
 load_dotenv()
 
-# Initialize Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('models/gemini-2.0-flash')
+# OpenCV, DeepFace/TensorFlow and librosa are only checked for here, not imported: preprocess, audio and
+# the inference workers load them on first use (or during warm-up), so journal-only workers start fast.
+# The visual engine needs OpenCV plus an emotion model: DeepFace, or the stub from AURA_EMOTION_BACKEND=fake
+VISUAL_ENGINE = deps.available("cv2") and (deps.available("deepface") or EMOTION_BACKEND == "fake")
+AUDIO_ENGINE = deps.available("librosa") and deps.available("soundfile")
+
+import counsel
+import local_model
+from llm import gemini, CircuitOpen, JsonFieldStream
+from cache import response_cache, cache_key, CACHE_ENABLED
 
 app = FastAPI(title="Aura API")
 
+@app.on_event("startup")
+async def start_warm_up():
+    # In the background, so /livez answers at once; /readyz fails until every step is done
+    steps = []
+    if VISUAL_ENGINE:
+        steps.append(("inference_pool", inference_pool.start)) # each worker loads the emotion model and runs a dummy pass
+    if warmup.WARMUP_ENABLED:
+        if VISUAL_ENGINE:
+            steps.append(("opencv", preprocess.warm_up))
+        elif AUDIO_ENGINE:
+            steps.append(("audio", audio.warm_up)) # no pool, so clips are analysed in this process
+        steps += [("keywords", keywords.lexicon.current), ("local_model", local_model.warm_up), ("gemini_sdk", lambda: gemini.model),
+                  ("frontend", spa.frontend.current), ("vectors", vectors.index.stats)] # stats() maps the vector index
+    # Without these the worker would answer wrongly, not just slowly; the rest only degrade a feature
+    required = ("inference_pool", "opencv", "audio", "keywords")
+    app.state.warm_up = asyncio.create_task(warmup.lifecycle.run(steps, required))
+
+@app.on_event("startup")
+async def start_enrichment_workers():
+    await enrichment_workers.start()
+
+@app.on_event("shutdown")
+def stop_inference_pool():
+    app.state.warm_up.cancel()
+    inference_pool.shutdown()
+
+@app.on_event("shutdown")
+async def stop_enrichment_workers():
+    await enrichment_workers.stop()
+
 @app.get("/api/health")
 def read_root():
     return {"status": "Aura API is running", "endpoints": ["/journal/entries", "/mood/stats", "/docs"]}
+
+@app.get("/livez")
+def livez():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readyz():
+    # Route traffic here only once the models are warm; the body has import and warm-up timings
+    return JSONResponse(warmup.lifecycle.status(), status_code=200 if warmup.lifecycle.ready else 503)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,7 +99,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Compresses large JSON pages; SSE streams are left alone by Starlette
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+# Outermost, so request latency includes compression
+app.add_middleware(metrics.RequestMetrics)
 
 # Dependency
 def get_db():
@@ -53,6 +114,15 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class SimilarQuery(pydantic.BaseModel):
+    text: str
+    user_phone: str
+    k: int = 5
+
 class MultiModalInput(pydantic.BaseModel):
     image: str
     audio: Optional[str] = None
@@ -94,6 +164,8 @@ class EntryResponse(pydantic.BaseModel):
     emergency_contacts: List[dict] = []
     counselor_info: str = ""
     counselor_tips: str = "[]" # Stored as JSON string
+    enrichment_status: Optional[str] = "complete"
+    analysis_tier: Optional[str] = None
 
     model_config = pydantic.ConfigDict(from_attributes=True)
 
@@ -132,52 +204,56 @@ MOOD_QUOTES = {
     ]
 }
 
-@app.post("/analyze-multi-modal")
-async def analyze_multi_modal(data: MultiModalInput):
+# Map DeepFace emotion to Aura's 6 stages
+EMOTION_MAP = {
+    "happy": "happy",
+    "sad": "sad",
+    "neutral": "neutral",
+    "angry": "frustrated",
+    "fear": "stress",
+    "surprise": "happy", # Surprise is often positive in this context
+    "disgust": "frustrated"
+}
+
+BUSY_DETAIL = "Aura is analysing a lot of check-ins right now. Please try again in a moment."
+MAX_UPLOAD_BYTES = int(os.getenv("AURA_MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+
+def fuse_moods(visual_mood, audio_mood):
+    final_mood = visual_mood
+    if audio_mood in ["stressed", "melancholy"] and visual_mood == "neutral":
+        final_mood = "stress" if audio_mood == "stressed" else "sad"
+    return final_mood
+
+async def analyze_audio(audio_bytes):
+    if inference_pool.running:
+        return await inference_pool.run(audio.analyze_clip, audio_bytes)
+    return await asyncio.to_thread(audio.analyze_clip, audio_bytes)
+
+async def multi_modal_mood(image_bytes, audio_bytes=None):
     try:
         # 1. Visual Analysis (OpenCV + DeepFace)
-        header, encoded = data.image.split(",", 1) if "," in data.image else (None, data.image)
-        img_data = base64.b64decode(encoded)
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Reduced decode + face crop in a thread (cv2 releases the GIL); no face means no model call
+        face = await asyncio.to_thread(preprocess.face_input, image_bytes)
 
         visual_mood = "neutral"
-        objs = DeepFace.analyze(img, actions=['emotion'], enforce_detection=False)
-        if objs:
-            raw_mood = objs[0]['dominant_emotion'].lower()
-            mapping = {
-                "happy": "happy", "sad": "sad", "neutral": "neutral",
-                "angry": "frustrated", "fear": "stress", "surprise": "happy", "disgust": "frustrated"
-            }
-            visual_mood = mapping.get(raw_mood, "neutral")
+        if face is not None and inference_pool.running:
+            with metrics.span("emotion_model"):
+                raw_mood = await inference_batcher.dominant_emotion(face)
+            visual_mood = EMOTION_MAP.get(raw_mood, "neutral")
 
-        # 2. Audio Analysis (Librosa)
+        # 2. Audio Analysis (Librosa, bounded cost, in a worker process)
         audio_mood = "neutral"
-        if data.audio and librosa:
+        audio_features = None
+        if audio_bytes and AUDIO_ENGINE:
             try:
-                audio_data = base64.b64decode(data.audio)
-                audio_io = io.BytesIO(audio_data)
-                y, sr = librosa.load(audio_io, sr=None)
-                
-                # Simple heuristic analysis
-                rms = librosa.feature.rms(y=y)[0]
-                pitch = librosa.yin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'))
-                mean_rms = np.mean(rms)
-                mean_pitch = np.mean(pitch)
-
-                if mean_rms > 0.05: # High energy
-                    audio_mood = "excited" if visual_mood == "happy" else "stressed"
-                elif mean_rms < 0.01: # Low energy
-                    audio_mood = "calm" if visual_mood != "sad" else "melancholy"
-                else:
-                    audio_mood = "neutral"
+                with metrics.span("audio_features"):
+                    audio_features = await analyze_audio(audio_bytes)
+                audio_mood = audio.audio_mood(audio_features, visual_mood)
             except Exception as ae:
                 print(f"Audio Analysis Error: {ae}")
 
         # 3. Synergy Logic
-        final_mood = visual_mood
-        if audio_mood in ["stressed", "melancholy"] and visual_mood == "neutral":
-            final_mood = "stress" if audio_mood == "stressed" else "sad"
+        final_mood = fuse_moods(visual_mood, audio_mood)
         
         quote_data = random.choice(MOOD_QUOTES.get(final_mood, MOOD_QUOTES["neutral"]))
         
@@ -185,46 +261,31 @@ async def analyze_multi_modal(data: MultiModalInput):
             "mood": final_mood,
             "visual_mood": visual_mood,
             "audio_mood": audio_mood,
+            "audio_features": audio_features,
             "quote": f"\"{quote_data['quote']}\" — {quote_data['author']}",
             "desc": quote_data['desc']
         }
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail=BUSY_DETAIL)
     except Exception as e:
         print(f"Multi-modal Error: {e}")
         return {"mood": "neutral", "quote": "I'm here for you.", "desc": "Technical glitch, but your peace remains."}
 
-@app.post("/analyze-visual")
-async def analyze_visual(data: dict):
-    if DeepFace is None or cv2 is None:
+async def visual_mood(image_bytes):
+    if not VISUAL_ENGINE or not inference_pool.running:
         return {"mood": "neutral", "quote": "I'm here to support you whenever you're ready.", "desc": "The visual engine is warming up."}
     
     try:
-        image_data = data.get("image")
-        if not image_data or "," not in image_data:
+        face = await asyncio.to_thread(preprocess.face_input, image_bytes)
+        if face is None:
             return {"mood": "neutral", "quote": "I couldn't catch that expression.", "desc": "Try adjusting your lighting or position."}
-            
-        header, encoded = image_data.split(",", 1)
-        binary_data = base64.b64decode(encoded)
-        nparr = np.frombuffer(binary_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
-        # Analyze with DeepFace
-        objs = DeepFace.analyze(img, actions=['emotion'], enforce_detection=False)
-        if objs:
-            raw_mood = objs[0]['dominant_emotion'].lower()
+        # Analyze with DeepFace (off the event loop, in the warm inference pool)
+        with metrics.span("emotion_model"):
+            raw_mood = await inference_batcher.dominant_emotion(face)
+        if raw_mood:
+            mood = EMOTION_MAP.get(raw_mood, "neutral")
             
-            # Map DeepFace emotion to Aura's 6 stages
-            mapping = {
-                "happy": "happy",
-                "sad": "sad",
-                "neutral": "neutral",
-                "angry": "frustrated",
-                "fear": "stress",
-                "surprise": "happy", # Surprise is often positive in this context
-                "disgust": "frustrated"
-            }
-            mood = mapping.get(raw_mood, "neutral")
-            
-            import random
             quote_data = random.choice(MOOD_QUOTES.get(mood, MOOD_QUOTES["neutral"]))
             
             return {
@@ -233,194 +294,344 @@ async def analyze_visual(data: dict):
                 "desc": quote_data['desc']
             }
         return {"mood": "neutral", "quote": "Steady and focused.", "desc": "You're in a neutral state, perfect for building a balanced drive."}
+    except PoolSaturated:
+        raise HTTPException(status_code=503, detail=BUSY_DETAIL)
     except Exception as e:
         print(f"Visual Analysis Error: {e}")
         return {"mood": "neutral", "quote": "Technical glitches happen, but your peace remains.", "desc": "I'm still here for you."}
 
-@app.post("/journal/entries", response_model=EntryResponse)
-async def create_entry(entry: EntryCreate, db: Session = Depends(get_db)):
-    combined_text = f"Template: {entry.template_name}. Triggers: {entry.triggers}. Strategies: {entry.strategies}. Lessons: {entry.lessons}"
-    prompt = f"""
-    You are Aura, an elite empathetic AI counselor. The user is {entry.user_age} years old and identifies as {entry.user_gender}.
-    
-    Current Template Context: "{entry.template_name}"
-    Specific Counseling Style for this Template:
-    {
-        {
-            "The Daily Pulse": "Focus on clarity and quick, actionable insights. Be concise, energetic, and help the user organize their scattered thoughts.",
-            "Anxiety Anchor": "Use extremely calming, grounding language. Focus on physical sensations (feet on floor, breath) and immediate relief. Be slow, gentle, and reassuring.",
-            "Gratitude Horizon": "Focus on appreciation and shifting perspective to abundance. Be warm, celebrating, and confirm the positive impact of their gratitude.",
-            "The Academic Edge": "Focus on productivity, focus, and overcoming procrastination or burnout. Be structured, motivating, and coach-like. Use terms like 'sprint', 'focus', 'goal'.",
-            "Nightfall Peace": "Focus on winding down, letting go of the day, and relaxation. Be whisper-quiet, soothing, and use sleep-inducing language.",
-            "Inner Compass": "Focus on values, long-term vision, and self-alignment. Be philosophical, deep, and reflective. Ask profound questions.",
-            "Morning Spark": "Focus on setting intentions, energy, and optimism. Be bright, awakening, and action-oriented for the day ahead.",
-            "The Social Web": "Focus on boundaries, communication, and empathy. Be relational and understanding. Help them navigate complex human dynanmics.",
-            "The Clearing": "Focus on unconditional acceptance and listening. Be open, spacious, and non-judgmental. Allow them to vent without immediately fixing it."
-        }.get(entry.template_name, "Provide empathetic, adaptive counseling based on the user's emotional state.")
-    }
-    
-    CRITICAL INSTRUCTION: Analyze the user's input sentence-by-sentence. Address specific triggers, emotions, and thoughts mentioned. 
-    AVOID repetitive or generic comfort. Every response MUST be uniquely tailored to the specific details provided.
-    
-    Emotional Reasoning Phase:
-    1. Identify the core subtext of EACH sentence in: "{combined_text}"
-    2. Consider how a {entry.user_age}-year-old {entry.user_gender} feels about these specific triggers.
-    3. Determine the most helpful emotional shift for this specific context ({entry.template_name}).
-    
-    User State:
-    - Primary Mood: {entry.overall_mood}
-    - Specific Emotions: {", ".join(entry.specific_emotions)}
-    - Intensity: {entry.intensity}/10
-    
-    Return ONLY a JSON object:
-    {{
-        "sentiment": float (-1 to 1),
-        "emotion": "stress" | "anxiety" | "sad" | "happy" | "calm" | "focus",
-        "suggestion": "2-3 detailed, empathetic paragraphs. Use newlines (\\n) between paragraphs. Reference at least 2 specific details from the user's input to show you listened.",
-        "breathing_exercise": "A unique step-by-step technique tailored to their specific intensity.",
-        "focus_music": "Specifically justified music choice (e.g., 'Binaural beats at 40Hz to help with the exam focus you mentioned').",
-        "counselor_info": "Warm, specific guidance on next steps.",
-        "quote": "A powerful, non-cliché quote matching their specific struggle.",
-        "counselor_tips": ["Unique actionable tip 1", "Unique actionable tip 2", "Unique actionable tip 3"]
-    }}
-    """
-    
-    # --- Aura Shield: Critical Safety Check ---
-    critical_keywords = ["suicide", "death", "kill myself", "end my life", "harm myself", "want to die", "commit suicide", "hanging", "overdose"]
-    combined_text = f"{entry.triggers} {entry.strategies} {entry.lessons}".lower()
-    
-    is_critical = any(k in combined_text for k in critical_keywords)
-    
-    emergency_contacts = [
-        {"name": "National Crisis Hotline", "phone": "988", "desc": "24/7 confidential support for people in distress."},
-        {"name": "Emergency Services", "phone": "100", "desc": "Immediate police or ambulance intervention."},
-        {"name": "Vandrevala Foundation", "phone": "9999666555", "desc": "Mental health support and crisis counseling."},
-        {"name": "AASRA", "phone": "9820466726", "desc": "24/7 Suicide Prevention Helpline."}
-    ]
-    
-    # Deeply Differentiated Mood Defaults
-    mood_key = entry.overall_mood.lower()
-    
-    if mood_key == "happy":
-        analysis = {
-            "sentiment": 0.8, "emotion": "happy",
-            "suggestion": "Your positivity is radiant! These moments of joy are essential for resilience. Let's amplify this feeling and perhaps set an intention to carry this light into the rest of your week.",
-            "breathing_exercise": "The Joyful Expansion: Take 3 quick, deep 'sip' inhales through your nose, then one long, audible 'Ahhh' exhale through your mouth.",
-            "focus_music": "Sunny Acoustic Vibes or Tropical Upbeat Instrumentals.",
-            "counselor_info": "Savoring joy is a vital mental health skill. You're doing great!",
-            "quote": "Joy is the simplest form of gratitude.",
-            "counselor_tips": ["Write down the exact trigger of this joy", "Share a compliment with someone", "Take a celebratory 5-minute dance break"]
-        }
-    elif mood_key == "sad":
-        analysis = {
-            "sentiment": -0.5, "emotion": "sad",
-            "suggestion": "I'm so sorry you're feeling this weight. It's completely valid to have low energy and feel blue. Be gentle with yourself tonight; you don't have to 'fix' this immediately.",
-            "breathing_exercise": "Heart-Centered Sighing: Place a hand on your heart. Inhale deeply, and let out a long, heavy sigh. Repeat until your shoulders drop.",
-            "focus_music": "Compassionate Cello or Soft Piano Melodies for processing.",
-            "counselor_info": "Gentleness is your strength right now. You are allowed to take up space with your sadness.",
-            "quote": "The soul would have no rainbow had the eyes no tears.",
-            "counselor_tips": ["Wrap yourself in a warm blanket", "Drink a glass of water slowly", "Listen to one song that validates your feelings"]
-        }
-    elif mood_key == "anxious":
-        analysis = {
-            "sentiment": -0.4, "emotion": "anxiety",
-            "suggestion": "When the mind races, we must anchor the body. You are safe in this moment. The future hasn't happened yet, and you have survived 100% of your hardest days.",
-            "breathing_exercise": "4-7-8 Internal Anchor: Inhale for 4s, Hold for 7s (the reset), Exhale slowly for 8s through pursed lips.",
-            "focus_music": "Weightless Ambient (Marconi Union style) or 528Hz Solfeggio frequencies.",
-            "counselor_info": "Anxiety is often just a smoke detector that's a bit too sensitive. You are safe.",
-            "quote": "No amount of anxiety makes any difference to anything that is going to happen.",
-            "counselor_tips": ["5-4-3-2-1 Sensory Grounding", "Splash cold water on your face", "Limit caffeine for the next few hours"]
-        }
-    elif mood_key == "stressed":
-        analysis = {
-            "sentiment": -0.3, "emotion": "stress",
-            "suggestion": "The load feels heavy because you're doing important work. Let's move from 'overwhelmed' to 'one small step'. What is the absolute simplest thing you can do next?",
-            "breathing_exercise": "Tactical Box Breathing: Inhale 4, Hold 4, Exhale 4, Hold 4. This is used by professionals to regain clarity under pressure.",
-            "focus_music": "Lo-fi Study Beats (60 BPM) or Alpha Wave Binaural Beats.",
-            "counselor_info": "Stress is energy. Let's redirect it into manageable micro-tasks.",
-            "quote": "It's not the load that breaks you, it's the way you carry it.",
-            "counselor_tips": ["Clear your immediate workspace", "Write a 3-item To-Do list", "Take 2 minutes to stretch your neck and back"]
-        }
-    elif mood_key == "focus":
-        analysis = {
-            "sentiment": 0.4, "emotion": "focus",
-            "suggestion": "You're in the zone! This state of flow is where your best version emerges. Let's protect this clarity and ensure you have everything you need to keep going.",
-            "breathing_exercise": "Cognitive Clarity Breath: Quick, sharp inhales through the nose followed by powerful, focused exhales to oxygenate your brain.",
-            "focus_music": "40Hz Gamma Binaural Beats or Deep Focus Techno (Minimal).",
-            "counselor_info": "Flow is a peak human experience. Guard your focus from distractions.",
-            "quote": "Focus is a matter of deciding what things you're not going to do.",
-            "counselor_tips": ["Put your phone in another room", "Set a 25-minute Pomodoro timer", "Clear any open tabs you don't need"]
-        }
-    elif mood_key == "calm":
-        analysis = {
-            "sentiment": 0.5, "emotion": "calm",
-            "suggestion": "This serenity is your natural state. Carry this peace with you; it is a reservoir you can return to whenever the world feels chaotic.",
-            "breathing_exercise": "Ocean Breath (Ujjayi): Constrict the back of your throat slightly, making a soft 'ocean' sound as you breathe in and out slowly.",
-            "focus_music": "Zen Garden Ambience or Nature Sounds (Birds and Streams).",
-            "counselor_info": "Peace is not the absence of trouble, but the presence of stillness.",
-            "quote": "Within you, there is a stillness and a sanctuary.",
-            "counselor_tips": ["Observe your breath for 10 cycles", "Note one thing that brought you peace", "Walk slowly and feel your feet on the ground"]
-        }
+async def read_body(request: Request):
+    """Stream a raw request body into a buffer sized from Content-Length."""
+    try:
+        length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if length > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    buf = bytearray(length)
+    pos = 0
+    async for chunk in request.stream():
+        end = pos + len(chunk)
+        if end > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Upload too large")
+        if end > len(buf):  # chunked upload without (or with a wrong) Content-Length
+            buf.extend(bytes(end - len(buf)))
+        buf[pos:end] = chunk
+        pos = end
+    del buf[pos:]
+    return buf
+
+def read_upload(upload: Optional[UploadFile]):
+    """Copy a multipart part straight out of its spool file into one preallocated buffer."""
+    if upload is None:
+        return None
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Upload too large")
+    upload.file.seek(0)
+    buf = bytearray(size)
+    upload.file.readinto(buf)
+    return buf
+
+def split_data_url(value):
+    return value.split(",", 1)[1] if "," in value else value
+
+@app.post("/analyze-multi-modal")
+async def analyze_multi_modal(data: MultiModalInput):
+    try:
+        with metrics.span("base64_decode"):
+            image_bytes = base64.b64decode(split_data_url(data.image))
+    except Exception as e:
+        print(f"Multi-modal Error: {e}")
+        return {"mood": "neutral", "quote": "I'm here for you.", "desc": "Technical glitch, but your peace remains."}
+    audio_bytes = None
+    if data.audio:
+        try:
+            with metrics.span("base64_decode"):
+                audio_bytes = base64.b64decode(data.audio)
+        except Exception as ae:
+            print(f"Audio Analysis Error: {ae}")
+    return await multi_modal_mood(image_bytes, audio_bytes)
+
+@app.post("/analyze-multi-modal/upload")
+async def analyze_multi_modal_upload(image: UploadFile = File(...), audio: Optional[UploadFile] = File(None)):
+    # Binary multipart variant: no base64 inflation, no JSON parse, no string copies
+    return await multi_modal_mood(read_upload(image), read_upload(audio))
+
+@app.post("/analyze-visual")
+async def analyze_visual(data: dict):
+    image_data = data.get("image")
+    if not image_data or "," not in image_data:
+        return {"mood": "neutral", "quote": "I couldn't catch that expression.", "desc": "Try adjusting your lighting or position."}
+    try:
+        with metrics.span("base64_decode"):
+            binary_data = base64.b64decode(split_data_url(image_data))
+    except Exception as e:
+        print(f"Visual Analysis Error: {e}")
+        return {"mood": "neutral", "quote": "Technical glitches happen, but your peace remains.", "desc": "I'm still here for you."}
+    return await visual_mood(binary_data)
+
+@app.post("/analyze-visual/upload")
+async def analyze_visual_upload(request: Request):
+    # Accepts either multipart/form-data with an "image" part or a raw image/octet-stream body
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("image")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=422, detail="Expected an 'image' file part")
+        image_bytes = read_upload(upload)
     else:
-        # Generic fallback if mood is unknown
-        analysis = {
-            "sentiment": 0.0, "emotion": "neutral",
-            "suggestion": f"I'm listening closely to your reflection on feeling {entry.overall_mood}. Let's explore these feelings together and find a path forward.",
-            "breathing_exercise": "Simple Mindful Breathing: Just notice the inhale and notice the exhale.",
-            "focus_music": "Neutral lo-fi piano.",
-            "counselor_info": "Your reflections are the first step to understanding.",
-            "quote": "To know thyself is the beginning of wisdom.",
-            "counselor_tips": ["Close your eyes for 30s", "Lower your gaze", "Take a slow sip of tea"]
+        image_bytes = await read_body(request)
+    if not image_bytes:
+        return {"mood": "neutral", "quote": "I couldn't catch that expression.", "desc": "Try adjusting your lighting or position."}
+    return await visual_mood(image_bytes)
+
+LIVE_AUDIO_INTERVAL = float(os.getenv("AURA_LIVE_AUDIO_INTERVAL", 1.0))
+
+class LiveMoodSession:
+    """Running fused mood estimate for one /ws/mood connection.
+
+    Only the newest camera frame is analysed (older ones waiting behind an
+    in-flight analysis are dropped), and the growing audio recording is
+    re-analysed at most once per LIVE_AUDIO_INTERVAL until it reaches the
+    analysis cap, so a chatty client cannot queue up redundant work.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.visual_mood = "neutral"
+        self.audio_features = None
+        self.audio = bytearray()
+        self.audio_dirty = False
+        self.audio_done = False
+        self.audio_error = None # sent with the next message, then cleared
+        self.next_frame = None
+        self.visual_task = None
+        self.audio_task = None
+        self.sent = None
+        self.quote_data = None
+        self.send_lock = asyncio.Lock()
+
+    def add_frame(self, frame):
+        if not VISUAL_ENGINE or not inference_pool.running:
+            return
+        self.next_frame = frame
+        if self.visual_task is None or self.visual_task.done():
+            self.visual_task = asyncio.create_task(self._visual_loop())
+
+    def add_audio(self, chunk):
+        if self.audio_done or len(self.audio) + len(chunk) > MAX_UPLOAD_BYTES:
+            return
+        self.audio += chunk
+        self.audio_dirty = True
+        if AUDIO_ENGINE and (self.audio_task is None or self.audio_task.done()):
+            self.audio_task = asyncio.create_task(self._audio_loop())
+
+    async def _visual_loop(self):
+        while self.next_frame is not None:
+            frame, self.next_frame = self.next_frame, None
+            try:
+                face = await asyncio.to_thread(preprocess.face_input, frame)
+                if face is None:
+                    continue
+                with metrics.span("emotion_model"):
+                    raw_mood = await inference_batcher.dominant_emotion(face)
+                self.visual_mood = EMOTION_MAP.get(raw_mood, "neutral")
+            except PoolSaturated:
+                continue # drop this frame; a newer one will come along
+            except Exception as e:
+                print(f"Live Visual Error: {e}")
+                continue
+            await self.publish()
+
+    async def _audio_loop(self):
+        while self.audio_dirty and not self.audio_done:
+            self.audio_dirty = False
+            try:
+                with metrics.span("audio_features"):
+                    self.audio_features = await analyze_audio(bytes(self.audio))
+                self.audio_done = self.audio_features["duration"] >= audio.AUDIO_MAX_SECONDS
+            except PoolSaturated:
+                self.audio_dirty = True # busy, not broken; try again next interval
+            except Exception as ae:
+                print(f"Live Audio Error: {ae}")
+                # More chunks won't make the recording decodable, and every retry would decode the
+                # whole growing buffer again; stop analysing it and tell the client once
+                self.audio_done = True
+                self.audio = bytearray()
+                self.audio_error = "voice analysis unavailable for this recording"
+            await self.publish()
+            # Let chunks pile up for a moment so each decode covers several of them
+            await asyncio.sleep(LIVE_AUDIO_INTERVAL)
+
+    async def publish(self):
+        audio_mood = audio.audio_mood(self.audio_features, self.visual_mood) if self.audio_features else "neutral"
+        final_mood = fuse_moods(self.visual_mood, audio_mood)
+        state = (final_mood, self.visual_mood, audio_mood)
+        error, self.audio_error = self.audio_error, None
+        if state == self.sent and error is None:
+            return
+        if self.sent is None or self.sent[0] != final_mood:
+            self.quote_data = random.choice(MOOD_QUOTES.get(final_mood, MOOD_QUOTES["neutral"]))
+        self.sent = state
+        message = {
+            "mood": final_mood,
+            "visual_mood": self.visual_mood,
+            "audio_mood": audio_mood,
+            "audio_features": self.audio_features,
+            "quote": f"\"{self.quote_data['quote']}\" — {self.quote_data['author']}",
+            "desc": self.quote_data['desc']
         }
+        if error is not None:
+            message["audio_error"] = error
+        async with self.send_lock:
+            await self.websocket.send_json(message)
 
-    # Apply Aura Shield Override if Critical
-    if is_critical:
-        analysis["sentiment"] = -1.0
-        analysis["is_critical"] = True
-        analysis["emergency_contacts"] = emergency_contacts
-        analysis["suggestion"] = "I hear how much pain you are in, and I want you to know that you are not alone. Your life has immense value, and there is support available right now to help you through this peak moment of darkness. Please reach out to one of the professionals below immediately—they are trained to listen and help you find a way forward safely."
-        analysis["breathing_exercise"] = "The Anchor Breath (Immediate Grounding): Feel your feet flat on the floor. Inhale for 5 seconds, hold for 2, and exhale for 7. Focus purely on the sensation of your feet on the ground. Repeat and reach for help."
-        analysis["quote"] = "Your story isn't over yet; the world still needs the light that only you can bring."
-        analysis["counselor_tips"] = ["Call an emergency contact immediately", "Distance yourself from any harmful objects", "Stay on the phone with a trusted person until help arrives"]
-
-    # Keyword-based Contextual Overrides
-    text_lower = combined_text.lower()
-    
-    # Only override with academic stress if the user isn't already happy
-    if mood_key not in ["happy", "calm", "focus"]:
-        if any(k in text_lower for k in ["exam", "test", "study", "project", "assignment"]):
-            analysis["suggestion"] = f"Academic pressure can definitely weigh on you. Remember that your worth is not defined by grades or {next((k for k in ['exam', 'test', 'study', 'project', 'assignment'] if k in text_lower), 'study levels')}. You have the tools to handle this."
-            analysis["emotion"] = "stress"
-            analysis["breathing_exercise"] = "Tactical Focus: Inhale 4s, Hold 2s, Exhale 6s."
-    
-    if any(k in text_lower for k in ["alone", "lonely", "argument", "fight"]):
-        if mood_key != "happy":
-            analysis["suggestion"] = "Social interactions and feelings of isolation can be deeply challenging. Your need for connection is valid, and it's okay to feel this way."
-            analysis["emotion"] = "sad"
-            analysis["breathing_exercise"] = "Heart-Centered Sigh: Inhale joy, exhale the weight."
-
-    import time
-    max_retries = 2
-    for attempt in range(max_retries):
+    def close(self):
+        for task in (self.visual_task, self.audio_task):
+            if task is not None:
+                task.cancel()
+
+@app.websocket("/ws/mood")
+async def live_mood(websocket: WebSocket):
+    # Binary messages: b"I" + encoded camera frame, or b"A" + the next MediaRecorder chunk
+    await websocket.accept()
+    session = LiveMoodSession(websocket)
+    try:
+        while True:
+            message = await websocket.receive_bytes()
+            kind, payload = message[:1], message[1:]
+            if kind == b"I":
+                session.add_frame(payload)
+            elif kind == b"A":
+                session.add_audio(payload)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
+
+@app.get("/inference/stats")
+def inference_stats():
+    return {
+        "running": inference_pool.running,
+        "workers": inference_pool.size,
+        "queue_depth": inference_pool.queue_depth,
+        "pending_frames": inference_pool.pending,
+        "batch_max_size": inference_batcher.max_size,
+        "batch_max_wait_ms": inference_batcher.max_wait * 1000,
+        "histograms": metrics.snapshot()
+    }
+
+def queued_enrichment_jobs():
+    db = SessionLocal()
+    try:
+        return db.query(EnrichmentJob).filter(EnrichmentJob.status == "queued").count()
+    finally:
+        db.close()
+
+# Read from live state when /metrics is scraped, so they cost nothing per request
+metrics.gauge("aura_inference_frames_pending", "Frames queued or running in the inference pool", fn=lambda: inference_pool.pending)
+metrics.gauge("aura_gemini_in_flight", "Gemini calls currently in flight", fn=lambda: gemini.in_flight)
+metrics.gauge("aura_gemini_breaker_open", "1 while the Gemini circuit breaker is open or half-open", fn=lambda: int(gemini.breaker.state != "closed"))
+metrics.gauge("aura_enrichment_jobs_queued", "Background enrichment jobs waiting for a worker", fn=queued_enrichment_jobs)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def user_history(entry):
+    """The user's rolling summary for the prompt (see summaries.py); a single primary-key read."""
+    if not entry.user_phone or summaries.CONTEXT_TOKENS <= 0:
+        return ""
+
+    def read():
+        db = SessionLocal()
         try:
-            response = model.generate_content(prompt)
-            text = response.text
-            text = text.replace("```json", "").replace("```", "").strip()
-            import json
-            analysis_res = json.loads(text)
-            
-            # Ensure AI doesn't give same generic stuff
-            if len(analysis_res.get("suggestion", "")) > 10:
-                analysis.update(analysis_res)
-            break 
-        except Exception as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                time.sleep(2) 
-                continue
-            with open("ai_error.log", "a") as f:
-                f.write(f"[{datetime.datetime.now()}] AI Error on attempt {attempt+1}: {str(e)}\n")
+            return summaries.context(db, entry.user_phone)
+        finally:
+            db.close()
+
+    with metrics.span("history_read"):
+        return await asyncio.to_thread(read)
+
+async def ai_analysis(entry, cacheable=True):
+    """Gemini's tailored counselling JSON for an entry and the tier that served it ("cache" or "gemini"),
+    or (None, "default") if it is unavailable."""
+    history = await user_history(entry)
+    # An answer that draws on one user's history must never be served to another, and its summary's
+    # counters change with every entry, so the same user would never hit it either
+    key = cache_key(entry) if CACHE_ENABLED and cacheable and not history else None
+    if key:
+        with metrics.span("cache_lookup"):
+            cached = response_cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+    with metrics.span("prompt_build"):
+        prompt = counsel.build_prompt(entry, history)
+    try:
+        with metrics.span("gemini"):
+            analysis_res = await gemini.generate_json(prompt)
+    except CircuitOpen:
+        FALLBACKS["breaker_open"].inc()
+        return None, "default" # Gemini is known to be down; serve the mood defaults without waiting on it
+    except Exception as e:
+        FALLBACKS["error"].inc()
+        with open("ai_error.log", "a") as f:
+            f.write(f"[{datetime.datetime.now()}] AI Error: {str(e)}\n")
+        return None, "default"
+    if key and len(analysis_res.get("suggestion", "")) > 10:
+        response_cache.put(key, analysis_res)
+    return analysis_res, "gemini"
+
+# Entries that fell back to the mood defaults because Gemini was unavailable, by cause
+FALLBACKS = {reason: metrics.counter("aura_counsel_fallbacks_total", "Entries served the mood defaults instead of Gemini", reason=reason)
+             for reason in ("breaker_open", "error")}
+
+# Latency of each counselling tier as the user sees it; the counts show how many entries each tier served
+TIER_SECONDS = {tier: metrics.histogram(f"aura_counsel_{tier}_seconds", f"Journal entries answered by the {tier} tier", (0.001, 0.005, 0.025, 0.1, 0.5, 1, 2.5, 5, 10, 30))
+                for tier in ("local", "cache", "gemini", "default")}
+
+def local_prediction(entry, is_critical):
+    """The local model's sentiment/emotion if it is confident enough to skip Gemini, else None."""
+    if is_critical:
+        return None # Aura Shield entries always get Gemini's full attention
+    with metrics.span("local_model"):
+        prediction = local_model.classify(entry)
+    return prediction if prediction.confidence >= local_model.LOCAL_TIER_THRESHOLD else None
+
+async def counsel_entry(entry, analysis, is_critical):
+    """Fill in `analysis` (the mood defaults) from the cheapest tier that can answer; returns that tier."""
+    started = time.perf_counter()
+    prediction = local_prediction(entry, is_critical)
+    if prediction is not None:
+        analysis.update(sentiment=prediction.sentiment, emotion=prediction.emotion)
+        tier = "local"
+    else:
+        analysis_res, tier = await ai_analysis(entry, cacheable=not is_critical)
+        # Ensure AI doesn't give same generic stuff
+        if analysis_res and len(analysis_res.get("suggestion", "")) > 10:
+            analysis.update(analysis_res)
+    TIER_SECONDS[tier].observe(time.perf_counter() - started)
+    return tier
 
-    import json
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+def apply_analysis(db_entry, analysis):
+    db_entry.sentiment_score = float(analysis.get("sentiment", 0.0))
+    db_entry.emotion = str(analysis.get("emotion", analysis["emotion"]))
+    db_entry.suggestion = str(analysis.get("suggestion", analysis["suggestion"]))
+    db_entry.breathing_exercise = str(analysis.get("breathing_exercise", analysis["breathing_exercise"]))
+    db_entry.focus_music = str(analysis.get("focus_music", analysis["focus_music"]))
+    db_entry.counselor_info = str(analysis.get("counselor_info", analysis["counselor_info"]))
+    db_entry.quote = str(analysis.get("quote", analysis["quote"]))
+    db_entry.counselor_tips = json.dumps(analysis.get("counselor_tips", analysis["counselor_tips"]))
+
+def new_journal_entry(entry, analysis, enrichment_status="complete", analysis_tier=None):
     db_entry = JournalEntry(
         content=entry.triggers,
         reflection_date=entry.reflection_date,
@@ -433,34 +644,328 @@ async def create_entry(entry: EntryCreate, db: Session = Depends(get_db)):
         user_age=entry.user_age,
         user_gender=entry.user_gender,
         user_phone=entry.user_phone,
-        sentiment_score=float(analysis.get("sentiment", 0.0)),
-        emotion=str(analysis.get("emotion", analysis["emotion"])),
-        suggestion=str(analysis.get("suggestion", analysis["suggestion"])),
-        breathing_exercise=str(analysis.get("breathing_exercise", analysis["breathing_exercise"])),
-        focus_music=str(analysis.get("focus_music", analysis["focus_music"])),
-        counselor_info=str(analysis.get("counselor_info", analysis["counselor_info"])),
-        quote=str(analysis.get("quote", analysis["quote"])),
-        counselor_tips=json.dumps(analysis.get("counselor_tips", analysis["counselor_tips"]))
+        enrichment_status=enrichment_status,
+        analysis_tier=analysis_tier
     )
-    
-    db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+    apply_analysis(db_entry, analysis)
+    return db_entry
+
+@app.post("/journal/entries", response_model=EntryResponse)
+async def create_entry(entry: EntryCreate, background: bool = False, db: AsyncSession = Depends(get_async_db)):
+    analysis = counsel.default_analysis(entry)
+    is_critical = analysis.get("is_critical", False)
+    # background=true saves the mood defaults now and lets a worker add Gemini's response later,
+    # unless the local model can answer outright; Aura Shield (crisis) entries always take the synchronous path
+    enrich_later = False
+    if background and not is_critical:
+        prediction = local_prediction(entry, is_critical)
+        if prediction is not None:
+            analysis.update(sentiment=prediction.sentiment, emotion=prediction.emotion)
+            tier = "local"
+        else:
+            enrich_later, tier = True, None
+    else:
+        tier = await counsel_entry(entry, analysis, is_critical)
+
+    db_entry = new_journal_entry(entry, analysis, "pending" if enrich_later else "complete", tier)
+
+    def insert(session):
+        session.add(db_entry)
+        session.flush() # assigns db_entry.id and created_at
+        rollups.record(session, db_entry)
+        summaries.record(session, db_entry) # skips pending entries; enrich_entry folds them in once enriched
+        if enrich_later:
+            jobs.enqueue(session, db_entry.id, entry.model_dump_json())
+
+    # rollups and jobs take a sync Session; run_sync hands them one bound to this async transaction
+    with metrics.span("db_write"):
+        await db.run_sync(insert)
+        await db.commit()
+    if enrich_later:
+        enrichment_workers.notify()
+    await asyncio.to_thread(index_entry, db_entry.id, entry)
     
     # Return a response dictionary that includes the critical safety flags
     # We use model_validate to ensure it matches the Pydantic schema
     response_data = EntryResponse.model_validate(db_entry).model_dump()
-    response_data["is_critical"] = analysis.get("is_critical", False)
+    response_data["is_critical"] = is_critical
     response_data["emergency_contacts"] = analysis.get("emergency_contacts", [])
     
     return response_data
 
+def index_entry(entry_id, entry):
+    """Add a saved entry to the similar-entries index; a failure there must not fail the entry."""
+    if not vectors.VECTORS_ENABLED or not entry.user_phone:
+        return
+    try:
+        with metrics.span("vector_index"):
+            vectors.index.add(entry_id, entry.user_phone, vectors.entry_text(entry.triggers, entry.lessons))
+    except Exception as e:
+        with open("ai_error.log", "a") as f:
+            f.write(f"[{datetime.datetime.now()}] Vector index error: {str(e)}\n")
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/journal/entries/stream")
+async def create_entry_streaming(entry: EntryCreate):
+    """Like POST /journal/entries, but forwards each counselling field over SSE as soon as Gemini finishes it."""
+    analysis = counsel.default_analysis(entry)
+    is_critical = analysis.get("is_critical", False)
+
+    async def stream():
+        started = time.perf_counter()
+        if is_critical:
+            # Crisis resources go out before anything else
+            yield sse("shield", {"is_critical": True, "emergency_contacts": analysis["emergency_contacts"]})
+
+        prediction = local_prediction(entry, is_critical)
+        history = await user_history(entry) if prediction is None else ""
+        key = cache_key(entry) if CACHE_ENABLED and not is_critical and not history else None
+        analysis_res = None
+        if key and prediction is None:
+            with metrics.span("cache_lookup"):
+                analysis_res = response_cache.get(key)
+        if prediction is not None:
+            tier = "local"
+            analysis.update(sentiment=prediction.sentiment, emotion=prediction.emotion)
+            for field in ("sentiment", "emotion", "suggestion"):
+                yield sse("field", {"field": field, "value": analysis[field]})
+        elif analysis_res is not None:
+            tier = "cache"
+            for field, value in analysis_res.items():
+                yield sse("field", {"field": field, "value": value})
+        else:
+            tier = "gemini"
+            parser = JsonFieldStream()
+            streamed = {}
+            with metrics.span("prompt_build"):
+                prompt = counsel.build_prompt(entry, history)
+            try:
+                async for chunk in gemini.stream_text(prompt):
+                    for field, value in parser.feed(chunk):
+                        streamed[field] = value
+                        yield sse("field", {"field": field, "value": value})
+                analysis_res = streamed
+                if key and len(streamed.get("suggestion", "")) > 10:
+                    response_cache.put(key, streamed)
+            except CircuitOpen:
+                FALLBACKS["breaker_open"].inc()
+                tier = "default"
+            except Exception as e:
+                if not streamed:
+                    FALLBACKS["error"].inc()
+                with open("ai_error.log", "a") as f:
+                    f.write(f"[{datetime.datetime.now()}] AI Stream Error: {str(e)}\n")
+                analysis_res = streamed or None # keep whatever fields completed before the failure
+                tier = "gemini" if analysis_res else "default"
+        TIER_SECONDS[tier].observe(time.perf_counter() - started)
+
+        # Ensure AI doesn't give same generic stuff
+        if analysis_res and len(analysis_res.get("suggestion", "")) > 10:
+            analysis.update(analysis_res)
+
+        def save():
+            db = SessionLocal()
+            try:
+                db_entry = new_journal_entry(entry, analysis, analysis_tier=tier)
+                db.add(db_entry)
+                rollups.record(db, db_entry)
+                summaries.record(db, db_entry)
+                db.commit()
+                db.refresh(db_entry)
+                index_entry(db_entry.id, entry)
+                return EntryResponse.model_validate(db_entry).model_dump(mode="json")
+            finally:
+                db.close()
+
+        with metrics.span("db_write"):
+            response_data = await asyncio.to_thread(save)
+        response_data["is_critical"] = is_critical
+        response_data["emergency_contacts"] = analysis.get("emergency_contacts", [])
+        yield sse("done", response_data)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def enrich_entry(job):
+    entry = EntryCreate.model_validate_json(job.payload)
+    analysis = counsel.default_analysis(entry)
+    analysis_res, tier = await ai_analysis(entry)
+    if analysis_res is None:
+        raise jobs.RetryLater("Gemini unavailable")
+    if len(analysis_res.get("suggestion", "")) > 10:
+        analysis.update(analysis_res)
+
+    def save():
+        db = SessionLocal()
+        try:
+            db_entry = db.get(JournalEntry, job.entry_id)
+            if db_entry is None:
+                return None # deleted while queued
+            apply_analysis(db_entry, analysis)
+            db_entry.enrichment_status = "complete"
+            db_entry.analysis_tier = tier
+            db.flush()
+            rollups.refresh(db, db_entry.created_at)
+            summaries.record(db, db_entry)
+            db.commit()
+            db.refresh(db_entry)
+            return EntryResponse.model_validate(db_entry).model_dump(mode="json")
+        finally:
+            db.close()
+
+    with metrics.span("db_write"):
+        data = await asyncio.to_thread(save)
+    return {"entry_id": job.entry_id, "enrichment_status": "complete" if data else "deleted", "entry": data}
+
+enrichment_workers = jobs.EnrichmentWorkers(enrich_entry)
+
+@app.get("/journal/entries/{entry_id}/status")
+def get_entry_status(entry_id: int, db: Session = Depends(get_db)):
+    db_entry = db.get(JournalEntry, entry_id)
+    if db_entry is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return {
+        "entry_id": entry_id,
+        "enrichment_status": db_entry.enrichment_status or "complete",
+        "entry": EntryResponse.model_validate(db_entry).model_dump(mode="json")
+    }
+
+SIMILAR_FIELDS = ["id", "reflection_date", "overall_mood", "content", "strategies", "lessons_learned", "sentiment_score", "emotion"]
+
+def similar_entries(db, user_phone, vector, k, exclude_id=None):
+    k = max(1, min(k, 50))
+    with metrics.span("vector_search"):
+        hits = vectors.index.similar(user_phone, vector, k, exclude_id)
+    if not hits:
+        return []
+    with metrics.span("db_read"):
+        rows = {row.id: row for row in db.query(*(getattr(JournalEntry, name) for name in SIMILAR_FIELDS))
+                .filter(JournalEntry.id.in_([entry_id for entry_id, _ in hits])).all()}
+    # strategies and sentiment_score show what the user tried last time and how the entry came out
+    return [dict({name: getattr(rows[entry_id], name) for name in SIMILAR_FIELDS}, similarity=round(score, 4))
+            for entry_id, score in hits if entry_id in rows]
+
+@app.get("/journal/entries/{entry_id}/similar")
+def get_similar_entries(entry_id: int, k: int = 5, db: Session = Depends(get_db)):
+    """The same user's past entries that read most like this one, closest first."""
+    db_entry = db.get(JournalEntry, entry_id)
+    if db_entry is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    if not db_entry.user_phone:
+        return []
+    vector = vectors.index.vector_of(entry_id, db_entry.user_phone)
+    if vector is None: # not indexed yet (e.g. imported); embedding it here is sub-millisecond
+        vector = vectors.embed(vectors.entry_text(db_entry.content, db_entry.lessons_learned))
+    return similar_entries(db, db_entry.user_phone, vector, k, exclude_id=entry_id)
+
+@app.post("/journal/similar")
+def find_similar_entries(query: SimilarQuery, db: Session = Depends(get_db)):
+    """Past entries of `user_phone` that read like `text`, e.g. a draft being written."""
+    return similar_entries(db, query.user_phone, vectors.embed(query.text), query.k)
+
+@app.get("/journal/events")
+async def journal_events(request: Request, entry_id: Optional[int] = None):
+    """Server-Sent Events feed of background enrichment completions."""
+    queue = enrichment_workers.subscribe()
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if entry_id is None or event["entry_id"] == entry_id:
+                    yield sse("enrichment", event)
+        finally:
+            enrichment_workers.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+ENTRY_FIELDS = [name for name in EntryResponse.model_fields if hasattr(JournalEntry, name)]
+PAGE_DEFAULT = 100
+PAGE_MAX = 500
+
+def encode_cursor(created_at, entry_id):
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{entry_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), int(entry_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def json_dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=lambda o: o.isoformat()).encode()
+
 @app.get("/journal/entries", response_model=List[EntryResponse])
-def get_entries(db: Session = Depends(get_db)):
-    return db.query(JournalEntry).order_by(JournalEntry.created_at.desc()).all()
+def get_entries(limit: int = PAGE_DEFAULT, cursor: Optional[str] = None, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """Newest entries first, one page at a time.
+
+    Pass the X-Next-Cursor header of a page back as `cursor` to get the next one; `fields=id,emotion,...`
+    returns only those columns (list views can skip suggestion and counselor_tips).
+    """
+    limit = max(1, min(limit, PAGE_MAX))
+    names = ENTRY_FIELDS
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = set(names) - set(ENTRY_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # The cursor columns are always selected, but only returned if asked for
+    selected = list(dict.fromkeys(names + ["created_at", "id"]))
+    query = db.query(*(getattr(JournalEntry, name) for name in selected))
+    if cursor:
+        query = query.filter(tuple_(JournalEntry.created_at, JournalEntry.id) < tuple_(*decode_cursor(cursor)))
+    with metrics.span("db_read"):
+        rows = query.order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc()).limit(limit + 1).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    # Rows go straight to JSON; validating each through EntryResponse dominated large pages
+    with metrics.span("serialize"):
+        body = json_dumps([{name: getattr(row, name) for name in names} for row in rows])
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/journal/search")
+def search_entries(q: str, limit: int = 20, cursor: Optional[str] = None, match: str = "all", user_phone: Optional[str] = None,
+                   db: Session = Depends(get_db)):
+    """Entries whose text matches `q`, best match first, each with a highlighted snippet.
+
+    Every word must match unless match=any; a trailing * matches a prefix. Pages like /journal/entries:
+    pass the X-Next-Cursor header back as `cursor`.
+    """
+    if match not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="match must be 'all' or 'any'")
+    query = search.fts_query(q, match)
+    if not query:
+        raise HTTPException(status_code=400, detail="q has no searchable words")
+    after = None
+    if cursor:
+        try:
+            after = search.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = max(1, min(limit, PAGE_MAX))
+    with metrics.span("search"):
+        results, next_after = search.search(db, query, limit, after, user_phone)
+    headers = {"X-Next-Cursor": search.encode_cursor(*next_after)} if next_after else {}
+    with metrics.span("serialize"):
+        body = json_dumps(results)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+STATS_DEFAULT_BUCKET = {"day": "hour", "week": "day", "month": "day"}
 
 @app.get("/mood/stats")
-def get_mood_stats(range: str = "week", db: Session = Depends(get_db)):
+def get_mood_stats(range: str = "week", bucket: Optional[str] = None, db: Session = Depends(get_db)):
     # Calculate start date based on range
     now = datetime.datetime.utcnow()
     if range == "day":
@@ -472,30 +977,109 @@ def get_mood_stats(range: str = "week", db: Session = Depends(get_db)):
     else:
         start_date = now - datetime.timedelta(weeks=1)
 
-    entries = db.query(JournalEntry).filter(JournalEntry.created_at >= start_date).order_by(JournalEntry.created_at.asc()).all()
-    labels = [e.created_at.strftime("%Y-%m-%d %H:%M") for e in entries]
-    scores = [e.sentiment_score for e in entries]
-    return {"labels": labels, "scores": scores, "current_range": range}
+    bucket = bucket or STATS_DEFAULT_BUCKET.get(range, "day")
+    if bucket not in rollups.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(rollups.BUCKETS)}")
+    # One row per bucket from mood_rollups, however many entries the window holds
+    with metrics.span("db_read"):
+        points = rollups.series(db, bucket, start_date)
+    return {
+        "labels": [p["start"] for p in points],
+        "scores": [round(p["mean"], 3) for p in points],
+        "counts": [p["count"] for p in points],
+        "min": [p["min"] for p in points],
+        "max": [p["max"] for p in points],
+        "emotions": [p["emotions"] for p in points],
+        "current_range": range,
+        "bucket": bucket
+    }
+
+@app.get("/journal/export")
+def export_entries(format: str = "ndjson"):
+    """Every entry, streamed in id order one chunk at a time: NDJSON, or an Arrow IPC stream with format=arrow."""
+    if format == "ndjson":
+        return StreamingResponse(dataio.ndjson_chunks(), media_type="application/x-ndjson",
+                                 headers={"Content-Disposition": 'attachment; filename="aura-journal.ndjson"'})
+    if format == "arrow":
+        if dataio.pa is None:
+            raise HTTPException(status_code=501, detail="Arrow export needs pyarrow installed on the server")
+        return StreamingResponse(dataio.arrow_chunks(), media_type="application/vnd.apache.arrow.stream",
+                                 headers={"Content-Disposition": 'attachment; filename="aura-journal.arrows"'})
+    raise HTTPException(status_code=400, detail="format must be ndjson or arrow")
+
+def import_row(line, line_no):
+    try:
+        row = dataio.loads(line)
+    except ValueError: # json.JSONDecodeError and orjson.JSONDecodeError both are
+        raise HTTPException(status_code=400, detail=f"Line {line_no}: not valid JSON")
+    if not isinstance(row, dict):
+        raise HTTPException(status_code=400, detail=f"Line {line_no}: expected a JSON object")
+    return row
+
+@app.post("/journal/import")
+async def import_entries(request: Request, keep_ids: bool = False):
+    """Append NDJSON entries (as produced by /journal/export) from the request body, in executemany batches.
+
+    A malformed line is a 400 naming it; its chunk is not written, only the full chunks before it.
+    """
+    imported, buffer, chunk, line_no = 0, b"", [], 0
+    try:
+        async for data in request.stream():
+            *lines, buffer = (buffer + data).split(b"\n")
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    chunk.append(import_row(line, line_no))
+            if len(chunk) >= dataio.CHUNK_SIZE:
+                imported += await asyncio.to_thread(dataio.import_chunks, [chunk], keep_ids)
+                chunk = []
+        if buffer.strip():
+            chunk.append(import_row(buffer, line_no + 1))
+        if chunk:
+            imported += await asyncio.to_thread(dataio.import_chunks, [chunk], keep_ids)
+    except HTTPException as e:
+        if imported:
+            await asyncio.to_thread(dataio.rebuild_aggregates)
+            e.detail += f" ({imported} entries before it were imported)"
+        raise
+    await asyncio.to_thread(dataio.rebuild_aggregates)
+    return {"imported": imported}
 
 @app.delete("/data/clear")
 def clear_data(db: Session = Depends(get_db)):
     db.query(JournalEntry).delete()
+    db.query(EnrichmentJob).delete()
+    db.query(MoodRollup).delete()
+    db.query(UserSummary).delete()
     db.commit()
+    response_cache.clear()
+    vectors.index.clear()
     return {"message": "All entries deleted."}
 
 # Serve React App AFTER API routes
-# Mount the static directory
-app.mount("/assets", StaticFiles(directory="../frontend/dist/assets"), name="assets")
+# Built assets and the index.html shell are served from memory (see spa.py)
+@app.get("/assets/{path:path}")
+async def serve_asset(path: str, request: Request):
+    asset = spa.frontend.current().assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return spa.respond(asset, request)
+
+# First path segments owned by the API (plus anything under /api); the catch-all 404s these instead of returning the shell
+RESERVED_SEGMENTS = spa.reserved_segments(app.routes) | {"api"}
 
 # Catch-all route to serve index.html for client-side routing
 @app.get("/{full_path:path}", response_class=HTMLResponse)
-async def serve_react_app(full_path: str):
+async def serve_react_app(full_path: str, request: Request):
     # Don't intercept API calls or specific backend paths
-    if full_path.startswith("api/") or full_path.startswith("docs") or full_path.startswith("openapi.json") or full_path.startswith("journal/") or full_path.startswith("mood/") or full_path.startswith("analyze-multi-modal"):
+    if full_path.split("/", 1)[0] in RESERVED_SEGMENTS:
         raise HTTPException(status_code=404, detail="Not Found")
-    
-    with open("../frontend/dist/index.html", "r") as f:
-        return f.read()
+    shell = spa.frontend.current().shell
+    if shell is None:
+        raise HTTPException(status_code=404, detail="Frontend not built")
+    return spa.respond(shell, request)
+
+warmup.lifecycle.imported()
 
 if __name__ == "__main__":
     import uvicorn
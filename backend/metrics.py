@@ -0,0 +1,221 @@
+"""Tiny in-process metrics registry: counters, gauges and fixed-bucket histograms.
+
+Updating a metric is a lock and an add, and span() is two perf_counter()
+calls around a block, so handlers can be instrumented stage by stage without
+measurable cost. Series with labels share one name (one HELP/TYPE block);
+render() writes the registry in the Prometheus text format for GET /metrics.
+"""
+import bisect
+import threading
+import time
+
+REGISTRY = {}  # series name, e.g. aura_stage_seconds{stage="imdecode"} -> metric
+
+# Seconds buckets for per-stage spans: sub-millisecond decodes up to slow Gemini calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """(suffix, extra labels, value) tuples for render()."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labels=()):
+        super().__init__(name, doc, labels)
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [("", (), self.value)]
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Metric):
+    """A value that goes up and down; pass fn to read it from live state at scrape time instead."""
+    kind = "gauge"
+
+    def __init__(self, name, doc, labels=(), fn=None):
+        super().__init__(name, doc, labels)
+        self.value = 0
+        self.fn = fn
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+    def samples(self):
+        return [("", (), self.get())]
+
+    def snapshot(self):
+        return self.get()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, buckets, labels=()):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self):
+        running, out = 0, []
+        for le, n in zip(self.buckets + ("+Inf",), self.counts):
+            running += n
+            out.append((str(le), running))
+        return out
+
+    def snapshot(self):
+        return {"buckets": dict(self.cumulative()), "count": self.count, "sum": round(self.sum, 6)}
+
+    def samples(self):
+        samples = [("_bucket", (("le", le),), n) for le, n in self.cumulative()]
+        samples.append(("_sum", (), self.sum))
+        samples.append(("_count", (), self.count))
+        return samples
+
+
+def _register(cls, name, args, labels, **kwargs):
+    labels = tuple(sorted(labels.items()))
+    series = _series(name, labels)
+    metric = REGISTRY.get(series)
+    if metric is None:
+        metric = REGISTRY.setdefault(series, cls(name, *args, labels=labels, **kwargs))
+    return metric
+
+
+def counter(name, doc, **labels):
+    return _register(Counter, name, (doc,), labels)
+
+
+def gauge(name, doc, fn=None, **labels):
+    return _register(Gauge, name, (doc,), labels, fn=fn)
+
+
+def histogram(name, doc, buckets, **labels):
+    return _register(Histogram, name, (doc, buckets), labels)
+
+
+class Span:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+_stages = {}
+
+
+def span(stage):
+    """Times the enclosed block into aura_stage_seconds{stage=...}; works across awaits."""
+    stage_histogram = _stages.get(stage)
+    if stage_histogram is None:
+        stage_histogram = _stages.setdefault(stage, histogram(
+            "aura_stage_seconds", "Time spent in each request-handling stage", STAGE_BUCKETS, stage=stage))
+    return Span(stage_histogram)
+
+
+def snapshot():
+    return {series: metric.snapshot() for series, metric in list(REGISTRY.items())}
+
+
+def render():
+    """The whole registry in the Prometheus text exposition format (version 0.0.4)."""
+    families = {}
+    for metric in list(REGISTRY.values()):
+        families.setdefault(metric.name, []).append(metric)
+    lines = []
+    for name, members in families.items():
+        lines.append(f"# HELP {name} {members[0].doc}")
+        lines.append(f"# TYPE {name} {members[0].kind}")
+        for metric in members:
+            for suffix, extra, value in metric.samples():
+                lines.append(f"{_series(name + suffix, metric.labels + extra)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """ASGI middleware: requests in flight, and count and latency per route template, method and status."""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = gauge("aura_http_requests_in_flight", "HTTP requests currently being handled")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            self.in_flight.dec()
+            # The route template, not the raw path, so /journal/entries/{entry_id}/status is one series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            histogram("aura_http_request_seconds", "HTTP request latency by route", STAGE_BUCKETS,
+                      route=route, method=method).observe(time.perf_counter() - started)
+            counter("aura_http_responses_total", "HTTP responses by route and status",
+                    route=route, method=method, status=status).inc()
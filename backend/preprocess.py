@@ -0,0 +1,126 @@
+"""Cheap frame preprocessing that runs before the emotion model.
+
+Frames are decoded straight to grayscale at a reduced scale (libjpeg can skip
+most of the IDCT work for 1/2, 1/4 and 1/8 decodes), the largest face is
+found with OpenCV's Haar cascade and cropped to the emotion model's 48x48
+input. Frames without a face never reach the inference pool.
+"""
+import os
+
+import numpy as np
+
+import deps
+import metrics
+from inference import EMOTION_INPUT_SIZE
+
+FRAME_MAX_SIDE = int(os.getenv("AURA_FRAME_MAX_SIDE", 640))
+# The cascade is run on an even smaller copy; boxes are scaled back up for the crop
+DETECT_MAX_SIDE = int(os.getenv("AURA_DETECT_MAX_SIDE", 320))
+# "center" skips the cascade and crops the middle of the frame (load tests with synthetic frames)
+FACE_DETECTOR = os.getenv("AURA_FACE_DETECTOR", "haar")
+
+cv2 = None # imported on first use, so importing this module stays cheap
+_REDUCED_FLAGS = {}
+_cascade = None
+
+
+def _load_cv2():
+    global cv2
+    if cv2 is None:
+        module = deps.load("cv2")
+        if module is None:
+            raise RuntimeError("OpenCV is not installed")
+        _REDUCED_FLAGS.update({
+            1: module.IMREAD_GRAYSCALE,
+            2: module.IMREAD_REDUCED_GRAYSCALE_2,
+            4: module.IMREAD_REDUCED_GRAYSCALE_4,
+            8: module.IMREAD_REDUCED_GRAYSCALE_8,
+        })
+        cv2 = module
+    return cv2
+
+
+def _face_cascade():
+    global _cascade
+    if _cascade is None:
+        _cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    return _cascade
+
+
+def image_size(buf):
+    """Read (width, height) from a JPEG or PNG header without decoding pixels."""
+    data = memoryview(buf)
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        # SOFn markers carry the frame size (C4/C8/CC are DHT/JPG/DAC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[i + 7:i + 9], "big"), int.from_bytes(data[i + 5:i + 7], "big")
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def decode_gray(buf, max_side=FRAME_MAX_SIDE):
+    """Decode an encoded image to grayscale with its longest side bounded by max_side."""
+    _load_cv2()
+    nparr = np.frombuffer(buf, np.uint8)
+    size = image_size(buf)
+    factor = 1
+    if size:
+        longest = max(size)
+        for f in (1, 2, 4, 8):
+            factor = f
+            if longest / f <= max_side:
+                break
+    gray = cv2.imdecode(nparr, _REDUCED_FLAGS[factor])
+    if gray is None:
+        return None
+    longest = max(gray.shape[:2])
+    if longest > max_side:
+        scale = max_side / longest
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def largest_face(gray):
+    _load_cv2()
+    if FACE_DETECTOR == "center":
+        h, w = gray.shape[:2]
+        side = min(h, w) // 2
+        return (w - side) // 2, (h - side) // 2, side, side
+    scale = min(1.0, DETECT_MAX_SIDE / max(gray.shape[:2]))
+    small = gray if scale == 1.0 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    faces = _face_cascade().detectMultiScale(small, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+    if len(faces) == 0:
+        return None
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return tuple(int(round(v / scale)) for v in (x, y, w, h))
+
+
+def face_input(buf):
+    """Encoded frame -> (48, 48) float32 face crop in [0, 1], or None when no face is found."""
+    with metrics.span("imdecode"):
+        gray = decode_gray(buf)
+    if gray is None:
+        return None
+    with metrics.span("face_detect"):
+        box = largest_face(gray)
+    if box is None:
+        return None
+    x, y, w, h = box
+    face = gray[y:y + h, x:x + w]
+    face = cv2.resize(face, (EMOTION_INPUT_SIZE, EMOTION_INPUT_SIZE), interpolation=cv2.INTER_AREA)
+    return face.astype(np.float32) / 255.0
+
+
+def warm_up():
+    """Import OpenCV, load the cascade and push one blank frame through face_input()."""
+    _load_cv2()
+    _face_cascade()
+    face_input(cv2.imencode(".jpg", np.zeros((480, 640), np.uint8))[1].tobytes())
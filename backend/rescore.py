@@ -0,0 +1,144 @@
+"""Re-score stored sentiment_score/emotion with the current local model.
+
+Rows are read in id order, one chunk at a time, scored in a process pool and
+written back with executemany in short transactions, so memory stays bounded
+and the live API only ever waits on one small batch. Progress is saved to a
+checkpoint after every chunk is committed; rerunning the same command resumes
+where it stopped.
+
+    python rescore.py                      # entries the local tier answered
+    python rescore.py --all --workers 4    # every entry
+    python rescore.py --restart            # ignore the checkpoint
+
+Mood rollups and user summaries are rebuilt at the end (skip with --skip-rollups).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import local_model
+import rollups
+import summaries
+from database import SessionLocal, engine
+
+_model = None
+
+
+def _init_worker(lexicon_path):
+    global _model
+    _model = local_model.LocalModel.load(lexicon_path)
+
+
+def _score_chunk(rows):
+    results = []
+    for entry_id, content, strategies, lessons, mood in rows:
+        prediction = _model.predict(f"{content or ''} {strategies or ''} {lessons or ''}", (mood or "").lower())
+        results.append((prediction.sentiment, prediction.emotion, entry_id))
+    return results
+
+
+def read_chunks(conn, start_after, chunk_size, only_local):
+    where = "AND analysis_tier = 'local'" if only_local else ""
+    last_id = start_after
+    while True:
+        rows = conn.execute(
+            f"SELECT id, content, strategies, lessons_learned, overall_mood FROM journal_entries "
+            f"WHERE id > ? {where} ORDER BY id LIMIT ?", (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path) # atomic, so a crash never leaves a half-written checkpoint
+
+
+def write_results(conn, results, batch_size, pause):
+    for i in range(0, len(results), batch_size):
+        with conn: # one short transaction per batch
+            conn.executemany("UPDATE journal_entries SET sentiment_score = ?, emotion = ? WHERE id = ?", results[i:i + batch_size])
+        if pause:
+            time.sleep(pause) # let queued API writes in between batches
+
+
+def commit(conn, results, args, state):
+    write_results(conn, results, args.batch_size, args.pause_ms / 1000)
+    state["last_id"] = results[-1][2]
+    state["rows"] += len(results)
+    save_checkpoint(args.checkpoint, state)
+    return len(results)
+
+
+def report(done, remaining, started, state):
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0.0
+    eta = (remaining - done) / rate if rate else 0.0
+    print(f"{done}/{remaining} rows  {rate:,.0f} rows/s  last id {state['last_id']}  eta {eta:,.0f}s", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="re-score every entry, not just local-tier ones")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--chunk-size", type=int, default=2000, help="rows read and scored per task")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per write transaction")
+    parser.add_argument("--pause-ms", type=float, default=5, help="sleep between write transactions")
+    parser.add_argument("--checkpoint", default="rescore.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--skip-rollups", action="store_true")
+    args = parser.parse_args()
+
+    scope = "all" if args.all else "local"
+    state = {"last_id": 0, "rows": 0, "scope": scope}
+    if not args.restart and os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            saved = json.load(f)
+        if saved.get("scope") == scope:
+            state = saved
+            print(f"Resuming after id {state['last_id']} ({state['rows']} rows already done)")
+
+    # Same database as the API (AURA_DATABASE_URL)
+    conn = sqlite3.connect(engine.url.database, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    where = "AND analysis_tier = 'local'" if not args.all else ""
+    remaining = conn.execute(f"SELECT COUNT(*) FROM journal_entries WHERE id > ? {where}", (state["last_id"],)).fetchone()[0]
+    print(f"{remaining} entries to re-score with {args.workers} workers")
+
+    started, done = time.perf_counter(), 0
+    chunks = read_chunks(conn, state["last_id"], args.chunk_size, not args.all)
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(local_model.SENTIMENT_LEXICON_PATH,)) as pool:
+        # Keep at most two chunks per worker in flight so memory doesn't grow with the table
+        in_flight = []
+        for chunk in chunks:
+            in_flight.append(pool.submit(_score_chunk, chunk))
+            if len(in_flight) < args.workers * 2:
+                continue
+            done += commit(conn, in_flight.pop(0).result(), args, state)
+            report(done, remaining, started, state)
+        for future in in_flight:
+            done += commit(conn, future.result(), args, state)
+            report(done, remaining, started, state)
+
+    if not args.skip_rollups:
+        db = SessionLocal()
+        try:
+            rollups.rebuild(db) # both commit as they go
+            summaries.rebuild(db)
+        finally:
+            db.close()
+        print("Mood rollups and user summaries rebuilt")
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint) # finished; the next run starts from the top
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
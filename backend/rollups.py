@@ -0,0 +1,136 @@
+"""Hourly and daily mood rollups behind /mood/stats.
+
+Each new entry is folded into its hour and day rows in the same transaction
+as the insert, so the stats endpoint reads one row per bucket instead of
+every entry in the window. When a background enrichment changes an entry's
+sentiment, its two buckets are recomputed from journal_entries.
+
+--rebuild commits a few days of buckets at a time, so it can run next to the
+live API. Backfill an existing aura.db with:
+
+    python rollups.py --rebuild
+"""
+import argparse
+import datetime
+import json
+
+from sqlalchemy import text
+
+from database import SessionLocal, MoodRollup
+
+# Bucket -> SQLite strftime format of the bucket_start key (Python's strftime accepts the same codes)
+BUCKETS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+BUCKET_SPAN = {"hour": datetime.timedelta(hours=1), "day": datetime.timedelta(days=1)}
+REBUILD_ROWS = 20000
+
+_UPSERT = text("""
+    INSERT INTO mood_rollups (bucket, bucket_start, count, sentiment_sum, sentiment_min, sentiment_max, emotions)
+    VALUES (:bucket, :start, 1, :score, :score, :score, json_object(:emotion, 1))
+    ON CONFLICT (bucket, bucket_start) DO UPDATE SET
+        count = count + 1,
+        sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+        sentiment_min = MIN(sentiment_min, excluded.sentiment_min),
+        sentiment_max = MAX(sentiment_max, excluded.sentiment_max),
+        emotions = json_set(emotions, '$."' || :emotion || '"', COALESCE(json_extract(emotions, '$."' || :emotion || '"'), 0) + 1)
+""")
+
+# Per-emotion partial aggregates first, then one row per bucket with the histogram built by json_group_object
+_RECOMPUTE = """
+    INSERT OR REPLACE INTO mood_rollups (bucket, bucket_start, count, sentiment_sum, sentiment_min, sentiment_max, emotions)
+    SELECT :bucket, bucket_start, SUM(n), SUM(s), MIN(lo), MAX(hi), json_group_object(emotion, n)
+    FROM (
+        SELECT strftime(:fmt, created_at) AS bucket_start, COALESCE(emotion, 'unknown') AS emotion,
+               COUNT(*) AS n, SUM(sentiment_score) AS s, MIN(sentiment_score) AS lo, MAX(sentiment_score) AS hi
+        FROM journal_entries WHERE sentiment_score IS NOT NULL {where}
+        GROUP BY bucket_start, emotion
+    )
+    GROUP BY bucket_start
+"""
+
+
+def bucket_key(ts, bucket):
+    return ts.strftime(BUCKETS[bucket])
+
+
+def record(db, db_entry):
+    """Fold a new entry into its hour and day buckets; call before the caller commits."""
+    if db_entry.created_at is None:
+        db.flush() # fills the created_at default
+    if db_entry.sentiment_score is None:
+        return
+    for bucket in BUCKETS:
+        db.execute(_UPSERT, {
+            "bucket": bucket,
+            "start": bucket_key(db_entry.created_at, bucket),
+            "score": db_entry.sentiment_score,
+            "emotion": (db_entry.emotion or "unknown").replace('"', ""), # used inside a JSON path
+        })
+
+
+def refresh(db, created_at):
+    """Recompute the buckets an existing entry falls in, after its sentiment or emotion changed."""
+    for bucket, fmt in BUCKETS.items():
+        start = bucket_key(created_at, bucket)
+        lo = datetime.datetime.strptime(start, fmt)
+        db.query(MoodRollup).filter(MoodRollup.bucket == bucket, MoodRollup.bucket_start == start).delete()
+        # A created_at range (not strftime(created_at) = start) so the created_at index is used
+        db.execute(text(_RECOMPUTE.format(where="AND created_at >= :lo AND created_at < :hi")), {
+            "bucket": bucket, "fmt": fmt,
+            "lo": lo.strftime("%Y-%m-%d %H:%M:%S"), "hi": (lo + BUCKET_SPAN[bucket]).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+
+def rebuild(db, rows_per_commit=REBUILD_ROWS):
+    """Recompute every bucket, committing after each run of whole days holding about rows_per_commit entries.
+
+    Live inserts only ever wait for one such run, not for the whole table. A bucket a live insert
+    lands in is either already rebuilt (and the insert's upsert adds to it) or recomputed later.
+    """
+    start = ""
+    while True:
+        # The entry rows_per_commit into the run; the run ends with that entry's day
+        cut = db.execute(text("SELECT created_at FROM journal_entries WHERE created_at >= :start ORDER BY created_at LIMIT 1 OFFSET :n"),
+                         {"start": start, "n": rows_per_commit}).scalar()
+        end = None
+        if cut is not None:
+            end = (datetime.datetime.strptime(str(cut)[:10], "%Y-%m-%d") + BUCKET_SPAN["day"]).strftime("%Y-%m-%d")
+        rows = db.query(MoodRollup).filter(MoodRollup.bucket_start >= start)
+        where, params = "AND created_at >= :lo", {"lo": start}
+        if end is not None:
+            rows = rows.filter(MoodRollup.bucket_start < end)
+            where, params["hi"] = where + " AND created_at < :hi", end
+        rows.delete()
+        for bucket, fmt in BUCKETS.items():
+            db.execute(text(_RECOMPUTE.format(where=where)), {"bucket": bucket, "fmt": fmt, **params})
+        db.commit()
+        if end is None:
+            return
+        start = end
+
+
+def series(db, bucket, since):
+    rows = db.query(MoodRollup).filter(
+        MoodRollup.bucket == bucket, MoodRollup.bucket_start >= bucket_key(since, bucket)
+    ).order_by(MoodRollup.bucket_start).all()
+    return [{
+        "start": row.bucket_start,
+        "count": row.count,
+        "mean": row.sentiment_sum / row.count,
+        "min": row.sentiment_min,
+        "max": row.sentiment_max,
+        "emotions": json.loads(row.emotions),
+    } for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the mood_rollups table in aura.db")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every bucket from journal_entries")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+    db = SessionLocal()
+    try:
+        rebuild(db)
+        print(f"{db.query(MoodRollup).count()} rollup rows rebuilt")
+    finally:
+        db.close()
@@ -0,0 +1,153 @@
+"""Full-text search over journal entries (SQLite FTS5).
+
+journal_fts indexes the triggers (content), strategies, lessons and Aura's
+suggestion of every entry. It is created with its sync triggers by
+database.migrate() (see SEARCH_DDL), so search needs no extra write path.
+Results are ranked by bm25, with the user's own words weighted above the
+suggestion, and paged with a (score, id) keyset cursor. Snippets are built
+only for the rows on the page. user_phone is an indexed column as well, so
+a search within one user's entries is a doclist intersection, not a filter
+over everyone's matches. That match is by token ("555" would also match
+"+1 555 0199"), so it is only a prefilter: rows are kept by an exact
+user_phone comparison against journal_entries.
+
+Queries are plain words, all of which must match ("exam argument"); a
+trailing * matches a prefix ("procrast*"), and match=any needs only one.
+FTS5 operators in the input are not interpreted.
+
+Rebuild or compact the index of an existing aura.db with:
+
+    python search.py --rebuild
+    python search.py --optimize
+"""
+import argparse
+import base64
+import html
+import re
+import time
+
+from sqlalchemy import text
+
+from database import SessionLocal, SEARCH_COLUMNS
+
+# bm25 weight per SEARCH_COLUMNS entry, then user_phone; lower scores rank higher
+WEIGHTS = (1.0, 0.6, 0.6, 0.3, 0.0)
+SNIPPET_TOKENS = 16
+MAX_TERMS = 12
+
+_TERM = re.compile(r"\w+\*?")
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03" # placeholders, swapped for <mark> after escaping
+
+_bm25 = f"bm25(journal_fts, {', '.join(map(str, WEIGHTS))})"
+_TEXT_COLUMNS = "{" + " ".join(SEARCH_COLUMNS) + "}"
+
+
+def fts_query(q, match="all"):
+    """User input as an FTS5 query of quoted terms; "" if it has no words."""
+    terms = []
+    for term in _TERM.findall(q.lower())[:MAX_TERMS]:
+        word, prefix = term.rstrip("*"), term.endswith("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    if not terms:
+        return ""
+    return f"{_TEXT_COLUMNS} : ({(' OR ' if match == 'any' else ' ').join(terms)})"
+
+
+def for_user(query, user_phone):
+    """Narrow an fts_query() to the user's entries and any others sharing their phone's tokens; not exact on its own."""
+    return f'{query} AND user_phone : "{user_phone.replace(chr(34), chr(34) * 2)}"'
+
+
+def encode_cursor(score, entry_id):
+    return base64.urlsafe_b64encode(f"{score!r}|{entry_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(score, id), or ValueError."""
+    score, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return float(score), int(entry_id)
+
+
+def highlight(snippet):
+    return html.escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search(db, query, limit, after=None, user_phone=None):
+    """One page of matches, best first, and the (score, id) of the last one if there are more."""
+    params = {"q": query, "limit": limit + 1}
+    owner = ""
+    if user_phone is not None:
+        if not re.search(r"\w", user_phone):
+            return [], None
+        params["q"] = for_user(query, user_phone) # snippets below use the text-only query
+        params["phone"] = user_phone
+        owner = "JOIN journal_entries e ON e.id = journal_fts.rowid AND e.user_phone = :phone"
+    keyset = "1"
+    if after is not None:
+        keyset = "(score > :score OR (score = :score AND id > :id))"
+        params["score"], params["id"] = after
+    # bm25 has to be computed for every match to rank them; snippets are only built for the page
+    rows = db.execute(text(f"""
+        SELECT id, score FROM (
+            SELECT journal_fts.rowid AS id, {_bm25} AS score FROM journal_fts {owner} WHERE journal_fts MATCH :q
+        )
+        WHERE {keyset}
+        ORDER BY score, id LIMIT :limit
+    """), params).all()
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = (rows[-1].score, rows[-1].id)
+    if not rows:
+        return [], None
+
+    ids = [row.id for row in rows]
+    placeholders = ", ".join(f":id{i}" for i in range(len(ids)))
+    details = db.execute(text(f"""
+        SELECT e.id, e.created_at, e.reflection_date, e.overall_mood, e.emotion, e.sentiment_score, e.template_name,
+               snippet(journal_fts, -1, :open, :close, '…', {SNIPPET_TOKENS}) AS snippet
+        FROM journal_fts JOIN journal_entries e ON e.id = journal_fts.rowid
+        WHERE journal_fts MATCH :q AND journal_fts.rowid IN ({placeholders})
+    """), {"q": query, "open": _MARK_OPEN, "close": _MARK_CLOSE, **{f"id{i}": v for i, v in enumerate(ids)}}).mappings().all()
+    by_id = {row["id"]: row for row in details}
+    results = []
+    for row in rows:
+        detail = by_id.get(row.id)
+        if detail is None:
+            continue # deleted between the two queries
+        result = dict(detail)
+        result["snippet"] = highlight(result["snippet"] or "")
+        result["score"] = round(-row.score, 4) # bm25 is negative; report larger = better
+        results.append(result)
+    return results, next_after
+
+
+def rebuild(db):
+    db.execute(text("INSERT INTO journal_fts(journal_fts) VALUES ('rebuild')"))
+
+
+def optimize(db):
+    """Merge the index's b-trees into one; worth it after large imports."""
+    db.execute(text("INSERT INTO journal_fts(journal_fts) VALUES ('optimize')"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the journal_fts full-text index in aura.db")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every entry from journal_entries")
+    parser.add_argument("--optimize", action="store_true", help="merge the index segments")
+    args = parser.parse_args()
+    if not (args.rebuild or args.optimize):
+        parser.error("nothing to do (use --rebuild or --optimize)")
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if args.rebuild:
+            rebuild(db)
+        if args.optimize:
+            optimize(db)
+        db.commit()
+        print(f"journal_fts {'rebuilt' if args.rebuild else 'optimized'} in {time.perf_counter() - started:.1f}s "
+              f"({len(SEARCH_COLUMNS)} columns)")
+    finally:
+        db.close()
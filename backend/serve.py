@@ -0,0 +1,159 @@
+"""Multi-worker production server: load the models once, then fork the workers.
+
+`python main.py` (and uvicorn --workers, which spawns) would give every worker
+its own copy of the emotion model. Here the master process imports the app,
+builds the emotion model, loads OpenCV's face cascade and the lexicons, then
+forks --workers copies of itself. The workers all accept on one shared socket
+and share the preloaded weights copy-on-write. Each worker runs inference
+inline on its own threads (AURA_INFERENCE_MODE=inline), so no per-worker
+process pool reloads the model.
+
+Thread pools are pinned before anything numeric is imported: every worker gets
+--threads cores' worth of OpenMP/BLAS/TensorFlow intra-op threads (default:
+cores / workers), so N workers don't each start one thread per core. Nothing
+runs a forward pass before the fork; each worker's warm-up does that after,
+since TensorFlow's runtime threads don't survive fork().
+
+    python serve.py --workers 4 --port 8000
+    python bench_workers.py       # throughput and memory per worker count
+
+Metrics (/metrics, /readyz) are per worker process.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+              "TF_NUM_INTRAOP_THREADS")
+
+
+def pin_threads(threads):
+    # Must happen before numpy/OpenCV/TensorFlow are imported; their pools size themselves on import
+    for name in THREAD_ENV:
+        os.environ[name] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+
+
+def preload(threads):
+    """Everything a worker would otherwise load on its first request, minus any forward pass."""
+    import main
+    import deps
+    import inference
+    import keywords
+    import local_model
+    import preprocess
+    import spa
+    import vectors
+
+    started = time.perf_counter()
+    if main.VISUAL_ENGINE:
+        cv2 = deps.load("cv2")
+        cv2.setNumThreads(threads)
+        preprocess.warm_up()
+        if inference.EMOTION_BACKEND != "fake":
+            tf = deps.load("tensorflow")
+            if tf is not None:
+                tf.config.threading.set_intra_op_parallelism_threads(threads)
+                tf.config.threading.set_inter_op_parallelism_threads(1)
+        inference.load_model()
+    keywords.lexicon.current()
+    local_model.model()
+    spa.frontend.current() # the built app, read and compressed once for all workers
+    vectors.index.stats() # maps the similar-entries index and builds its per-user row lists
+    deps.load("google.generativeai") # import only; a configured client holds sockets that must not be shared
+    print(f"[serve] preloaded in {time.perf_counter() - started:.2f}s", flush=True)
+    return main.app
+
+
+def listen(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    import uvicorn
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=10)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AURA_SERVE_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int, help="compute threads per worker (default: cores / workers)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-preload", action="store_true", help="let each worker load its own models (to compare memory)")
+    args = parser.parse_args()
+
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    pin_threads(threads)
+    os.environ["AURA_INFERENCE_MODE"] = "inline"
+    os.environ.setdefault("AURA_INFERENCE_WORKERS", "1") # model threads per worker; each pass already uses `threads` cores
+
+    if args.no_preload:
+        import main as app_module
+        app = app_module.app
+    else:
+        app = preload(threads)
+    sock = listen(args.host, args.port)
+    # Move everything loaded so far out of the collector's reach, so collections in the workers
+    # don't write to (and un-share) the master's pages
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock, args.log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    print(f"[serve] {args.workers} workers x {threads} threads on {args.host}:{args.port} (master {os.getpid()})", flush=True)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        print(f"[serve] worker {pid} exited with status {status}, restarting", file=sys.stderr, flush=True)
+        if time.monotonic() - started < 1:
+            time.sleep(1) # don't spin if workers die on startup
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
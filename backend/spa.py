@@ -0,0 +1,149 @@
+"""In-memory serving of the built React app (frontend/dist).
+
+index.html and everything under dist/assets are read once into memory, each
+with a strong ETag and gzip/brotli variants: compressed once at load time, or
+taken from .gz/.br files the build already wrote next to the asset. brotli
+needs `pip install brotli` unless the build ships .br files. Requests then
+cost no disk I/O. The variant is picked from Accept-Encoding, and a matching
+If-None-Match gets a bodiless 304.
+
+Vite puts a content hash in every asset name (index-4f3c2a1b.js), so those
+are served with a year-long immutable Cache-Control. The shell is "no-cache":
+browsers revalidate it on each load and get a 304 until a new build lands.
+The dist directory is checked for changes at most every
+AURA_SPA_CHECK_SECONDS, and a rebuild is picked up without a restart.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from starlette.responses import Response
+
+DIST_DIR = os.getenv("AURA_FRONTEND_DIST", "../frontend/dist")
+SPA_CHECK_SECONDS = float(os.getenv("AURA_SPA_CHECK_SECONDS", 2))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# name-<hash>.ext as Vite emits it (8+ url-safe base64 characters)
+_HASHED = re.compile(r"-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$")
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/manifest+json")
+MIN_COMPRESS_BYTES = 512
+
+Asset = namedtuple("Asset", "body etag content_type cache_control variants") # variants: encoding -> bytes
+Bundle = namedtuple("Bundle", "shell assets stamp")
+
+
+def _load_asset(path, cache_control):
+    with open(path, "rb") as f:
+        body = f.read()
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+    variants = {}
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if os.path.exists(path + suffix): # precompressed by the build
+            with open(path + suffix, "rb") as f:
+                variants[encoding] = f.read()
+    if len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(_COMPRESSIBLE):
+        if "br" not in variants and brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+        if "gzip" not in variants:
+            variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    # Keep a variant only if it is actually smaller
+    variants = {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return Asset(body, etag, content_type, cache_control, variants)
+
+
+def _accepts(accept_encoding, encoding):
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() in (encoding, "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def respond(asset, request, status_code=200):
+    headers = {"ETag": asset.etag, "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or asset.etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    accept_encoding = request.headers.get("accept-encoding", "")
+    body = asset.body
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and _accepts(accept_encoding, encoding):
+            body = asset.variants[encoding]
+            headers["Content-Encoding"] = encoding
+            break
+    return Response(content=body, status_code=status_code, media_type=asset.content_type, headers=headers)
+
+
+class SPA:
+    """The current Bundle of dist/, rebuilt when index.html or the assets directory changes."""
+
+    def __init__(self, dist_dir=DIST_DIR, check_every=SPA_CHECK_SECONDS):
+        self.dist_dir = dist_dir
+        self.check_every = check_every
+        self.bundle = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stamp(self):
+        stamp = []
+        for path in (os.path.join(self.dist_dir, "index.html"), os.path.join(self.dist_dir, "assets")):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _load(self, stamp):
+        index = os.path.join(self.dist_dir, "index.html")
+        shell = _load_asset(index, REVALIDATE) if os.path.exists(index) else None
+        assets = {}
+        assets_dir = os.path.join(self.dist_dir, "assets")
+        for root, _, files in os.walk(assets_dir):
+            for name in files:
+                if name.endswith((".gz", ".br")) and name[:-3] in files:
+                    continue # a precompressed variant, served through its asset
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, assets_dir).replace(os.sep, "/")
+                assets[rel] = _load_asset(path, IMMUTABLE if _HASHED.search(name) else REVALIDATE)
+        return Bundle(shell, assets, stamp)
+
+    def current(self):
+        now = time.monotonic()
+        if self.bundle is not None and now - self.checked_at < self.check_every:
+            return self.bundle
+        with self._lock:
+            if self.bundle is None or now - self.checked_at >= self.check_every:
+                self.checked_at = now
+                stamp = self._stamp()
+                if self.bundle is None or stamp != self.bundle.stamp:
+                    self.bundle = self._load(stamp)
+        return self.bundle
+
+
+def reserved_segments(routes):
+    """First path segments that belong to the API; unknown paths under them 404 instead of getting the SPA shell."""
+    segments = set()
+    for route in routes:
+        path = getattr(route, "path", "").strip("/")
+        first = path.split("/", 1)[0]
+        if first and not first.startswith("{"):
+            segments.add(first)
+    return frozenset(segments)
+
+
+frontend = SPA()
@@ -0,0 +1,206 @@
+"""Rolling per-user context for the counselling prompt.
+
+Pasting a user's past entries into the Gemini prompt would make the prompt
+(and Gemini's latency) grow with their history. Instead, each user with a
+user_phone has one user_summaries row, a fixed-size state that is folded
+forward once per entry whose analysis is final:
+
+  trajectory  the last few moods with their sentiment, plus a moving average
+  triggers    recurring words from their triggers, weights decaying per entry
+  helped      strategies they used on entries that came out positive, or
+              that left them better off than their running average
+
+Only the top few triggers and strategies are kept, so a row stays under a
+kilobyte whatever the history. context() renders it for build_prompt in at
+most AURA_CONTEXT_TOKENS tokens (estimated at 4 characters per token).
+0 turns the context off.
+
+--rebuild writes a few hundred users per transaction, so it can run next to
+the live API. Backfill an existing aura.db with:
+
+    python summaries.py --rebuild
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+
+from sqlalchemy import func, or_
+
+from database import SessionLocal, JournalEntry, UserSummary
+from keywords import tokenize
+
+CONTEXT_TOKENS = int(os.getenv("AURA_CONTEXT_TOKENS", 160))
+
+RECENT_MOODS = 5
+TOP_TRIGGERS = 12
+TOP_STRATEGIES = 8
+DECAY = 0.85 # per entry, so a trigger from twenty entries ago weighs 4% of one from today
+EMA_ALPHA = 0.3
+USERS_PER_COMMIT = 200
+
+# What fold() reads, so a rebuild doesn't load whole entries
+_FOLD_COLUMNS = (JournalEntry.id, JournalEntry.user_phone, JournalEntry.created_at, JournalEntry.reflection_date,
+                 JournalEntry.overall_mood, JournalEntry.sentiment_score, JournalEntry.content, JournalEntry.strategies)
+
+# Too common in journal text to say anything about a trigger
+STOPWORDS = frozenset("""
+about after again also always because been before being could didn doesn don during every feel feeling feels felt
+from getting have having into just know like little made make many more most much myself need never only other
+really should some something still such than that their them then there these they thing things think this those
+through today tomorrow very want was were what when where which while will with would yesterday your
+""".split())
+
+_CLAUSES = re.compile(r"[,;.\n]+|\band\b|\bthen\b")
+
+
+def empty_state():
+    return {"mood_ema": None, "recent": [], "triggers": {}, "helped": {}}
+
+
+def trigger_terms(text):
+    return {t for t in tokenize(text or "") if len(t) >= 4 and t.isalpha() and t not in STOPWORDS}
+
+
+def strategy_phrases(text):
+    """Short normalized clauses of the strategies field ("went for a walk, called mom" -> two phrases)."""
+    phrases = set()
+    for clause in _CLAUSES.split((text or "").lower()):
+        words = clause.split()
+        if 0 < len(words) <= 8:
+            phrases.add(" ".join(words))
+    return phrases
+
+
+def _fold(weights, keys, keep):
+    weights = {k: w * DECAY for k, w in weights.items()}
+    for k in keys:
+        weights[k] = weights.get(k, 0.0) + 1.0
+    top = sorted(weights.items(), key=lambda kv: kv[1], reverse=True)[:keep]
+    return {k: round(w, 3) for k, w in top if w >= 0.05}
+
+
+def fold(state, db_entry):
+    """The state after one more entry; pure, so --rebuild replays entries through it."""
+    sentiment = db_entry.sentiment_score or 0.0
+    before = state["mood_ema"]
+    state = dict(state)
+    state["mood_ema"] = round(sentiment if before is None else before + EMA_ALPHA * (sentiment - before), 3)
+    day = db_entry.created_at.strftime("%Y-%m-%d") if db_entry.created_at else db_entry.reflection_date
+    state["recent"] = (state["recent"] + [[day, db_entry.overall_mood, round(sentiment, 2)]])[-RECENT_MOODS:]
+    state["triggers"] = _fold(state["triggers"], trigger_terms(db_entry.content), TOP_TRIGGERS)
+    helped = sentiment > 0 or (before is not None and sentiment > before)
+    state["helped"] = _fold(state["helped"], strategy_phrases(db_entry.strategies) if helped else (), TOP_STRATEGIES)
+    return state
+
+
+def record(db, db_entry):
+    """Fold an entry with its final analysis into its user's summary.
+
+    Call after the entry's own insert or update has been flushed: the transaction then already holds
+    SQLite's write lock, so concurrent writers can't interleave this read-modify-write.
+    """
+    if not db_entry.user_phone or db_entry.enrichment_status == "pending":
+        return
+    row = db.get(UserSummary, db_entry.user_phone)
+    if row is None:
+        row = UserSummary(user_phone=db_entry.user_phone, entry_count=0)
+        db.add(row)
+    row.state = json.dumps(fold(json.loads(row.state) if row.state else empty_state(), db_entry), separators=(",", ":"))
+    row.entry_count = (row.entry_count or 0) + 1
+    row.updated_at = datetime.datetime.utcnow()
+
+
+def render(state, entry_count, budget=CONTEXT_TOKENS):
+    """The summary as prompt lines, most important first, cut to fit `budget` tokens."""
+    max_chars = budget * 4
+    lines = []
+    if state["recent"]:
+        moods = ", ".join(f"{mood} ({sentiment:+.1f})" for _, mood, sentiment in state["recent"])
+        lines.append(f"- {entry_count} past entries; recent moods, oldest first: {moods}; running sentiment {state['mood_ema']:+.2f}")
+    if state["triggers"]:
+        lines.append("- Recurring triggers: " + ", ".join(state["triggers"]))
+    if state["helped"]:
+        lines.append("- Strategies that helped before: " + "; ".join(state["helped"]))
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > max_chars:
+            # Trailing items are the lowest weighted; drop them rather than the whole line
+            room = max_chars - len(text) - 1
+            cut = line[:room].rsplit(",", 1)[0] if room > 40 else ""
+            if cut:
+                text += cut + "\n"
+            break
+        text += line + "\n"
+    return text.rstrip("\n")
+
+
+def context(db, user_phone, budget=CONTEXT_TOKENS):
+    """Prompt text summarising the user's history, or "" for new or anonymous users."""
+    if not user_phone or budget <= 0:
+        return ""
+    row = db.get(UserSummary, user_phone)
+    if row is None or not row.state:
+        return ""
+    return render(json.loads(row.state), row.entry_count, budget)
+
+
+def rebuild(db, users_per_commit=USERS_PER_COMMIT):
+    """Recompute every summary, writing users_per_commit users per transaction.
+
+    The replay is a read, which doesn't block writers. Entries that record() folds into the live rows
+    meanwhile (new ones, and pending ones that get enriched) are caught up per batch, inside the batch's
+    write transaction, so none is lost or counted twice.
+    """
+    last_id = db.query(func.max(JournalEntry.id)).scalar() or 0
+    pending = {}
+    for entry_id, phone in db.query(JournalEntry.id, JournalEntry.user_phone).filter(
+            JournalEntry.user_phone.isnot(None), JournalEntry.enrichment_status == "pending"):
+        pending.setdefault(phone, []).append(entry_id)
+    skip = {entry_id for ids in pending.values() for entry_id in ids}
+    entries = db.query(*_FOLD_COLUMNS).filter(
+        JournalEntry.user_phone.isnot(None), JournalEntry.enrichment_status != "pending", JournalEntry.id <= last_id
+    ).order_by(JournalEntry.created_at, JournalEntry.id).yield_per(1000)
+    states, counts = {}, {}
+    for db_entry in entries:
+        if db_entry.id in skip:
+            continue # enriched after the query above; caught up below
+        phone = db_entry.user_phone
+        states[phone] = fold(states.get(phone) or empty_state(), db_entry)
+        counts[phone] = counts.get(phone, 0) + 1
+
+    # Users with a summary row but nothing replayed are covered too: their row goes, unless entries caught up
+    phones = sorted(set(states) | {phone for (phone,) in db.query(UserSummary.user_phone)})
+    db.commit()
+    for i in range(0, len(phones), users_per_commit):
+        batch = phones[i:i + users_per_commit]
+        db.query(UserSummary).filter(UserSummary.user_phone.in_(batch)).delete() # takes the write lock first
+        since = [entry_id for phone in batch for entry_id in pending.get(phone, ())]
+        late = db.query(*_FOLD_COLUMNS).filter(
+            JournalEntry.user_phone.in_(batch), JournalEntry.enrichment_status != "pending",
+            or_(JournalEntry.id > last_id, JournalEntry.id.in_(since))
+        ).order_by(JournalEntry.created_at, JournalEntry.id)
+        for db_entry in late:
+            phone = db_entry.user_phone
+            states[phone] = fold(states.get(phone) or empty_state(), db_entry)
+            counts[phone] = counts.get(phone, 0) + 1
+        now = datetime.datetime.utcnow()
+        db.add_all(UserSummary(user_phone=phone, entry_count=counts[phone], updated_at=now,
+                               state=json.dumps(states[phone], separators=(",", ":"))) for phone in batch if phone in states)
+        db.commit()
+    return len(states)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the user_summaries table in aura.db")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every user's summary from journal_entries")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+    db = SessionLocal()
+    try:
+        users = rebuild(db)
+        print(f"{users} user summaries rebuilt")
+    finally:
+        db.close()
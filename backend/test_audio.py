@@ -0,0 +1,36 @@
+import os
+import shutil
+
+import pytest
+
+import audio
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.mark.skipif(shutil.which(audio.FFMPEG) is None, reason="needs ffmpeg")
+def test_browser_webm_clip_decodes():
+    # 2.5 s of a gated 180 Hz tone, opus in webm with no duration or cues, as MediaRecorder writes it
+    with open(os.path.join(FIXTURES, "checkin.webm"), "rb") as f:
+        clip = f.read()
+    y = audio.load_clip(clip)
+    assert y.dtype == "float32"
+    assert abs(len(y) / audio.AUDIO_SAMPLE_RATE - 2.5) < 0.1
+    features = audio.extract_features(y)
+    assert features["energy"] > audio.SILENCE_RMS
+    assert 160 < features["pitch_mean"] < 200
+    assert features["pause_count"] >= 1 and features["voiced_ratio"] < 0.9
+
+
+@pytest.mark.skipif(shutil.which(audio.FFMPEG) is None, reason="needs ffmpeg")
+def test_truncated_webm_clip_decodes_what_arrived():
+    # /ws/mood decodes the recording while chunks are still arriving
+    with open(os.path.join(FIXTURES, "checkin.webm"), "rb") as f:
+        clip = f.read()
+    y = audio.load_clip(clip[:len(clip) // 2])
+    assert 0.5 < len(y) / audio.AUDIO_SAMPLE_RATE < 2.0
+
+
+def test_undecodable_clip_raises():
+    with pytest.raises(RuntimeError):
+        audio.load_clip(b"not audio at all" * 64)
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from cache import ResponseCache, cache_key
+
+
+def make_entry(**overrides):
+    fields = dict(template_name="General", overall_mood="Stressed", specific_emotions=["Anxious"], intensity=7,
+                  triggers="Exams next week", strategies="Went for a walk", lessons="Start earlier",
+                  user_age=19, user_gender="Female", user_phone=None)
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_key_ignores_wording_noise():
+    assert cache_key(make_entry()) == cache_key(make_entry(triggers="exams, next week!", overall_mood="stressed"))
+    assert cache_key(make_entry()) != cache_key(make_entry(intensity=2))
+
+
+def test_round_trip(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.db"))
+    answer = {"suggestion": "Break the revision into short blocks."}
+    cache.put(cache_key(make_entry()), answer)
+    assert cache.get(cache_key(make_entry())) == answer
+
+
+def test_personalised_answers_bypass_the_cache(monkeypatch, tmp_path):
+    import main
+    cache = ResponseCache(path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(main, "response_cache", cache)
+    monkeypatch.setattr(main, "CACHE_ENABLED", True)
+    calls = []
+
+    async def generate_json(prompt):
+        calls.append(prompt)
+        return {"suggestion": "Last time a walk helped; try it again before studying."}
+
+    async def user_history(entry):
+        return "- 3 past entries; recent moods, oldest first: Sad (-0.4), Calm (+0.2)" if entry.user_phone else ""
+
+    monkeypatch.setattr(main.gemini, "generate_json", generate_json)
+    monkeypatch.setattr(main, "user_history", user_history)
+    entry = make_entry(user_phone="5550100")
+    assert asyncio.run(main.ai_analysis(entry))[1] == "gemini"
+    assert asyncio.run(main.ai_analysis(entry))[1] == "gemini"
+    assert cache.get(cache_key(entry)) is None # not stored, so never served to another user
+    assert len(calls) == 2
+
+    anonymous = make_entry()
+    assert asyncio.run(main.ai_analysis(anonymous))[1] == "gemini"
+    assert asyncio.run(main.ai_analysis(anonymous))[1] == "cache"
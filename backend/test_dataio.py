@@ -0,0 +1,55 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal, JournalEntry
+
+client = TestClient(main.app)
+
+
+def ndjson(rows):
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def test_minimal_rows_get_defaults_and_page_through_the_listing():
+    rows = [{"content": f"minimal row {i}", "sentiment_score": 0.3} for i in range(5)]
+    response = client.post("/journal/import", content=ndjson(rows))
+    assert response.status_code == 200
+    assert response.json() == {"imported": 5}
+
+    db = SessionLocal()
+    try:
+        stored = db.query(JournalEntry).filter(JournalEntry.content.like("minimal row %")).all()
+        assert len(stored) == 5
+        assert all(e.created_at is not None and e.enrichment_status == "complete" for e in stored)
+    finally:
+        db.close()
+
+    # Page size 2, so page boundaries land on the imported rows
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "id,content"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/journal/entries", params=params)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert {e.id for e in stored} <= set(seen)
+    assert len(seen) == len(set(seen))
+
+
+def test_malformed_line_is_a_400_and_writes_nothing():
+    before = client.get("/journal/entries", params={"limit": 100, "fields": "id"}).json()
+    body = ndjson([{"content": "fine"}]) + b"{not json\n" + ndjson([{"content": "never reached"}])
+    response = client.post("/journal/import", content=body)
+    assert response.status_code == 400
+    assert "Line 2" in response.json()["detail"]
+
+    response = client.post("/journal/import", content=ndjson([{"content": "fine"}, ["a", "list"]]))
+    assert response.status_code == 400
+    assert "Line 2" in response.json()["detail"]
+    assert client.get("/journal/entries", params={"limit": 100, "fields": "id"}).json() == before
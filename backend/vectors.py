@@ -0,0 +1,274 @@
+"""Local "similar past reflections" index.
+
+Each entry's triggers and lessons are embedded on the CPU as a hashed bag of
+words, word pairs and character trigrams, with function words and journal
+boilerplate ("feel", "today") left out. Each feature is hashed with CRC32
+to one of AURA_VECTOR_DIM signed buckets, counts are log-scaled, and the
+vector is L2-normalised. The embedding needs no model file and no
+network, and is stable across processes and restarts.
+
+Vectors live in one float32 matrix, memory-mapped from aura.vectors.f32
+next to aura.db, with the entry id and a hash of user_phone for each row in
+aura.vectors.ids. aura.vectors.json holds the row count. Appends write
+the row and then publish the new count, under a file lock (msvcrt on Windows), so every worker
+process can append, and the others pick up new rows on their next search.
+Each process keeps a per-user array of row numbers. A search is one
+gathered matrix-vector product over the user's rows and an argpartition
+for the top k, so it costs the same whether the whole index holds
+thousands of entries or millions. Entries without a user_phone are not
+indexed.
+
+Fill the index for an existing aura.db (or after an import) with:
+
+    python vectors.py --rebuild
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+from database import SQLALCHEMY_DATABASE_URL, SessionLocal, JournalEntry
+from summaries import STOPWORDS
+
+VECTOR_DIM = int(os.getenv("AURA_VECTOR_DIM", 256))
+_db_path = SQLALCHEMY_DATABASE_URL.split("///", 1)[-1]
+VECTOR_PATH = os.getenv("AURA_VECTOR_PATH", os.path.splitext(_db_path)[0] + ".vectors")
+VECTORS_ENABLED = os.getenv("AURA_VECTORS", "1") == "1"
+
+TRIGRAM_WEIGHT = 0.5
+MIN_CAPACITY = 4096
+
+_WORD = re.compile(r"\w+")
+_SKIP = STOPWORDS | frozenset("the and for but not are you was her his she him had has our out all can get got too its off who how why".split())
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0) # msvcrt locks bytes from the current position
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError: # LK_LOCK gives up after ten one-second retries; keep waiting like flock does
+            continue
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _bucket(feature, dim):
+    h = zlib.crc32(feature.encode())
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+def embed(text, dim=VECTOR_DIM):
+    """Unit-length float32 vector of `text`; all zeros if it has no words."""
+    counts = np.zeros(dim, dtype=np.float32)
+    words = [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _SKIP]
+    features = [(w, 1.0) for w in words]
+    features += [(f"{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"#{w}#"
+        features += [(padded[i:i + 3], TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+    for feature, weight in features:
+        i, sign = _bucket(feature, dim)
+        counts[i] += sign * weight
+    vector = np.sign(counts) * np.log1p(np.abs(counts))
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def entry_text(triggers, lessons):
+    return f"{triggers or ''} {lessons or ''}"
+
+
+def user_key(user_phone):
+    return int.from_bytes(hashlib.blake2b(user_phone.encode(), digest_size=8).digest(), "little", signed=True)
+
+
+class VectorIndex:
+    def __init__(self, path=VECTOR_PATH, dim=VECTOR_DIM):
+        self.path = path
+        self.dim = dim
+        self.count = 0
+        self.capacity = 0
+        self.matrix = None # float32 [capacity, dim]
+        self.ids = None    # int64 [capacity, 2]: entry id, user key
+        self.by_user = {}  # user key -> int64 array of rows
+        self.generation = None # bumped by clear(), so other processes drop their row lists
+        self._lock = threading.Lock()
+
+    def _meta_path(self):
+        return self.path + ".json"
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(self.path + ".lock", "a+") as f:
+            _lock(f)
+            try:
+                yield
+            finally:
+                _unlock(f)
+
+    def _map(self, capacity):
+        self.matrix = np.memmap(self.path + ".f32", dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.ids = np.memmap(self.path + ".ids", dtype=np.int64, mode="r+", shape=(capacity, 2))
+        self.capacity = capacity
+
+    def _index_rows(self, start, stop):
+        users = np.asarray(self.ids[start:stop, 1])
+        order = np.argsort(users, kind="stable")
+        keys, first = np.unique(users[order], return_index=True)
+        for key, rows in zip(keys.tolist(), np.split(order + start, first[1:])):
+            known = self.by_user.get(key)
+            self.by_user[key] = rows if known is None else np.concatenate([known, rows])
+
+    def _sync(self):
+        """Pick up rows other processes appended; reading the small meta file is all it costs when nothing changed."""
+        try:
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        if meta["dim"] != self.dim:
+            raise RuntimeError(f"{self.path} holds {meta['dim']}-d vectors, AURA_VECTOR_DIM is {self.dim}; rebuild it")
+        if meta["generation"] != self.generation:
+            self.count, self.by_user, self.generation = 0, {}, meta["generation"]
+        if meta["capacity"] != self.capacity:
+            self._map(meta["capacity"])
+        if meta["count"] > self.count:
+            self._index_rows(self.count, meta["count"])
+            self.count = meta["count"]
+
+    def _publish(self):
+        # Written aside and renamed into place, so readers see the old count or the new one
+        self.generation = self.generation or 0
+        tmp = f"{self._meta_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "capacity": self.capacity, "generation": self.generation}, f)
+        os.replace(tmp, self._meta_path())
+
+    def _reserve(self, rows):
+        if self.count + rows <= self.capacity:
+            return
+        capacity = max(MIN_CAPACITY, self.capacity * 2, self.count + rows)
+        for suffix, row_bytes in ((".f32", self.dim * 4), (".ids", 16)):
+            with open(self.path + suffix, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._map(capacity)
+
+    def add_many(self, entry_ids, user_phones, vectors):
+        """Append rows; entries without a user_phone are skipped."""
+        keep = [i for i, phone in enumerate(user_phones) if phone]
+        if not keep:
+            return
+        with self._lock, self._file_lock():
+            self._sync()
+            self._reserve(len(keep))
+            start, stop = self.count, self.count + len(keep)
+            self.matrix[start:stop] = np.asarray(vectors, dtype=np.float32)[keep]
+            self.ids[start:stop, 0] = [entry_ids[i] for i in keep]
+            self.ids[start:stop, 1] = [user_key(user_phones[i]) for i in keep]
+            # Rows first, count second: a reader never sees a row that isn't fully written
+            self.matrix.flush()
+            self.ids.flush()
+            self.count = stop
+            self._publish()
+            self._index_rows(start, stop)
+
+    def add(self, entry_id, user_phone, text):
+        if user_phone:
+            self.add_many([entry_id], [user_phone], [embed(text, self.dim)])
+
+    def similar(self, user_phone, vector, k=5, exclude_id=None):
+        """[(entry_id, cosine similarity)] of the user's k closest entries, best first."""
+        with self._lock:
+            self._sync()
+            rows = self.by_user.get(user_key(user_phone)) if user_phone else None
+            if rows is None or not len(rows):
+                return []
+            ids = np.asarray(self.ids[rows, 0])
+            scores = self.matrix[rows] @ vector
+        if exclude_id is not None:
+            scores[ids == exclude_id] = -np.inf
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0] # nothing in common below that
+
+    def vector_of(self, entry_id, user_phone):
+        """The stored vector of an entry, found among its user's rows; None if it isn't indexed."""
+        with self._lock:
+            self._sync()
+            rows = self.by_user.get(user_key(user_phone)) if user_phone else None
+            if rows is None:
+                return None
+            match = rows[np.asarray(self.ids[rows, 0]) == entry_id]
+            return np.array(self.matrix[match[-1]]) if len(match) else None
+
+    def clear(self):
+        with self._lock, self._file_lock():
+            self._sync()
+            self.count, self.by_user = 0, {}
+            self.generation = (self.generation or 0) + 1
+            if self.capacity:
+                self._publish()
+
+    def stats(self):
+        with self._lock:
+            self._sync()
+            return {"entries": self.count, "users": len(self.by_user), "dim": self.dim, "capacity": self.capacity,
+                    "mapped_mb": round(self.capacity * (self.dim * 4 + 16) / 2**20, 1)}
+
+
+def rebuild(index, chunk_size=5000):
+    """Re-embed every entry with a user_phone, in id order, a chunk at a time."""
+    index.clear()
+    db = SessionLocal()
+    try:
+        last_id, total = 0, 0
+        while True:
+            rows = db.query(JournalEntry.id, JournalEntry.user_phone, JournalEntry.content, JournalEntry.lessons_learned).filter(
+                JournalEntry.id > last_id, JournalEntry.user_phone.isnot(None)
+            ).order_by(JournalEntry.id).limit(chunk_size).all()
+            if not rows:
+                return total
+            index.add_many([r.id for r in rows], [r.user_phone for r in rows],
+                           [embed(entry_text(r.content, r.lessons_learned), index.dim) for r in rows])
+            last_id, total = rows[-1].id, total + len(rows)
+    finally:
+        db.close()
+
+
+index = VectorIndex()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the similar-entries vector index next to aura.db")
+    parser.add_argument("--rebuild", action="store_true", help="re-embed every entry from journal_entries")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+    started = time.perf_counter()
+    count = rebuild(index)
+    print(f"{count} entries embedded in {time.perf_counter() - started:.1f}s ({index.path}.f32, {index.dim} dimensions)")
@@ -0,0 +1,89 @@
+"""Startup warm-up and readiness for the API process.
+
+The server starts answering as soon as the app is imported; warm-up then
+runs in the background, one named step at a time (start the inference pool,
+import OpenCV and run a blank frame, load the lexicons, import the Gemini
+SDK, ...). /livez only says the process is up. /readyz returns 503 until
+every step has finished, so a load balancer or orchestrator holds traffic
+back until the first request no longer pays for cold models. If a required
+step (the inference pool, the models, Aura Shield's lexicon) fails, /readyz
+stays at 503 and lists it under "failed"; errors of optional steps are only
+reported. Step timings, import times and the total time from process start
+to ready are reported by /readyz and exported as metrics.
+"""
+import asyncio
+import inspect
+import os
+import time
+
+import deps
+import metrics
+
+# 0 skips the optional model warm-up; the inference pool still starts in the background
+WARMUP_ENABLED = os.getenv("AURA_WARMUP", "1") == "1"
+
+STEP_SECONDS = "aura_warmup_step_seconds"
+
+
+class Lifecycle:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.import_seconds = None
+        self.ready_seconds = None
+        self.steps = {}
+        self.errors = {}
+        self.running = None
+        self.ready = False
+        self.failed = [] # required steps that raised; the process never becomes ready
+
+    def imported(self):
+        """Call at the end of the app module: the time spent importing it (and everything it imports)."""
+        self.import_seconds = time.perf_counter() - self.started
+        metrics.gauge("aura_import_seconds", "Seconds spent importing each lazily loaded dependency", module="main").set(self.import_seconds)
+
+    async def run(self, steps, required=()):
+        """Run (name, fn) steps in order; sync functions go to a thread.
+
+        Every step runs even after one fails. A failed step named in `required` keeps the process unready.
+        """
+        for name, fn in steps:
+            self.running = name
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    await fn()
+                else:
+                    await asyncio.to_thread(fn)
+            except Exception as e:
+                self.errors[name] = str(e)
+                if name in required:
+                    self.failed.append(name)
+                with open("ai_error.log", "a") as f:
+                    f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Warm-up step {name} failed: {str(e)}\n")
+            finally:
+                self.steps[name] = time.perf_counter() - started
+                metrics.gauge(STEP_SECONDS, "Seconds each startup warm-up step took", step=name).set(self.steps[name])
+        self.running = None
+        if self.failed:
+            print(f"Aura not ready: warm-up failed for {', '.join(self.failed)} (see /readyz)")
+            return
+        self.ready_seconds = time.perf_counter() - self.started
+        metrics.gauge("aura_ready_seconds", "Seconds from process start until /readyz first passed").set(self.ready_seconds)
+        self.ready = True
+        print(f"Aura ready in {self.ready_seconds:.2f}s (imports {self.import_seconds or 0:.2f}s, "
+              + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.steps.items()) + ")")
+
+    def status(self):
+        return {
+            "status": "ready" if self.ready else "failed" if self.failed else "warming",
+            "warming": self.running,
+            "failed": self.failed,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            "steps": {name: round(seconds, 3) for name, seconds in self.steps.items()},
+            "errors": self.errors,
+            "imports": deps.import_times(),
+        }
+
+
+lifecycle = Lifecycle()
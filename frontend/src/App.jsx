@@ -45,6 +45,7 @@ ChartJS.register(
 );
 
 const API_BASE = import.meta.env.PROD ? "" : "http://localhost:8000";
+const WS_BASE = (API_BASE || window.location.origin).replace(/^http/, 'ws');
 
 const initialForm = {
     reflection_date: new Date().toISOString().split('T')[0],
@@ -365,53 +366,61 @@ const WebcamAnalyzer = ({ onMoodDetected, template }) => {
         if (!webcamRef.current) return;
         setAnalyzing(true);
 
+        // Stream frames and audio chunks over one socket; the server pushes the fused mood as it changes
+        const ws = new WebSocket(`${WS_BASE}/ws/mood`);
+        ws.binaryType = 'arraybuffer';
+        let latest = null;
+        let stream = null;
+
+        const sendFrame = () => new Promise(resolve => {
+            webcamRef.current?.getCanvas()?.toBlob(blob => {
+                if (blob && ws.readyState === WebSocket.OPEN) ws.send(new Blob(['I', blob]));
+                resolve();
+            }, 'image/jpeg', 0.9);
+        });
+
+        ws.onmessage = (event) => {
+            latest = JSON.parse(event.data);
+            if (latest.audio_error) console.warn("Voice analysis stopped:", latest.audio_error);
+            setLastMood(latest.mood);
+            setLastQuote(latest.quote);
+            setLastDesc(latest.desc);
+            setAudioMood(latest.audio_mood);
+            onMoodDetected(latest.mood);
+        };
+
         try {
-            // 1. Capture Visual Screenshot
-            const imageSrc = webcamRef.current.getScreenshot();
+            await new Promise((resolve, reject) => {
+                ws.onopen = resolve;
+                ws.onerror = reject;
+            });
 
-            // 2. Capture Audio (3 seconds)
-            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-            const mediaRecorder = new MediaRecorder(stream);
-            const audioChunks = [];
+            // 1. Capture Visual Screenshot right away so the first mood comes back early
+            await sendFrame();
 
-            mediaRecorder.ondataavailable = (event) => audioChunks.push(event.data);
-            mediaRecorder.start();
+            // 2. Capture Audio (3 seconds), shipping a chunk every 500ms
+            stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            const mediaRecorder = new MediaRecorder(stream);
+            mediaRecorder.ondataavailable = (event) => {
+                if (event.data.size && ws.readyState === WebSocket.OPEN) ws.send(new Blob(['A', event.data]));
+            };
+            const stopped = new Promise(resolve => { mediaRecorder.onstop = resolve; });
+            mediaRecorder.start(500);
 
+            const frameTimer = setInterval(sendFrame, 1000);
             await new Promise(resolve => setTimeout(resolve, 3000));
+            clearInterval(frameTimer);
             mediaRecorder.stop();
+            await stopped;
 
-            mediaRecorder.onstop = async () => {
-                const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
-                const reader = new FileReader();
-                reader.readAsDataURL(audioBlob);
-                reader.onloadend = async () => {
-                    const audioBase64 = reader.result.split(',')[1];
-
-                    try {
-                        // Send both visual and audio data
-                        const res = await axios.post(`${API_BASE}/analyze-multi-modal`, {
-                            image: imageSrc,
-                            audio: audioBase64
-                        });
-
-                        if (res.data.mood) {
-                            setLastMood(res.data.mood);
-                            setLastQuote(res.data.quote);
-                            setLastDesc(res.data.desc);
-                            setAudioMood(res.data.audio_mood);
-                            onMoodDetected(res.data.mood);
-                            speak(res.data.quote + ". " + res.data.desc);
-                        }
-                    } catch (err) {
-                        console.error("Multi-modal Analysis Error:", err);
-                    } finally {
-                        setAnalyzing(false);
-                        stream.getTracks().forEach(track => track.stop());
-                    }
-                };
-            };
+            // Give the last audio chunk a moment to be analysed before closing
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            if (latest) speak(latest.quote + ". " + latest.desc);
         } catch (e) {
             console.error("Capture Error:", e);
+        } finally {
+            ws.close();
+            stream?.getTracks().forEach(track => track.stop());
             setAnalyzing(false);
         }
     };
@@ -687,7 +696,10 @@ export default function App() {
 
     const fetchEntries = async () => {
         try {
-            const res = await axios.get(`${API_BASE}/journal/entries`);
+            // Only the latest page and the columns the dashboard shows; older pages via the X-Next-Cursor header
+            const res = await axios.get(`${API_BASE}/journal/entries`, {
+                params: { limit: 20, fields: 'id,created_at,overall_mood,emotion,sentiment_score,breathing_exercise,focus_music,counselor_info' }
+            });
             setEntries(res.data);
             if (res.data && res.data.length > 0) {
                 const latest = res.data[0];
@@ -724,10 +736,43 @@ export default function App() {
                 user_gender: userGender,
                 user_phone: userPhone
             };
-            const res = await axios.post(`${API_BASE}/journal/entries`, payload);
+            // Counselling fields arrive over SSE as Gemini finishes each one
+            const res = await fetch(`${API_BASE}/journal/entries/stream`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let partial = {};
+            let responseData = null;
+            while (responseData === null) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const event = (block.match(/^event: (.*)$/m) || [])[1];
+                    const data = JSON.parse((block.match(/^data: (.*)$/m) || [])[1] || 'null');
+                    if (event === 'shield') {
+                        partial = { ...partial, ...data };
+                        setShowSafetyAlert(true);
+                    } else if (event === 'field') {
+                        partial = { ...partial, [data.field]: data.value };
+                    } else if (event === 'done') {
+                        responseData = data;
+                    }
+                    setBotMessage({ ...partial });
+                }
+            }
+            if (responseData === null) throw new Error("Stream ended before the entry was saved");
 
             // Parse JSON strings from backend
-            const responseData = res.data;
             try {
                 if (typeof responseData.counselor_tips === 'string') {
                     responseData.counselor_tips = JSON.parse(responseData.counselor_tips);
@@ -738,15 +783,15 @@ export default function App() {
             }
 
             setBotMessage(responseData);
-            if (res.data.is_critical) {
+            if (responseData.is_critical) {
                 setShowSafetyAlert(true);
             }
             setPersistentResources({
-                breathing: res.data.breathing_exercise,
-                music: res.data.focus_music,
-                tip: res.data.counselor_info
+                breathing: responseData.breathing_exercise,
+                music: responseData.focus_music,
+                tip: responseData.counselor_info
             });
-            speak(res.data.suggestion);
+            speak(responseData.suggestion);
             setFormData(initialForm);
             fetchEntries();
             fetchStats();